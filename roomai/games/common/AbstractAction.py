@@ -10,6 +10,7 @@ class AbstractAction(object):
     '''
     The abstract class of an action. 
     '''
+    __slots__ = ("__key__",)
 
     def __init__(self, key):
         if not isinstance(key,str):
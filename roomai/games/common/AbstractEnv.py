@@ -6,6 +6,7 @@ from roomai.games.common import AbstractStatePerson
 from roomai.games.common import AbstractStatePrivate
 from roomai.games.common import AbstractStatePublic
 from roomai.games.common import Info
+from roomai.games.common import HistoryView
 
 
 
@@ -16,10 +17,22 @@ class AbstractEnv(object):
     '''
 
 
-    __public_state_history__            = []
-    __person_states_history__           = []
-    __private_state_history__           = []
-    __playerid_action_history__         = []
+    def __init__(self):
+        ## every environment owns its history, so many environments can run side by side in one process
+        self.__public_state_history__            = []
+        self.__person_states_history__           = []
+        self.__private_state_history__           = []
+        self.__playerid_action_history__         = []
+
+    def reset(self):
+        '''
+        Drop the states of the current game. The histories are rebound to new lists instead of emptied,
+        so the histories and the infos returned before keep the finished game.
+        '''
+        self.__public_state_history__    = []
+        self.__private_state_history__   = []
+        self.__playerid_action_history__ = []
+        self.__person_states_history__   = []
 
     def __gen_infos__(self):
         logger = roomai.get_logger()
@@ -27,8 +40,11 @@ class AbstractEnv(object):
             logger.fatal("call env.__gen_infos__ before call the env.init function")
             raise Exception("call env.__gen_infos__ before call the env.init function")
 
-        num_players = len(self.__person_states_history__)
-        __infos__ = [Info(tuple(self.__public_state_history__), tuple(self.__person_states_history__[i]), tuple(self.__playerid_action_history__)) for i in range(num_players)]
+        ## the infos are views of the histories, which is O(1) per player instead of copying the histories
+        num_players    = len(self.__person_states_history__)
+        public_view    = HistoryView(self.__public_state_history__)
+        action_view    = HistoryView(self.__playerid_action_history__)
+        __infos__ = [Info(public_view, HistoryView(self.__person_states_history__[i]), action_view) for i in range(num_players)]
 
 
         return tuple(__infos__)
@@ -102,10 +118,11 @@ class AbstractEnv(object):
             raise ValueError("Env has reached the initialization state and can't go back further. ")
 
 
-        self.__public_state_history__.pop()
-        self.__private_state_history__.pop()
-        self.__person_states_history__.pop()
-        self.__playerid_action_history__.pop()
+        ## rebind the histories instead of popping them, so the infos sent before still see their states
+        self.__public_state_history__    = self.__public_state_history__[:-1]
+        self.__private_state_history__   = self.__private_state_history__[:-1]
+        self.__person_states_history__   = [person_states[:-1] for person_states in self.__person_states_history__]
+        self.__playerid_action_history__ = self.__playerid_action_history__[:-1]
 
         infos = self.__gen_infos__()
         return infos, self.__public_state_history__, self.__person_states_history__, self.__private_state_history__, self.__playerid_action_history__
@@ -43,6 +43,8 @@ class RandomPlayer(AbstractPlayer):
 
     def take_action(self):
         import random
+        if hasattr(self.available_actions, "sample"):
+            return self.available_actions.sample(random)
         idx = int(random.random() * len(self.available_actions))
         return list(self.available_actions.values())[idx]
 
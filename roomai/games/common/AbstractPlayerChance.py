@@ -34,6 +34,9 @@ class RandomPlayerChance(AbstractPlayerChance):
 
     def take_action(self):
         import random
+        if hasattr(self.available_actions, "draw"):
+            ## the deck is shuffled by the environment
+            return self.available_actions.draw()
         idx = int(random.random() * len(self.available_actions))
         return list(self.available_actions.values())[idx]
 
@@ -1,8 +1,9 @@
 #!/bin/python
 #coding=utf8
 
+import types
+
 import roomai.games.common
-from roomai import FrozenDict
 logger = roomai.get_logger()
 
 
@@ -11,20 +12,36 @@ class AbstractStatePerson(object):
     '''
     The abstract class of the person state. The information in the person state is public to the corresponding player and hidden from other players
     '''
+    __slots__ = ("__id__", "__available_actions__", "__available_actions_view__")
+
     def __init__(self):
         self.__id__ = 0
         self.__available_actions__ = dict()
+        ## (the dict, the read-only view of the dict), rebuilt only when the dict is replaced
+        self.__available_actions_view__ = None
 
     def __get_id__(self):   return self.__id__
     id = property(__get_id__, doc="The id of player w.r.t this person state")
 
-    def __get_available_actions__(self):  return FrozenDict(self.__available_actions__)
-    available_actions = property(__get_available_actions__, doc="All valid actions for the player expected to take an action. The person state w.r.t no-current player contains empty available_actions")
+    def __get_available_actions__(self):
+        if isinstance(self.__available_actions__, dict) == False:
+            ## a read-only mapping already, for example TexasHoldemLegalActions
+            return self.__available_actions__
+        view = self.__available_actions_view__
+        if view is None or view[0] is not self.__available_actions__:
+            view = (self.__available_actions__, types.MappingProxyType(self.__available_actions__))
+            self.__available_actions_view__ = view
+        return view[1]
+    available_actions = property(__get_available_actions__, doc="All valid actions for the player expected to take an action. The person state w.r.t no-current player contains empty available_actions. "
+                                                                "It is a read-only view of the dict(action_key, action), which is the same object for every read until the actions change")
 
 
     def __deepcopy__(self, memodict={}, newinstance = None):
         if newinstance is  None:
             newinstance = AbstractStatePerson()
         newinstance.__id__ = self.__id__
-        newinstance.__available_actions__ = dict(self.available_actions)
+        if isinstance(self.__available_actions__, dict):
+            newinstance.__available_actions__ = dict(self.__available_actions__)
+        else:
+            newinstance.__available_actions__ = self.__available_actions__.__deepcopy__()
         return newinstance
\ No newline at end of file
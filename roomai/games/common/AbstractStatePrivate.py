@@ -10,6 +10,8 @@ class AbstractStatePrivate(object):
     '''
     The Abstract class of the private state. The information in the private state is hidden from every player
     '''
+    __slots__ = ()
+
     def __deepcopy__(self, memodict={}, newinstance = None):
         if newinstance is None:
             return AbstractStatePrivate()
@@ -12,11 +12,14 @@ class AbstractStatePublic(object):
     The abstract class of the public state. The information in the public state is public to every player.\n
     The attributes with param prefix is the parameters set by the init function of enviroment.
     '''
+    __slots__ = ("__turn__", "__param_num_normal_players__", "__param_start_turn__", "__is_terminal__", "__scores__")
+
     def __init__(self):
         self.__turn__               = None
 
         ## parameters
         self.__param_num_normal_players__    = 2
+        self.__param_start_turn__            = None
 
         self.__is_terminal__        = False
         self.__scores__             = None
@@ -1,6 +1,8 @@
 #!/bin/python
 
 class ActionRecord(object):
+    __slots__ = ("__playerid__", "__action__")
+
     def __init__(self, playerid, action):
         self.__playerid__ = playerid
         self.__action__   = action
@@ -0,0 +1,81 @@
+#!/bin/python
+#coding:utf-8
+
+import math
+import statistics
+
+
+class CompeteStats(object):
+    '''
+    The running statistics of the scores of the players in a compete, updated hand by hand with the Welford algorithm.\n
+    The confidence intervals of the mean scores use the normal approximation, and the compete can stop once the intervals are narrow enough or one player is clearly ahead.\n
+    Examples of usages:\n
+    >> stats = roomai.games.common.CompeteStats(2, confidence = 0.95)\n
+    >> stats.add([10, -10])\n
+    >> stats.add([-30, 30])\n
+    >> stats.means\n
+    (-10.0, 10.0)\n
+    >> stats.intervals\n
+    ((-49.19..., 29.19...), (-29.19..., 49.19...))\n
+    '''
+
+    def __init__(self, num_players, confidence = 0.95):
+        '''
+        :param num_players: The number of the players
+        :param confidence: The confidence level of the intervals, 0 < confidence < 1
+        '''
+        if confidence <= 0 or confidence >= 1:
+            raise ValueError("The confidence must be in (0, 1), but it is %s" % (str(confidence)))
+        self.__count__      = 0
+        self.__means__      = [0.0 for i in range(num_players)]
+        ## the sums of the squared differences from the means
+        self.__m2s__        = [0.0 for i in range(num_players)]
+        self.__confidence__ = confidence
+        self.__z__          = statistics.NormalDist().inv_cdf(0.5 + confidence / 2.0)
+
+    def add(self, scores):
+        '''
+        Add the scores of a hand
+
+        :param scores: The scores of the players in the hand
+        '''
+        self.__count__ += 1
+        for i in range(len(self.__means__)):
+            delta             = scores[i] - self.__means__[i]
+            self.__means__[i] += delta / self.__count__
+            self.__m2s__[i]   += delta * (scores[i] - self.__means__[i])
+
+    def __get_count__(self):        return self.__count__
+    count = property(__get_count__, doc = "The number of the hands added")
+
+    def __get_confidence__(self):   return self.__confidence__
+    confidence = property(__get_confidence__, doc = "The confidence level of the intervals, for example confidence = 0.95")
+
+    def __get_means__(self):        return tuple(self.__means__)
+    means = property(__get_means__, doc = "The mean scores of the players. For example, means = (-10.0, 10.0)")
+
+    def __get_variances__(self):
+        if self.__count__ < 2:
+            return tuple([float("inf") for m2 in self.__m2s__])
+        return tuple([m2 / (self.__count__ - 1) for m2 in self.__m2s__])
+    variances = property(__get_variances__, doc = "The sample variances of the scores of the players, or inf with less than two hands")
+
+    def __get_std_errors__(self):
+        return tuple([math.sqrt(v / max(self.__count__, 1)) for v in self.variances])
+    std_errors = property(__get_std_errors__, doc = "The standard errors of the mean scores of the players")
+
+    def __get_intervals__(self):
+        return tuple([(m - self.__z__ * e, m + self.__z__ * e) for m, e in zip(self.__means__, self.std_errors)])
+    intervals = property(__get_intervals__, doc = "The confidence intervals (low, high) of the mean scores of the players")
+
+    def __get_max_width__(self):
+        return max([2 * self.__z__ * e for e in self.std_errors])
+    max_width = property(__get_max_width__, doc = "The width of the widest confidence interval")
+
+    def __get_leader__(self):
+        intervals = self.intervals
+        for i in range(len(intervals)):
+            if all([intervals[i][0] > intervals[j][1] for j in range(len(intervals)) if j != i]):
+                return i
+        return None
+    leader = property(__get_leader__, doc = "The id of the player whose confidence interval is above the intervals of all other players, or None if no player is clearly ahead")
@@ -0,0 +1,54 @@
+#!/bin/python
+#coding:utf-8
+
+import roomai.games.common
+
+
+class EnvPool(object):
+    '''
+    A pool of game environments, for a worker hosting many tables. A released environment is reset, and the next acquire reuses it
+    instead of allocating a new one. The reset environment starts every game with new histories and states, so the infos of its finished games stay valid.\n
+    Examples of usages:\n
+    >> pool = roomai.games.common.EnvPool(roomai.games.texasholdem.TexasHoldemEnv)\n
+    >> env  = pool.acquire()\n
+    >> infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":3})\n
+    >> ## play the game\n
+    >> pool.release(env)\n
+    '''
+
+    def __init__(self, env_class, max_size = 1024):
+        '''
+        :param env_class: The class of the game environments, for example roomai.games.texasholdem.TexasHoldemEnv
+        :param max_size: The maximum number of the idle environments kept by the pool
+        '''
+        if max_size < 0:
+            raise ValueError("The max size of the EnvPool must not be negative, but it is %d" % (max_size))
+        self.__env_class__   = env_class
+        self.__max_size__    = max_size
+        self.__idle_envs__   = []
+        self.__num_created__ = 0
+
+    def __get_num_idle__(self):    return len(self.__idle_envs__)
+    num_idle = property(__get_num_idle__, doc = "The number of the idle environments in the pool")
+
+    def __get_num_created__(self): return self.__num_created__
+    num_created = property(__get_num_created__, doc = "The number of the environments created by the pool")
+
+    def acquire(self):
+        '''
+        :return: An idle environment, or a new one if the pool has no idle environment. Call its init function to start a game
+        '''
+        if len(self.__idle_envs__) > 0:
+            return self.__idle_envs__.pop()
+        self.__num_created__ += 1
+        return self.__env_class__()
+
+    def release(self, env):
+        '''
+        Reset the environment and return it to the pool. The states of its game mustn't be used after the release.
+
+        :param env: The environment acquired from the pool
+        '''
+        env.reset()
+        if len(self.__idle_envs__) < self.__max_size__:
+            self.__idle_envs__.append(env)
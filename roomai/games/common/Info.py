@@ -8,11 +8,55 @@ from roomai.games.common import AbstractStatePublic
 
 
 
+class HistoryView(object):
+    '''
+    A read-only view of the first length items of a history list of the environment.\n
+    The environment only appends to the lists it has handed out, and rebinds them when it goes back, resets or starts a new game,
+    so the view keeps the states it was built with without copying the history. The history modes "last" and "none" of TexasHoldemEnv are the exception, where the states change in place.
+    It behaves like a tuple for reading, and tuple(view) gives a real copy.
+    '''
+    __slots__ = ("__items__", "__length__")
+
+    def __init__(self, items, length = None):
+        self.__items__  = items
+        self.__length__ = len(items) if length is None else length
+
+    def __len__(self):
+        return self.__length__
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self.__items__[0:self.__length__][index])
+        if index < 0:
+            index += self.__length__
+        if index < 0 or index >= self.__length__:
+            raise IndexError("The index is out of the range of the history")
+        return self.__items__[index]
+
+    def __iter__(self):
+        for i in range(self.__length__):
+            yield self.__items__[i]
+
+    def __eq__(self, other):
+        if isinstance(other, (HistoryView, tuple, list)):
+            return len(other) == self.__length__ and all([a == b for a, b in zip(self, other)])
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
 class Info(object):
     '''
-    The class of information sent by env to a player. The Info class contains the public state history and the corresponding person state history w.r.t the target player
+    The class of information sent by env to a player. The Info class contains the public state history and the corresponding person state history w.r.t the target player.\n
+    The histories are HistoryViews of the histories of the environment, so an Info is built in O(1). They keep the game they were built in after the environment is reset or starts a new game.
     '''
-    def __init__(self, public_state_history_tuple, person_state_history_tuple, playerid_action_history_tuple):
+    def __init__(self, public_state_history_tuple = (), person_state_history_tuple = (), playerid_action_history_tuple = ()):
         self.__public_state_history_tuple__       = public_state_history_tuple
         self.__person_state_history_tuple__       = person_state_history_tuple
         self.__playerid_action_history_tuple__    = playerid_action_history_tuple
@@ -32,7 +76,7 @@ class Info(object):
 
     def __deepcopy__(self, memodict={}):
         newinstance = Info()
-        newinstance.__public_state_history_tuple__  = self.__public_state_history_tuple__
-        newinstance.__personc_state_history_tuple__ = self.__person_state_history_tuple__
-        newinstance.__playerid_action_history_tuple__ = self.__playerid_action_history_tuple__
-        return newinstance
\ No newline at end of file
+        newinstance.__public_state_history_tuple__  = tuple(self.__public_state_history_tuple__)
+        newinstance.__person_state_history_tuple__  = tuple(self.__person_state_history_tuple__)
+        newinstance.__playerid_action_history_tuple__ = tuple(self.__playerid_action_history_tuple__)
+        return newinstance
@@ -7,10 +7,13 @@ from roomai.games.common.AbstractStatePrivate import AbstractStatePrivate
 from roomai.games.common.AbstractAction import AbstractAction
 from roomai.games.common.AbstractActionChance import AbstractActionChance
 from roomai.games.common.Info import Info
+from roomai.games.common.Info import HistoryView
 from roomai.games.common.AbstractPlayer import AbstractPlayer
 from roomai.games.common.AbstractPlayerChance import AbstractPlayerChance
 from roomai.games.common.AbstractPlayer import RandomPlayer
 from roomai.games.common.AbstractPlayerChance import RandomPlayerChance
 from roomai.games.common.AbstractEnv import AbstractEnv
+from roomai.games.common.EnvPool import EnvPool
+from roomai.games.common.CompeteStats import CompeteStats
 
 
@@ -0,0 +1,329 @@
+#!/bin/python
+#coding:utf-8
+import os
+import itertools
+import multiprocessing
+
+import numpy as np
+
+import roomai
+from roomai.games.texasholdem.TexasHoldemUtil      import Stage
+from roomai.games.texasholdem.TexasHoldemEvaluator import HandEvaluator
+from roomai.games.texasholdem.TexasHoldemIndexer   import HandIndexer
+
+
+AllStages = [Stage.firstStage, Stage.secondStage, Stage.thirdStage, Stage.fourthStage]
+
+## the 990 pairs of the 45 cards left once the board is complete
+RiverOpponentPairs = np.array(list(itertools.combinations(range(45), 2)), dtype = np.int64)
+
+
+def __hand_strength__(hero, opponents):
+    ## the probability of beating a random opponent, counting a tie as a half
+    return ((hero[..., np.newaxis] > opponents).sum(axis = -1) + 0.5 * (hero[..., np.newaxis] == opponents).sum(axis = -1)) / float(opponents.shape[-1])
+
+
+def __features_chunk__(args):
+    pipeline, stage, chunk = args
+    path = pipeline.__path__("stage%d_features_%05d.npy" % (stage, chunk))
+    if os.path.exists(path):
+        return chunk
+
+    indexer = HandIndexer.lookup(stage)
+    start   = chunk * pipeline.chunk_size
+    end     = min(indexer.size, start + pipeline.chunk_size)
+    cards   = indexer.unindex_batch(np.arange(start, end, dtype = np.int64))
+    rng     = np.random.default_rng(np.random.SeedSequence([pipeline.seed, stage, chunk]))
+    pipeline.__save__(path, pipeline.compute_features(stage, cards, rng))
+    return chunk
+
+
+class BucketingPipeline(object):
+    '''
+    The offline card abstraction pipeline of TexasHoldem.\n
+    For every canonical hand (see HandIndexer) of a stage, the pipeline computes the distribution of the hand strength over the runouts
+    of the remaining public cards, where the hand strength is the probability of beating a random opponent (a tie counts a half).
+    Then the hands are clustered into buckets with k-means, and the bucket maps are saved as compact binary files loaded by CardAbstraction.\n
+    The features are computed in chunks, and every finished chunk, the cluster centers and the bucket maps are saved in the directory.
+    A pipeline interrupted can be resumed by running it again with the same directory.\n
+    Examples of usages:\n
+    >> import roomai.games.texasholdem\n
+    >> pipeline = roomai.games.texasholdem.BucketingPipeline("abstraction", num_buckets = 50)\n
+    >> pipeline.run(num_processes = 8)\n
+    '''
+
+    ## compute_features works on at most this many hands at once, so the memory of a process is bounded whatever chunk_size is
+    max_batch_rows = 512
+    ## the default number of processes of run is the number of cpus up to this
+    max_default_processes = 8
+
+    def __init__(self, directory, num_buckets = 50, num_runouts = 16, num_opponents = 16, num_bins = 8,
+                 chunk_size = 4096, max_fit_points = 200000, num_iterations = 20, seed = 0):
+        '''
+        :param directory: The directory of the features, the cluster centers and the bucket maps
+        :param num_buckets: The number of the buckets of every stage, an int or a dict from the stage to an int. The maximum is 65536
+        :param num_runouts: The number of the sampled runouts of the remaining public cards for every hand
+        :param num_opponents: The number of the sampled opponent hands for every runout. The hand strength on the river is computed exactly
+        :param num_bins: The number of the bins of the hand strength histograms
+        :param chunk_size: The number of the hands in a chunk
+        :param max_fit_points: k-means fits the centers on at most max_fit_points hands sampled from all hands, and then assigns every hand to a bucket
+        :param num_iterations: The number of the k-means iterations
+        :param seed: The seed of the pipeline. The same seed gives the same buckets, whatever the number of processes is
+        '''
+        self.directory      = directory
+        self.num_runouts    = num_runouts
+        self.num_opponents  = num_opponents
+        self.num_bins       = num_bins
+        self.chunk_size     = chunk_size
+        self.max_fit_points = max_fit_points
+        self.num_iterations = num_iterations
+        self.seed           = seed
+        if isinstance(num_buckets, dict):
+            self.num_buckets = dict(num_buckets)
+        else:
+            self.num_buckets = dict([(stage, num_buckets) for stage in AllStages])
+        for stage in self.num_buckets:
+            if self.num_buckets[stage] < 1 or self.num_buckets[stage] > 65536:
+                raise ValueError("The number of the buckets must be in [1, 65536], but it is %d" % (self.num_buckets[stage]))
+
+    def run(self, stages = None, num_processes = None):
+        '''
+        Run the pipeline, skipping the steps finished before
+
+        :param stages: The stages to run. The default is all stages
+        :param num_processes: The number of processes. The default is the number of cpus up to max_default_processes
+        '''
+        if stages is None:
+            stages = AllStages
+        if num_processes is None:
+            num_processes = min(multiprocessing.cpu_count(), self.max_default_processes)
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        logger = roomai.get_logger()
+        for stage in stages:
+            if os.path.exists(self.__path__(CardAbstraction.bucket_file(stage))):
+                continue
+            num_chunks = (HandIndexer.lookup(stage).size + self.chunk_size - 1) // self.chunk_size
+            tasks      = [(self, stage, chunk) for chunk in range(num_chunks)
+                          if not os.path.exists(self.__path__("stage%d_features_%05d.npy" % (stage, chunk)))]
+            if num_processes > 1 and len(tasks) > 1:
+                HandEvaluator.load_tables()
+                pool = multiprocessing.Pool(num_processes)
+                try:
+                    for count, chunk in enumerate(pool.imap_unordered(__features_chunk__, tasks)):
+                        logger.info("BucketingPipeline: stage %d, %d/%d chunks of features are computed" % (stage, count + 1, len(tasks)))
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                for task in tasks:
+                    __features_chunk__(task)
+
+            centers = self.__fit__(stage, num_chunks)
+            buckets = []
+            for chunk in range(num_chunks):
+                features = np.load(self.__path__("stage%d_features_%05d.npy" % (stage, chunk)))
+                buckets.append(self.__assign__(self.__points__(stage, features), centers))
+            dtype = np.uint8 if self.num_buckets[stage] <= 256 else np.uint16
+            self.__save__(self.__path__(CardAbstraction.bucket_file(stage)), np.concatenate(buckets).astype(dtype))
+            logger.info("BucketingPipeline: stage %d is clustered into %d buckets" % (stage, len(centers)))
+
+    def compute_features(self, stage, cards, rng):
+        '''
+        Compute the features of a batch of hands
+
+        :param stage: The stage of the hands
+        :param cards: An integer array with the shape [N, num_cards], the canonical card indices of the hand cards followed by the public cards
+        :param rng: A numpy random Generator
+        :return: A float32 array with the shape [N, num_bins + 1]. The first num_bins columns are the histogram of the hand strength, and the last column is the expected hand strength
+        '''
+        if cards.shape[0] > self.max_batch_rows:
+            return np.concatenate([self.compute_features(stage, cards[start:start + self.max_batch_rows], rng)
+                                   for start in range(0, cards.shape[0], self.max_batch_rows)])
+
+        num_rows   = cards.shape[0]
+        num_public = cards.shape[1] - 2
+        used       = np.zeros((num_rows, 52), dtype = bool)
+        used[np.arange(num_rows)[:, np.newaxis], cards] = True
+
+        if num_public == 5:
+            ## all opponent hands on the river
+            deck      = np.argsort(used, axis = 1, kind = "stable")[:, 0:45]
+            opponents = deck[:, RiverOpponentPairs]
+            board     = np.repeat(cards[:, np.newaxis, 2:], len(RiverOpponentPairs), axis = 1)
+            hero      = HandEvaluator.evaluate_batch(cards)
+            villain   = HandEvaluator.evaluate_batch(np.concatenate([opponents, board], axis = 2).reshape(-1, 7)).reshape(num_rows, -1)
+            strength  = __hand_strength__(hero, villain)[:, np.newaxis]
+        else:
+            num_runouts = self.num_runouts
+            num_drawn   = 5 - num_public
+            keys        = rng.random((num_rows, num_runouts, 52)) + used[:, np.newaxis, :]
+            runouts     = np.argpartition(keys, num_drawn - 1, axis = 2)[:, :, 0:num_drawn]
+            board       = np.concatenate([np.repeat(cards[:, np.newaxis, 2:], num_runouts, axis = 1), runouts], axis = 2)
+            hero        = HandEvaluator.evaluate_batch(np.concatenate([np.repeat(cards[:, np.newaxis, 0:2], num_runouts, axis = 1), board], axis = 2).reshape(-1, 7)).reshape(num_rows, num_runouts)
+
+            ## the opponents are pairs of the 45 cards out of the hand cards and the runout, sampled by their indices in RiverOpponentPairs
+            used_runout = np.repeat(used[:, np.newaxis, :], num_runouts, axis = 1)
+            np.put_along_axis(used_runout, runouts, True, axis = 2)
+            deck        = np.argsort(used_runout, axis = 2, kind = "stable")[:, :, 0:45]
+            pairs       = RiverOpponentPairs[rng.integers(0, len(RiverOpponentPairs), (num_rows, num_runouts, self.num_opponents))]
+            opponents   = np.take_along_axis(deck[:, :, np.newaxis, :], pairs, axis = 3)
+            board       = np.repeat(board[:, :, np.newaxis, :], self.num_opponents, axis = 2)
+            villain     = HandEvaluator.evaluate_batch(np.concatenate([opponents, board], axis = 3).reshape(-1, 7)).reshape(num_rows, num_runouts, self.num_opponents)
+            strength    = __hand_strength__(hero, villain)
+
+        bins      = np.minimum((strength * self.num_bins).astype(np.int64), self.num_bins - 1)
+        histogram = np.zeros((num_rows, self.num_bins))
+        for b in range(self.num_bins):
+            histogram[:, b] = (bins == b).mean(axis = 1)
+        return np.concatenate([histogram, strength.mean(axis = 1)[:, np.newaxis]], axis = 1).astype(np.float32)
+
+    @classmethod
+    def kmeans(cls, points, num_clusters, num_iterations, rng):
+        '''
+        Vectorized k-means with the k-means++ initialization
+
+        :param points: A float array with the shape [N, D]
+        :param num_clusters: The number of the clusters
+        :param num_iterations: The number of the Lloyd iterations
+        :param rng: A numpy random Generator
+        :return: The centers, a float array with the shape [min(num_clusters, N), D]
+        '''
+        points       = np.asarray(points, dtype = np.float64)
+        num_clusters = min(num_clusters, len(points))
+        centers      = [points[rng.integers(len(points))]]
+        distances    = ((points - centers[0]) ** 2).sum(axis = 1)
+        for k in range(1, num_clusters):
+            total = distances.sum()
+            if total <= 0:
+                centers.append(points[rng.integers(len(points))])
+            else:
+                centers.append(points[min(np.searchsorted(np.cumsum(distances), rng.random() * total), len(points) - 1)])
+            distances = np.minimum(distances, ((points - centers[-1]) ** 2).sum(axis = 1))
+        centers = np.array(centers)
+
+        for iteration in range(num_iterations):
+            labels  = cls.__assign__(points, centers)
+            counts  = np.bincount(labels, minlength = num_clusters)
+            sums    = np.zeros(centers.shape)
+            for d in range(points.shape[1]):
+                sums[:, d] = np.bincount(labels, weights = points[:, d], minlength = num_clusters)
+            nonempty          = counts > 0
+            updated           = centers.copy()
+            updated[nonempty] = sums[nonempty] / counts[nonempty][:, np.newaxis]
+            if np.allclose(updated, centers):
+                break
+            centers = updated
+        return centers
+
+    @classmethod
+    def __assign__(cls, points, centers):
+        points    = np.asarray(points, dtype = np.float64)
+        distances = (points ** 2).sum(axis = 1)[:, np.newaxis] - 2 * points.dot(centers.T) + (centers ** 2).sum(axis = 1)[np.newaxis, :]
+        return distances.argmin(axis = 1)
+
+    def __fit__(self, stage, num_chunks):
+        path = self.__path__("stage%d_centers.npy" % (stage))
+        if os.path.exists(path):
+            return np.load(path)
+
+        ## k-means on the cumulative histograms, whose euclidean distance follows the earth mover's distance between the histograms.
+        ## The river has no runout left, and is clustered by the expected hand strength
+        rng      = np.random.default_rng(np.random.SeedSequence([self.seed, stage]))
+        size     = HandIndexer.lookup(stage).size
+        sampled  = np.sort(rng.choice(size, min(size, self.max_fit_points), replace = False))
+        points   = []
+        for chunk in range(num_chunks):
+            selected = sampled[(sampled >= chunk * self.chunk_size) & (sampled < (chunk + 1) * self.chunk_size)] - chunk * self.chunk_size
+            if len(selected) > 0:
+                features = np.load(self.__path__("stage%d_features_%05d.npy" % (stage, chunk)), mmap_mode = "r")
+                points.append(self.__points__(stage, features[selected]))
+        centers = self.kmeans(np.concatenate(points), self.num_buckets[stage], self.num_iterations, rng)
+
+        ## the buckets are sorted by the expected hand strength
+        centers = centers[np.argsort(centers[:, -1])]
+        self.__save__(path, centers)
+        return centers
+
+    def __points__(self, stage, features):
+        if stage == Stage.fourthStage:
+            return np.asarray(features[:, -1:], dtype = np.float64)
+        return np.concatenate([np.cumsum(features[:, 0:-1], axis = 1), features[:, -1:]], axis = 1)
+
+    def __path__(self, name):
+        return os.path.join(self.directory, name)
+
+    def __save__(self, path, array):
+        ## the file appears only when it is complete, so an interrupted run never leaves a broken file
+        tmp = path + ".tmp.npy"
+        np.save(tmp, array)
+        os.rename(tmp, path)
+
+
+class CardAbstraction(object):
+    '''
+    The card abstraction produced by BucketingPipeline. The bucket maps are loaded as read-only memory maps.\n
+    Examples of usages:\n
+    >> import roomai.games.texasholdem\n
+    >> abstraction = roomai.games.texasholdem.CardAbstraction.load("abstraction")\n
+    >> bucket = abstraction.bucket(person_state.hand_cards, public_state.public_cards)\n
+    '''
+
+    PublicCardsStage = {0: Stage.firstStage, 3: Stage.secondStage, 4: Stage.thirdStage, 5: Stage.fourthStage}
+
+    def __init__(self, bucket_maps):
+        self.__bucket_maps__ = dict(bucket_maps)
+
+    @classmethod
+    def bucket_file(cls, stage):
+        '''
+        :param stage: The stage
+        :return: The file name of the bucket map of the stage
+        '''
+        return "stage%d_buckets.npy" % (stage)
+
+    @classmethod
+    def load(cls, directory):
+        '''
+        Load the bucket maps in the directory
+
+        :param directory: The directory used by BucketingPipeline
+        :return: A CardAbstraction with the bucket maps of the stages found in the directory
+        '''
+        bucket_maps = dict()
+        for stage in AllStages:
+            path = os.path.join(directory, cls.bucket_file(stage))
+            if os.path.exists(path):
+                bucket_maps[stage] = np.load(path, mmap_mode = "r")
+        if len(bucket_maps) == 0:
+            raise IOError("No bucket map is found in %s. Please generate them with BucketingPipeline" % (directory))
+        return CardAbstraction(bucket_maps)
+
+    def num_buckets(self, stage):
+        '''
+        :param stage: The stage
+        :return: The number of the buckets of the stage
+        '''
+        return int(self.__bucket_maps__[stage].max()) + 1
+
+    def bucket(self, hand_cards, public_cards = ()):
+        '''
+        :param hand_cards: The hand cards, for example TexasHoldemStatePerson.hand_cards
+        :param public_cards: The public cards, for example TexasHoldemStatePublic.public_cards
+        :return: The bucket of the hand
+        '''
+        if public_cards is None:
+            public_cards = ()
+        stage = self.PublicCardsStage[len(public_cards)]
+        if stage not in self.__bucket_maps__:
+            raise ValueError("The bucket map of the stage %d isn't loaded" % (stage))
+        return int(self.__bucket_maps__[stage][HandIndexer.lookup(stage).index(hand_cards, public_cards)])
+
+    def bucket_batch(self, stage, cards):
+        '''
+        :param stage: The stage
+        :param cards: An integer array with the shape [N, num_cards], the canonical card indices of the hand cards followed by the public cards
+        :return: The buckets of the hands, an integer array with the shape [N]
+        '''
+        return np.asarray(self.__bucket_maps__[stage][HandIndexer.lookup(stage).index_batch(cards)])
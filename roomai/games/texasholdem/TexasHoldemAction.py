@@ -1,7 +1,5 @@
 #!/bin/python
 #coding:utf-8
-import re
-
 import roomai.games.common
 
 
@@ -31,18 +29,30 @@ class TexasHoldemAction(roomai.games.common.AbstractAction):
     Raise       = "Raise"
     # all in
     AllIn       = "Allin"
-    def __init__(self, key):
-        if re.match("^Allin_[1-9]\d*|Raise_[1-9]\d*|Call_[1-9]\d*|Fold_0|Check_0$", key) is None:
-            raise ValueError("%s is invalid key for TexasHoldemAction. The TexasHoldemAction has a key option_price, Fold_0 for example. When the option is Fold or Check, the price must be 0. The check regrex is ^Allin_[1-9]\d*|Raise_[1-9]\d*|Call_[1-9]\d*|Fold_0|Check_0$"%(key))
 
+    __slots__ = ("__option__", "__price__", "__id__")
 
-        opt_price = key.strip().split("_")
-        self.__option__ = opt_price[0]
-        self.__price__  = int(opt_price[1])
+    ## all actions with the prices up to it are interned, see TexasHoldemAction.precompute
+    __precomputed_price__ = 0
+
+    def __init__(self, key):
+        option, price   = self.__parse_key__(key)
+        self.__option__ = option
+        self.__price__  = price
         self.__key__    = "%s_%d"%(self.option, self.price)
-        if self.__option__ == self.Fold or self.__option__ == self.Check:
-            if self.price > 0:
-                raise ValueError("%s is invalid key for TexasHoldemAction. The %s option only matches the zero price"%(self.__key__, self.__option__))
+        self.__id__     = TexasHoldemAction.action_id(option, price)
+
+    @classmethod
+    def __parse_key__(cls, key):
+        ## the same check as the regrex ^Allin_[1-9]\d*|Raise_[1-9]\d*|Call_[1-9]\d*|Fold_0|Check_0$ without running it
+        option, sep, price = key.strip().partition("_")
+        if sep != "" and OptionOffsets.get(option, 0) >= 2 and price.isdigit() and price[0] != "0":
+            return option, int(price)
+        if key == "Fold_0" or key == "Check_0":
+            return option, 0
+        if option == cls.Fold or option == cls.Check:
+            raise ValueError("%s is invalid key for TexasHoldemAction. The %s option only matches the zero price"%(key, option))
+        raise ValueError("%s is invalid key for TexasHoldemAction. The TexasHoldemAction has a key option_price, Fold_0 for example. When the option is Fold or Check, the price must be 0. The check regrex is ^Allin_[1-9]\\d*|Raise_[1-9]\\d*|Call_[1-9]\\d*|Fold_0|Check_0$"%(key))
 
 
     def __get_key__(self):
@@ -58,6 +68,77 @@ class TexasHoldemAction(roomai.games.common.AbstractAction):
         return self.__price__
     price = property(__get_price__, doc = "The price of this action. For example, the price is 0")
 
+    def __get_id__(self):
+        return self.__id__
+    id = property(__get_id__, doc = "The dense integer id of this action. Fold_0 is 0, Check_0 is 1, and the Call, Raise and Allin actions with the price p are 3p-1, 3p and 3p+1. "
+                                    "So the ids of all actions with the prices up to p are in [0, 3p+2), and a policy can index its logits with them")
+
+    @classmethod
+    def action_id(cls, option, price):
+        '''
+        :param option: The option of the action, for example TexasHoldemAction.Raise
+        :param price: The price of the action
+        :return: The id of the action with the option and the price
+        '''
+        if option == cls.Fold or option == cls.Check:
+            return OptionOffsets[option]
+        return OptionOffsets[option] + 3 * (price - 1)
+
+    @classmethod
+    def num_ids(cls, max_price):
+        '''
+        :param max_price: The highest price of the actions, for example the largest stack
+        :return: The number of the ids of the actions with the prices up to max_price
+        '''
+        return 3 * max_price + 2
+
+    @classmethod
+    def lookup_by_id(cls, action_id):
+        '''
+        lookup an action with the specified id in O(1)
+
+        :param action_id: The id of the action, see TexasHoldemAction.id
+        :return: The action
+        '''
+        if action_id < 0:
+            raise ValueError("%d is an invalid id for TexasHoldemAction" % (action_id))
+        action = AllTexasActionsById.get(action_id)
+        if action is not None:
+            return action
+        ## the action is created and interned by its first lookup
+        if action_id < 2:
+            option, price = IdOptions[action_id], 0
+        else:
+            option, price = IdOptions[(action_id - 2) % 3 + 2], (action_id - 2) // 3 + 1
+        return cls.lookup("%s_%d" % (option, price))
+
+    @classmethod
+    def lookup_by_option_price(cls, option, price):
+        '''
+        lookup an action with the specified option and price in O(1), without building its key
+
+        :param option: The option of the action, for example TexasHoldemAction.Raise
+        :param price: The price of the action
+        :return: The action
+        '''
+        if option not in OptionOffsets:
+            raise ValueError("%s is an invalid option for TexasHoldemAction" % (option))
+        return cls.lookup_by_id(cls.action_id(option, price))
+
+    @classmethod
+    def precompute(cls, max_price):
+        '''
+        Intern all actions with the prices up to max_price, so looking them up never creates an action.
+        The actions are interned by their first lookups anyway, so this is only for the callers who don't want to pay the creation during a game
+
+        :param max_price: The highest price of the actions, for example the largest stack
+        '''
+        if max_price <= cls.__precomputed_price__:
+            return
+        for action_id in range(cls.num_ids(max_price)):
+            cls.lookup_by_id(action_id)
+        cls.__precomputed_price__ = max_price
+
     @classmethod
     def lookup(cls, key):
         '''
@@ -67,12 +148,20 @@ class TexasHoldemAction(roomai.games.common.AbstractAction):
         :return: The action
         '''
         if key not in AllTexasActions:
-            AllTexasActions[key] = TexasHoldemAction(key)
+            action = TexasHoldemAction(key)
+            if action.key in AllTexasActions:
+                action = AllTexasActions[action.key]
+            else:
+                AllTexasActions[action.key] = action
+                AllTexasActionsById[action.id] = action
+            AllTexasActions[key] = action
         return AllTexasActions[key]
 
     def __deepcopy__(self, memodict={}, newinstance = None):
-        if self.key not in AllTexasActions:
-            AllTexasActions[self.key] = TexasHoldemAction(self.key)
-        return AllTexasActions[self.key]
+        return TexasHoldemAction.lookup(self.key)
 
-AllTexasActions = dict()
+AllTexasActions     = dict()
+## the actions looked up so far by their ids, so a deep stack doesn't allocate the ids of the prices it never uses
+AllTexasActionsById = dict()
+OptionOffsets       = {TexasHoldemAction.Fold: 0, TexasHoldemAction.Check: 1, TexasHoldemAction.Call: 2, TexasHoldemAction.Raise: 3, TexasHoldemAction.AllIn: 4}
+IdOptions           = [TexasHoldemAction.Fold, TexasHoldemAction.Check, TexasHoldemAction.Call, TexasHoldemAction.Raise, TexasHoldemAction.AllIn]
@@ -2,6 +2,7 @@
 #coding:utf-8
 import roomai.games.common
 from roomai.games.texasholdem.TexasHoldemUtil import AllPokerCards
+from roomai.games.texasholdem.TexasHoldemUtil import AllPokerCardsByIndex
 from roomai.games.texasholdem.TexasHoldemUtil import PokerCard
 
 class TexasHoldemActionChance(roomai.games.common.AbstractActionChance):
@@ -50,11 +51,20 @@ class TexasHoldemActionChance(roomai.games.common.AbstractActionChance):
 
         return AllTexasActionChances[key]
 
+    @classmethod
+    def lookup_by_index(cls, index):
+        '''
+        lookup the chance action which deals the poker card with the specified canonical index
+
+        :param index: The canonical index of the poker card, 0 <= index < 52
+        :return: The action
+        '''
+        return AllTexasActionChancesByIndex[index]
+
     def __deepcopy__(self, memodict={}, newinstance = None):
         return TexasHoldemActionChance.lookup(self.key)
 
 AllTexasActionChances = dict()
 for pokercard_key in AllPokerCards:
     AllTexasActionChances[pokercard_key] = TexasHoldemActionChance(pokercard_key)
-
-
+AllTexasActionChancesByIndex = tuple([AllTexasActionChances[c.key] for c in AllPokerCardsByIndex])
@@ -0,0 +1,106 @@
+#!/bin/python
+#coding:utf-8
+import random
+import collections.abc
+
+from roomai.games.texasholdem.TexasHoldemActionChance import TexasHoldemActionChance
+from roomai.games.texasholdem.TexasHoldemActionChance import AllTexasActionChancesByIndex
+
+
+class TexasHoldemChanceActions(collections.abc.Mapping):
+    '''
+    The valid actions of the chance player, returned by TexasHoldemEnv.available_actions.\n
+    The environment shuffles the deck once per hand, and the first cards of the deck are the used cards, so the remaining cards are the rest of the deck.
+    It is a read-only mapping from the keys to the chance actions of the remaining cards in the order of the deck, and draw deals the next card of the deck in O(1).\n
+    Examples of usages:\n
+    >> actions = person_state.available_actions\n
+    >> len(actions)\n
+    52\n
+    >> action = actions.draw()\n
+    >> "A_Heart" in actions\n
+    True\n
+    '''
+    __slots__ = ("__deck__", "__num_used__", "__used_mask__")
+
+    def __init__(self, deck, num_used, used_mask):
+        '''
+        :param deck: The canonical indices of the 52 cards in the order of the deck, see TexasHoldemStatePrivate.deck
+        :param num_used: The number of the used cards, which are the first cards of the deck
+        :param used_mask: The 52-bit mask of the used cards
+        '''
+        self.__deck__      = deck
+        self.__num_used__  = num_used
+        self.__used_mask__ = used_mask
+
+    def draw(self):
+        '''
+        :return: The chance action dealing the next card of the deck
+        '''
+        return AllTexasActionChancesByIndex[self.__deck__[self.__num_used__]]
+
+    def action_at(self, index):
+        '''
+        :param index: The position of the action in this mapping, 0 <= index < len(self)
+        :return: The chance action dealing the card at the position of the remaining deck
+        '''
+        if index < 0 or index >= len(self):
+            raise IndexError("The index %d is out of the range of the %d remaining cards" % (index, len(self)))
+        return AllTexasActionChancesByIndex[self.__deck__[self.__num_used__ + index]]
+
+    def sample(self, rng = random):
+        '''
+        Sample a remaining card uniformly
+
+        :param rng: The random generator with the random function, the random module by default
+        :return: The sampled chance action
+        '''
+        return self.action_at(int(rng.random() * len(self)))
+
+    def contains_index(self, index):
+        '''
+        :param index: The canonical index of a card
+        :return: Whether the card is still in the deck
+        '''
+        return 0 <= index < 52 and (self.__used_mask__ >> index) & 1 == 0
+
+    def __contains__(self, key):
+        if isinstance(key, TexasHoldemActionChance):
+            return self.contains_index(key.card.index)
+        if isinstance(key, int):
+            return self.contains_index(key)
+        return isinstance(key, str) and key in self.__index_by_key__ and self.contains_index(self.__index_by_key__[key])
+
+    def __getitem__(self, key):
+        if isinstance(key, str) and key in self:
+            return AllTexasActionChancesByIndex[self.__index_by_key__[key]]
+        raise KeyError(key)
+
+    def __len__(self):
+        return len(self.__deck__) - self.__num_used__
+
+    def __iter__(self):
+        for i in range(self.__num_used__, len(self.__deck__)):
+            yield AllTexasActionChancesByIndex[self.__deck__[i]].key
+
+    def values(self):
+        return [AllTexasActionChancesByIndex[self.__deck__[i]] for i in range(self.__num_used__, len(self.__deck__))]
+
+    def __eq__(self, other):
+        if isinstance(other, TexasHoldemChanceActions):
+            return self.__used_mask__ == other.__used_mask__ and len(self) == len(other)
+        return collections.abc.Mapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "TexasHoldemChanceActions(%s)" % (", ".join(self.keys()))
+
+    def __deepcopy__(self, memodict={}):
+        ## the valid chance actions are immutable
+        return self
+
+## the canonical indices of the cards by their keys
+TexasHoldemChanceActions.__index_by_key__ = dict([(action.key, action.card.index) for action in AllTexasActionChancesByIndex])
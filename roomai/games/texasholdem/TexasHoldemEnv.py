@@ -2,20 +2,101 @@
 #coding:utf-8
 
 import logging
+import multiprocessing
+import numbers
 import random
-from functools import cmp_to_key
+
+import numpy as np
 
 import roomai
 import roomai.games.common
 from roomai.games.texasholdem import *
 
 
+## the env and the players of the compete in a worker process, see __init_compete_worker__
+__compete_worker__ = None
+
+
+def __compete_context__():
+    ## the workers of a compete need the fork start method, or None if it isn't available
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context("fork")
+
+
+def __init_compete_worker__(env, players):
+    ## the players keep the infos of the last hands, and may be local classes, which can't be pickled,
+    ## so they are inherited by the forked worker processes instead of sent to them
+    global __compete_worker__
+    __compete_worker__ = (env, players)
+
+
+def __compete_shard__(args):
+    ## the task of a worker process
+    num_hands, seed, keep_hand_scores = args
+    return __play_compete_shard__(__compete_worker__[0], __compete_worker__[1], num_hands, seed, keep_hand_scores)
+
+
+def __play_compete_shard__(env, players, num_hands, seed, keep_hand_scores):
+    ## play a shard of the hands of a compete with the seed of the shard, and return the sums of the scores, the number of the hands and the scores of every hand if needed
+    rng         = random.Random(seed)
+    players     = list(players) + [roomai.games.common.RandomPlayerChance()]
+    ## the env deals from its own random generator seeded by the shard, and the players use the random module seeded by the shard.
+    ## Both get their states back afterwards, so a compete in the calling process leaves the random module of the caller as it was
+    env_rng     = env.__rng__
+    state       = random.getstate()
+    env.seed(rng.getrandbits(64))
+    random.seed(rng.getrandbits(64))
+    sums        = [0 for i in range(len(players) - 1)]
+    hand_scores = [] if keep_hand_scores else None
+    try:
+        for count in range(num_hands):
+            scores = TexasHoldemEnv.__compete_hand__(env, players, rng)
+            for i in range(len(sums)):
+                sums[i] += scores[i]
+            if keep_hand_scores:
+                hand_scores.append(tuple(scores[0:len(sums)]))
+    finally:
+        env.__rng__ = env_rng
+        random.setstate(state)
+    return sums, num_hands, hand_scores
+
+
+## the history modes in which the forward function changes the current states in place instead of appending snapshots
+InPlaceHistoryModes = ("last", "none")
+
+
 class TexasHoldemEnv(roomai.games.common.AbstractEnv):
     '''
     The TexasHoldem game environment
     '''
 
     #@override
+    def __init__(self):
+        super(TexasHoldemEnv, self).__init__()
+        self.__undo_records__    = []
+        ## the infos handed out again by the forward function in the in-place history modes
+        self.__infos__           = None
+        ## the random module until the environment is seeded, see the seed function
+        self.__rng__             = random
+
+    def reset(self):
+        '''
+        Drop the states of the current game. The states, the histories and the infos returned before keep the finished game, see roomai.games.common.EnvPool.
+        '''
+        self.__undo_records__ = []
+        self.__infos__        = None
+        super(TexasHoldemEnv, self).reset()
+
+    def seed(self, seed = None):
+        '''
+        Give the environment its own random generator, which chooses the default dealer and shuffles the deck of every hand.
+        Without calling this function, the environment uses the random module.
+
+        :param seed: The seed of the random generator, and None means a seed from the system
+        '''
+        self.__rng__ = random.Random(seed)
+
     def init(self, params = dict()):
         '''
         Initialize the TexasHoldem game environment with the initialization params.\n
@@ -26,6 +107,13 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         3. param_dealer_id: the player id of the dealer, default random\n
         4. param_initialization_chips: the initialization chips, default [1000,1000,...]\n
         5. param_big_blind_bet: the number of chips for the big blind bet, default 10\n
+        6. param_history_mode: "full" keeps a snapshot of the states per step. "undo" keeps only the current states, and every step records the changed fields to be restored by the backward function, so the memory per step is O(1).
+        "last" keeps only the current states and the last action, and "none" keeps only the current states. In "last" and "none", the forward function changes the states in place and hands out the same infos with the single current states,
+        so nothing is allocated for the history, the states returned before change with the environment, and the backward function isn't available. default "full"\n
+        7. param_array_state: whether chips, bets, is_fold, is_allin and is_needed_to_action of the public state live in one numpy buffer, see TexasHoldemStatePublic.player_array. default False\n
+        8. param_bet_abstraction: the pot fractions of the raises available to the players, for example [0.5, 1, 2]. The raise of the fraction f puts in the call price plus f times the pot after the call,
+        snapped to the nearest legal price. The min-raise and the allin are always available, and a raise out of the abstraction taken by the forward function is mapped to the nearest available size. default None, which means all raises are available\n
+        9. param_seed: the seed of the random generator of the environment, see the seed function. default None, which keeps the random generator as it is\n
         An example of the initialization param is {"param_num_normal_players":2,"backward_enable":True}
         
         :param params: the initialization params
@@ -33,7 +121,19 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         '''
 
         logger         = roomai.get_logger()
-        public_state   = TexasHoldemStatePublic()
+
+        ## the histories of a previous game without reset are left to whoever still holds them
+        if len(self.__public_state_history__) > 0:
+            self.__public_state_history__    = []
+            self.__private_state_history__   = []
+            self.__playerid_action_history__ = []
+            self.__person_states_history__   = []
+        self.__undo_records__ = []
+        self.__infos__        = None
+        if "param_seed" in params and params["param_seed"] is not None:
+            self.seed(params["param_seed"])
+
+        public_state = TexasHoldemStatePublic()
         self.__public_state_history__.append(public_state)
 
         if "param_num_normal_players" in params:
@@ -44,12 +144,12 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         if "param_start_turn" in params:
             public_state.__param_start_turn__ = params["param_start_turn"]
         else:
-            public_state.__param_start_turn__ = int(random.random() * public_state.param_num_normal_players)
+            public_state.__param_start_turn__ = int(self.__rng__.random() * public_state.param_num_normal_players)
 
         if "param_dealer_id" in params:
             public_state.__param_dealer_id__ = params["param_dealer_id"]
         else:
-            public_state.__param_dealer_id__ = int(random.random() * public_state.param_num_normal_players)
+            public_state.__param_dealer_id__ = int(self.__rng__.random() * public_state.param_num_normal_players)
 
         if "param_init_chips" in params:
             public_state.__param_init_chips__     = params["param_init_chips"]
@@ -61,12 +161,26 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         else:
             public_state.__param_big_blind_bet__ = 10
 
+        if "param_history_mode" in params:
+            public_state.__param_history_mode__ = params["param_history_mode"]
+        else:
+            public_state.__param_history_mode__ = "full"
+
+        if "param_bet_abstraction" in params and params["param_bet_abstraction"] is not None:
+            public_state.__param_bet_abstraction__ = tuple(sorted(params["param_bet_abstraction"]))
+        else:
+            public_state.__param_bet_abstraction__ = None
+
         ## check initialization config
         if len(public_state.param_init_chips) != public_state.param_num_normal_players:
             raise ValueError("len(env.param_initialization_chips) %d != param_num_normal_players %d" % (len(public_state.param_init_chips), public_state.num_normal_players))
         if public_state.param_num_normal_players > 6:
             raise ValueError(
                 "The maximum of the number of players is 6. Now, the number of players = %d" % (public_state.param_num_normal_players))
+        if public_state.param_history_mode not in ["full", "undo", "last", "none"]:
+            raise ValueError("param_history_mode must be \"full\", \"undo\", \"last\" or \"none\", but it is %s" % (public_state.param_history_mode))
+        if public_state.param_bet_abstraction is not None and (len(public_state.param_bet_abstraction) == 0 or public_state.param_bet_abstraction[0] <= 0):
+            raise ValueError("param_bet_abstraction must contain positive pot fractions, but it is %s" % (str(params["param_bet_abstraction"])))
 
 
 
@@ -77,61 +191,82 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         pu                           = public_state
 
 
-        pu.__is_fold__               = [False for i in range(public_state.param_num_normal_players)]
+        if "param_array_state" in params and params["param_array_state"] == True:
+            pu.__use_array__(public_state.param_num_normal_players)
+        pu.__set_sequence__("__is_fold__", [False for i in range(public_state.param_num_normal_players)])
         pu.__num_fold__              = 0
-        pu.__is_allin__              = [False for i in range(public_state.param_num_normal_players)]
+        pu.__set_sequence__("__is_allin__", [False for i in range(public_state.param_num_normal_players)])
         pu.__num_allin__             = 0
-        pu.__is_needed_to_action__   = [True for i in range(public_state.param_num_normal_players)]
+        pu.__set_sequence__("__is_needed_to_action__", [True for i in range(public_state.param_num_normal_players)])
         pu.__num_needed_to_action__  = pu.param_num_normal_players
 
-        pu.__bets__                  = [0 for i in range(public_state.param_num_normal_players)]
-        pu.__chips__                 = list(public_state.param_init_chips)
+        pu.__set_sequence__("__bets__", [0 for i in range(public_state.param_num_normal_players)])
+        pu.__pot__                   = TexasHoldemPot(public_state.param_num_normal_players)
+        pu.__set_sequence__("__chips__", public_state.param_init_chips)
         pu.__stage__                 = Stage.firstStage
-        pu.__turn__                  = (big+1)%pu.param_num_normal_players
-        pu.__public_cards__          = []
+        ## the chance player deals the hand cards and the keep cards first
+        pu.__turn__                  = pu.param_num_normal_players
+        pu.__public_cards__          = ()
 
         pu.__previous_id__           = None
         pu.__previous_action__       = None
 
         if pu.chips[big] > public_state.param_big_blind_bet:
-            pu.__chips__[big] -= public_state.param_big_blind_bet
-            pu.__bets__[big]  += public_state.param_big_blind_bet
+            pu.__replace_item__("__chips__", big, pu.chips[big] - public_state.param_big_blind_bet)
+            pu.__replace_item__("__bets__",  big, pu.bets[big] + public_state.param_big_blind_bet)
+            pu.__pot__.add(big, public_state.param_big_blind_bet)
         else:
-            pu.__bets__[big]     = pu.chips[big]
-            pu.__chips__[big]    = 0
-            pu.__is_allin__[big] = True
+            pu.__replace_item__("__bets__",     big, pu.chips[big])
+            pu.__replace_item__("__chips__",    big, 0)
+            pu.__replace_item__("__is_allin__", big, True)
             pu.__num_allin__    += 1
+            pu.__pot__.add(big, pu.bets[big])
+            pu.__pot__.close(pu.bets[big])
+            ## the all-in blind doesn't act anymore
+            pu.__replace_item__("__is_needed_to_action__", big, False)
+            pu.__num_needed_to_action__ -= 1
         pu.__max_bet_sofar__ = pu.bets[big]
         pu.__raise_account__ = public_state.param_big_blind_bet
 
-        if pu.chips[small] > public_state.param_big_blind_bet / 2:
-            pu.__chips__[small] -= public_state.param_big_blind_bet /2
-            pu.__bets__[small]  += public_state.param_big_blind_bet /2
+        if pu.chips[small] > public_state.param_big_blind_bet // 2:
+            pu.__replace_item__("__chips__", small, pu.chips[small] - public_state.param_big_blind_bet // 2)
+            pu.__replace_item__("__bets__",  small, pu.bets[small] + public_state.param_big_blind_bet // 2)
+            pu.__pot__.add(small, public_state.param_big_blind_bet // 2)
         else:
-            pu.__bets__[small]     = pu.chips[small]
-            pu.__chips__[small]    = 0
-            pu.__is_allin__[small] = True
+            pu.__replace_item__("__bets__",     small, pu.chips[small])
+            pu.__replace_item__("__chips__",    small, 0)
+            pu.__replace_item__("__is_allin__", small, True)
             pu.__num_allin__      += 1
+            pu.__pot__.add(small, pu.bets[small])
+            pu.__pot__.close(pu.bets[small])
+            ## the all-in blind doesn't act anymore
+            pu.__replace_item__("__is_needed_to_action__", small, False)
+            pu.__num_needed_to_action__ -= 1
 
         pu.__is_terminal__         = False
         pu.__scores__              = [0 for i in range(public_state.param_num_normal_players)]
 
         # private info
-        pr                     =  TexasHoldemStatePrivate()
+        pr                       = TexasHoldemStatePrivate()
         self.__private_state_history__.append(pr)
-        pr.__keep_cards__        = []
+        pr.__keep_cards__        = ()
+        ## the deck is shuffled once per hand, and the chance player deals its cards in order
+        deck                     = list(range(52))
+        self.__rng__.shuffle(deck)
+        pr.__deck__              = tuple(deck)
         ##pr.__keep_cards__      =allcards[public_state.param_num_normal_players*2:public_state.param_num_normal_players*2+5]
 
         ## person info
-        self.__person_states_history__ = [[] for i in range(pu.param_num_normal_players + 1)]
         for i in range(pu.param_num_normal_players + 1):
-            self.__person_states_history__[i].append(TexasHoldemStatePerson())
+            self.__person_states_history__.append([TexasHoldemStatePerson()])
             self.__person_states_history__[i][0].__id__ = i
-            self.__person_states_history__[i][0].__hand_cards__ = []
+            self.__person_states_history__[i][0].__hand_cards__ = ()
 
         self.__person_states_history__[pu.turn][0].__available_actions__ = self.available_actions()
 
         infos = self.__gen_infos__()
+        if pu.param_history_mode in InPlaceHistoryModes:
+            self.__infos__ = infos
 
         if logger.level <= logging.DEBUG:
             logger.debug("TexasHoldemEnv.init: param_num_normal_players = %d, param_dealer_id = %d, param_initialization_chip = %d, param_big_blind_bet = %d"%(\
@@ -149,30 +284,48 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         '''
         The TexasHoldem game environments steps with the action taken by the current player
         
-        :param action: The action taken by the current player
+        :param action: The action taken by the current player. It can be an id too, which is TexasHoldemAction.id for the normal players and the index of the card for the chance player
         :return: infos, public_state, person_states, private_state
         '''
 
         logger     = roomai.get_logger()
-        pu         = self.__public_state_history__[-1].__deepcopy__()
-        pe         = [self.__person_states_history__[i][-1].__deepcopy__() for i in range(len(self.__person_states_history__))]
-        pr         = self.__private_state_history__[-1].__deepcopy__()
-
-        self.__public_state_history__.append(pu)
-        for i in range(len(pe)):
-            self.__person_states_history__[i].append(pe[i])
-        self.__private_state_history__.append(pr)
-
-        if action.key not in pe[pu.turn].available_actions:
+        turn       = self.__public_state_history__[-1].turn
+        if isinstance(action, numbers.Integral):
+            if turn == self.__public_state_history__[-1].param_num_normal_players:
+                action = TexasHoldemActionChance.lookup_by_index(int(action))
+            else:
+                action = TexasHoldemAction.lookup_by_id(int(action))
+        available_actions = self.__person_states_history__[turn][-1].__available_actions__
+        if self.__public_state_history__[-1].param_bet_abstraction is not None and isinstance(action, TexasHoldemAction) \
+                and isinstance(available_actions, TexasHoldemLegalActions):
+            ## a raise out of the bet abstraction is taken as the nearest available size
+            nearest = available_actions.nearest(action)
+            if nearest is not None:
+                action = nearest
+        if action.key not in available_actions:
             logger.critical("action=%s is invalid" % (action.key))
             raise ValueError("action=%s is invalid" % (action.key))
-        pe[pu.turn].__available_actions__ = dict()
-        self.__playerid_action_history__.append(roomai.games.common.ActionRecord(pu.turn,action))
+
+        pu         = self.__public_state_history__[-1]
+        if pu.param_history_mode not in InPlaceHistoryModes:
+            ## copy on write: the new snapshot shares all fields with the previous one,
+            ## and the person states and the private state are cloned only when they change in this step
+            pu = pu.__clone__()
+            self.__public_state_history__.append(pu)
+            for i in range(len(self.__person_states_history__)):
+                self.__person_states_history__[i].append(self.__person_states_history__[i][-1])
+            self.__private_state_history__.append(self.__private_state_history__[-1])
+
+        self.__person_state_for_update__(pu.turn).__available_actions__ = dict()
+        if pu.param_history_mode == "last":
+            self.__playerid_action_history__[0:1] = [roomai.games.common.ActionRecord(pu.turn,action)]
+        elif pu.param_history_mode != "none":
+            self.__playerid_action_history__.append(roomai.games.common.ActionRecord(pu.turn,action))
 
         if isinstance(action, TexasHoldemActionChance) == True:
             self.__action_chance__(action)
-            pe[pu.turn].__available_actions__ = self.available_actions()
-            infos = self.__gen_infos__()
+            self.__person_state_for_update__(pu.turn).__available_actions__ = self.available_actions()
+            infos = self.__step_infos__(pu)
             return infos, self.__public_state_history__, self.__person_states_history__, self.__private_state_history__
 
         if action.option == TexasHoldemAction.Fold:
@@ -195,36 +348,34 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         # computing_score
         if TexasHoldemEnv.__is_compute_scores__(self.__public_state_history__[-1]):
             ## need showdown
-            pu.__public_cards__ = pr.keep_cards[0:5]
+            pu.__public_cards__ = self.__private_state_history__[-1].keep_cards[0:5]
             pu.__is_terminal__  = True
             pu.__scores__       = self.__compute_scores__()
 
 
         # enter into the next stage
         elif TexasHoldemEnv.__is_nextround__(self.__public_state_history__[-1]):
-            add_cards = []
+            pr        = self.__private_state_history__[-1]
+            add_cards = ()
             if pu.stage == Stage.firstStage:   add_cards = pr.keep_cards[0:3]
-            if pu.stage == Stage.secondStage:  add_cards = [pr.keep_cards[3]]
-            if pu.stage == Stage.thirdStage:   add_cards = [pr.keep_cards[4]]
+            if pu.stage == Stage.secondStage:  add_cards = pr.keep_cards[3:4]
+            if pu.stage == Stage.thirdStage:   add_cards = pr.keep_cards[4:5]
 
-            pu.__public_cards__.extend(add_cards)
+            pu.__public_cards__               = tuple(pu.__public_cards__) + add_cards
             pu.__stage__                      = pu.stage + 1
 
-            pu.__num_needed_to_action__       = 0
-            pu.__is_needed_to_action__        = [False for i in range(pu.param_num_normal_players)]
-            for i in range(pu.param_num_normal_players):
-                if pu.__is_fold__[i] != True and pu.__is_allin__[i] != True:
-                    pu.__is_needed_to_action__[i]      = True
-                    pu.__num_needed_to_action__       += 1
+            is_needed_to_action               = [pu.is_fold[i] != True and pu.is_allin[i] != True for i in range(pu.param_num_normal_players)]
+            pu.__set_sequence__("__is_needed_to_action__", is_needed_to_action)
+            pu.__num_needed_to_action__       = sum(is_needed_to_action)
 
             pu.__turn__                                             = pu.param_dealer_id
             pu.__turn__                                             = self.__next_player__(pu)
-            pe[self.__public_state_history__[-1].turn].__available_actions__        = self.available_actions(self.__public_state_history__[-1], self.__person_states_history__[self.__public_state_history__[-1].turn][-1])
+            self.__person_state_for_update__(pu.turn).__available_actions__ = self.available_actions()
 
         ##normal
         else:
             pu.__turn__  = self.__next_player__(pu)
-            self.__person_states_history__[self.__public_state_history__[-1].turn][-1].__available_actions__        = self.available_actions(self.__public_state_history__[-1], self.__person_states_history__[self.__public_state_history__[-1].turn][-1])
+            self.__person_state_for_update__(pu.turn).__available_actions__ = self.available_actions()
 
         logger = roomai.get_logger()
 
@@ -237,14 +388,94 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
                 self.__public_state_history__[-1].stage\
             ))
 
-        infos = self.__gen_infos__()
+        infos = self.__step_infos__(pu)
         return infos, self.__public_state_history__, self.__person_states_history__, self.__private_state_history__
 
+    def __step_infos__(self, pu):
+        ## the infos after a step of the forward function
+        if pu.param_history_mode == "undo":
+            self.__record_undo__()
+        elif pu.param_history_mode in InPlaceHistoryModes:
+            ## the histories are changed in place, so the infos are rebuilt only when the length of the action history changes
+            if len(self.__infos__[0].playerid_action_history) != len(self.__playerid_action_history__):
+                self.__infos__ = self.__gen_infos__()
+            return self.__infos__
+        return self.__gen_infos__()
+
+    def backward_able(self):
+        '''
+        The function returns a boolean variable denotes whether we can call the backward function. If the game environment goes back to the initialization, we can't call the backward function any more.
+
+        :return: A boolean variable denotes whether we can call the backward function.
+        '''
+        if len(self.__public_state_history__) > 0 and self.__public_state_history__[-1].param_history_mode == "undo":
+            return len(self.__undo_records__) > 0
+        return super(TexasHoldemEnv, self).backward_able()
+
+    def backward(self):
+        '''
+        The game goes back to the previous states
+
+        :returns:infos, public_state, person_states, private_state
+        :raise: The game environment has reached the initialization state and can't go back further.
+        '''
+        if len(self.__public_state_history__) > 0 and self.__public_state_history__[-1].param_history_mode in InPlaceHistoryModes:
+            raise ValueError("The backward function isn't available with param_history_mode = %s" % (self.__public_state_history__[-1].param_history_mode))
+        if len(self.__public_state_history__) == 0 or self.__public_state_history__[-1].param_history_mode != "undo":
+            return super(TexasHoldemEnv, self).backward()
+
+        if len(self.__undo_records__) == 0:
+            raise ValueError("Env has reached the initialization state and can't go back further. ")
+
+        public_fields, private_fields, person_fields = self.__undo_records__.pop()
+        ## the restored states are new objects, so the states returned by the forward function stay as they were
+        ## and the histories are rebound, so the infos sent before still see them
+        pu = self.__public_state_history__[-1].__clone__()
+        for name in public_fields:
+            setattr(pu, name, public_fields[name])
+        self.__public_state_history__ = [pu]
+        if private_fields is not None:
+            pr = self.__private_state_history__[-1].__clone__()
+            for name in private_fields:
+                setattr(pr, name, private_fields[name])
+            self.__private_state_history__ = [pr]
+        for i, fields in person_fields:
+            pe = self.__person_states_history__[i][-1].__clone__()
+            for name in fields:
+                setattr(pe, name, fields[name])
+            self.__person_states_history__[i] = [pe]
+        self.__playerid_action_history__ = self.__playerid_action_history__[:-1]
+
+        infos = self.__gen_infos__()
+        return infos, self.__public_state_history__, self.__person_states_history__, self.__private_state_history__, self.__playerid_action_history__
+
+    @classmethod
+    def __changed_fields__(cls, previous, current):
+        ## the fields are replaced instead of mutated, so an unchanged field is the same object in both states
+        return dict([(name, getattr(previous, name)) for name in type(previous).__fields__ if getattr(current, name) is not getattr(previous, name)])
+
+    def __record_undo__(self):
+        ## keep only the current states, and record the fields of the previous states changed by this step
+        public_fields  = self.__changed_fields__(self.__public_state_history__[-2], self.__public_state_history__[-1])
+        private_fields = None
+        if self.__private_state_history__[-1] is not self.__private_state_history__[-2]:
+            private_fields = self.__changed_fields__(self.__private_state_history__[-2], self.__private_state_history__[-1])
+        person_fields  = []
+        ## the histories are rebound instead of deleting their first items, so the infos sent before still see their states
+        for i in range(len(self.__person_states_history__)):
+            history = self.__person_states_history__[i]
+            if history[-1] is not history[-2]:
+                person_fields.append((i, self.__changed_fields__(history[-2], history[-1])))
+            self.__person_states_history__[i] = history[1:]
+        self.__public_state_history__  = self.__public_state_history__[1:]
+        self.__private_state_history__ = self.__private_state_history__[1:]
+        self.__undo_records__.append((public_fields, private_fields, person_fields))
+
     def available_actions(self):
         '''
         Generate all valid actions given the public state and the person state
 
-        :return: all valid actions
+        :return: all valid actions. A dict(action_key, action) for the chance player, and a TexasHoldemLegalActions for the normal players
         '''
 
         pu  = self.__public_state_history__[-1]
@@ -252,17 +483,10 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         pr  = self.__private_state_history__[-1]
 
         if len(pr.all_used_cards) < (len(pes)-1) * 2 + 5:
-            candidate_chance_actions = dict()
-            all_used_card_keys = set([c.key for c in pr.all_used_cards])
-            for card_key in AllPokerCards:
-                if card_key not in all_used_card_keys:
-                    chance_action = TexasHoldemActionChance.lookup(card_key)
-                    candidate_chance_actions[chance_action.key] = chance_action
-            return candidate_chance_actions
+            return TexasHoldemChanceActions(pr.deck, len(pr.all_used_cards), pr.all_used_cards_mask)
 
         pe = pes[pu.turn]
         turn = pu.turn
-        key_actions = dict()
 
         if pu.turn != pe.id:
             return dict()
@@ -272,40 +496,39 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         if pu.chips[turn] == 0:
             return dict()
 
-        ## for fold
-        action = TexasHoldemAction.lookup(TexasHoldemAction.Fold + "_0")
-        # if cls.is_action_valid(action,public_state, person_state):
-        key_actions[action.key] = action
-
-        ## for check
-        if pu.bets[turn] == pu.max_bet_sofar:
-            action = TexasHoldemAction.lookup(TexasHoldemAction.Check + "_0")
-            # if cls.is_action_valid(action, public_state, person_state):
-            key_actions[action.key] = action
-
-        ## for call
-        if pu.bets[turn] != pu.max_bet_sofar and pu.chips[turn] > pu.max_bet_sofar - pu.bets[turn]:
-            action = TexasHoldemAction.lookup(TexasHoldemAction.Call + "_%d" % (pu.max_bet_sofar - pu.bets[turn]))
-            # if cls.is_action_valid(action, public_state, person_state):
-            key_actions[action.key] = action
-
-        ## for raise
-        # if pu.bets[turn] != pu.max_bet_sofar and \
-        if pu.chips[turn] > pu.max_bet_sofar - pu.bets[turn] + pu.raise_account:
-            num = int((pu.chips[turn] - (pu.max_bet_sofar - pu.bets[turn])) / pu.raise_account)
-            for i in range(1, num + 1):
-                price = pu.max_bet_sofar - pu.bets[turn] + pu.raise_account * i
-                if price == pu.chips[pu.turn]:  continue
-                action = TexasHoldemAction.lookup(TexasHoldemAction.Raise + "_%d" % (price))
-                # if cls.is_action_valid(action, public_state, person_state):
-                key_actions[action.key] = action
-
-        ## for all in
-        action = TexasHoldemAction.lookup(TexasHoldemAction.AllIn + "_%d" % (pu.chips[turn]))
-        # if cls.is_action_valid(action, public_state, person_state):
-        key_actions[action.key] = action
-
-        return key_actions
+        ## Fold and Allin are always valid
+        to_call    = pu.max_bet_sofar - pu.bets[turn]
+        check_able = pu.bets[turn] == pu.max_bet_sofar
+        call_price = None
+        if pu.bets[turn] != pu.max_bet_sofar and pu.chips[turn] > to_call:
+            call_price = to_call
+
+        ## the raises are the prices to_call + raise_account * i below the chips, and the price equal to the chips is the Allin action
+        num_raises = 0
+        if pu.chips[turn] > to_call + pu.raise_account:
+            num_raises = (pu.chips[turn] - to_call) // pu.raise_account
+            if to_call + pu.raise_account * num_raises == pu.chips[turn]:
+                num_raises -= 1
+
+        raise_prices = None
+        if pu.param_bet_abstraction is not None:
+            raise_prices = self.__abstract_raise_prices__(pu, to_call, num_raises)
+        return TexasHoldemLegalActions(check_able, call_price, to_call + pu.raise_account, pu.raise_account, num_raises, pu.chips[turn], raise_prices)
+
+    @classmethod
+    def __abstract_raise_prices__(cls, pu, to_call, num_raises):
+        ## the min-raise and the pot fractions snapped to the legal prices. A fraction above the stack is left to the allin
+        if num_raises == 0:
+            return ()
+        raise_min = to_call + pu.raise_account
+        prices    = set([raise_min])
+        pot       = pu.pot.total + to_call
+        for fraction in pu.param_bet_abstraction:
+            k = int(round((to_call + fraction * pot - raise_min) * 1.0 / pu.raise_account))
+            if k >= num_raises:
+                break
+            prices.add(raise_min + pu.raise_account * max(0, k))
+        return tuple(sorted(prices))
 
     def __compute_scores__(self):
         pu  = self.__public_state_history__[-1]
@@ -317,67 +540,18 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
             scores = [0 for i in range(pu.param_num_normal_players)]
             for i in range(pu.param_num_normal_players):
                 if pu.is_fold[i] == False:
-                    scores[i] = sum(pu.bets)
+                    scores[i] = pu.pot.total
                     break
 
         ## compute score after showdown
         else:
-            scores                = [0 for i in range(pu.param_num_normal_players)]
-            playerid_pattern_bets = [] #for not_quit players
-            for i in range(pu.param_num_normal_players):
-                if pu.is_fold[i] == True: continue
-                hand_pattern_cards = self.__cards2pattern_cards__(pes[i].hand_cards, pr.keep_cards)
-                playerid_pattern_bets.append((i,hand_pattern_cards,pu.bets[i]))
-
-            for playerid_pattern_bet in playerid_pattern_bets:
-                if len(playerid_pattern_bet[1][1]) < 5:
-                    i = 0
-
-            playerid_pattern_bets.sort(key=lambda x:self.compute_rank_pattern_cards(x[1]))
-
-            pot_line = 0
-            previous = None
-            tmp_playerid_pattern_bets      = []
-            for i in range(len(playerid_pattern_bets)-1,-1,-1):
-                if previous == None:
-                    tmp_playerid_pattern_bets.append(playerid_pattern_bets[i])
-                    previous = playerid_pattern_bets[i]
-                elif self.__compare_patterns_cards__(playerid_pattern_bets[i][1], previous[1]) == 0:
-                    tmp_playerid_pattern_bets.append(playerid_pattern_bets[i])
-                    previous = playerid_pattern_bets[i]
-                else:
-                    tmp_playerid_pattern_bets.sort(key = lambda x:x[2])
-                    for k in range(len(tmp_playerid_pattern_bets)):
-                        num1          = len(tmp_playerid_pattern_bets) - k
-                        sum1          = 0
-                        max_win_score = pu.bets[tmp_playerid_pattern_bets[k][0]]
-                        for p in range(pu.param_num_normal_players):
-                            sum1      += min(max(0, pu.bets[p] - pot_line), max_win_score)
-                        for p in range(k, len(tmp_playerid_pattern_bets)):
-                            scores[tmp_playerid_pattern_bets[p][0]] += sum1 / num1
-                        scores[pu.param_dealer_id] += sum1 % num1
-                        if pot_line <= max_win_score:
-                            pot_line = max_win_score
-                    tmp_playerid_pattern_bets = []
-                    tmp_playerid_pattern_bets.append(playerid_pattern_bets[i])
-                    previous = playerid_pattern_bets[i]
-
-
-            if len(tmp_playerid_pattern_bets) > 0:
-                tmp_playerid_pattern_bets.sort(key = lambda  x:x[2])
-                for i in range(len(tmp_playerid_pattern_bets)):
-                    num1 = len(tmp_playerid_pattern_bets) - i
-                    sum1 = 0
-                    max_win_score = pu.bets[tmp_playerid_pattern_bets[i][0]]
-                    for p in range(pu.param_num_normal_players):
-                        sum1 += min(max(0, pu.bets[p] - pot_line), max_win_score)
-                    for p in range(i, len(tmp_playerid_pattern_bets)):
-                        scores[tmp_playerid_pattern_bets[p][0]] += sum1 / num1
-                    scores[pu.param_dealer_id] += sum1 % num1
-                    if pot_line <= max_win_score: pot_line = max_win_score
+            ## the board is preprocessed once, and every not_quit player is ranked once on top of it
+            board  = BoardContext(pr.keep_cards)
+            ranks  = board.rank_all([None if pu.is_fold[i] else pes[i].hand_cards for i in range(pu.param_num_normal_players)])
+            scores = pu.pot.distribute(ranks, pu.param_dealer_id)
 
         for p in range(pu.param_num_normal_players):
-            pu.__chips__[p] += scores[p]
+            pu.__replace_item__("__chips__", p, pu.chips[p] + scores[p])
             scores[p]   -= pu.bets[p]
 
         for p in range(pu.param_num_normal_players):
@@ -385,56 +559,86 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         return scores
 
     def __action_chance__(self, action):
-        pass
+        pu  = self.__public_state_history__[-1]
+        pr  = self.__private_state_history__[-1]
+        num = len(pr.all_used_cards)
+        n   = pu.param_num_normal_players
+
+        ## the used cards are the first cards of the deck, so a card dealt out of the order of the deck swaps with the next card
+        if pr.deck[num] != action.card.index:
+            pr        = self.__private_state_for_update__()
+            deck      = list(pr.deck)
+            pos       = deck.index(action.card.index)
+            deck[num], deck[pos] = deck[pos], deck[num]
+            pr.__deck__ = tuple(deck)
+
+        ## the hand cards are dealt round by round, and the keep cards follow
+        if num < 2 * n:
+            pe = self.__person_state_for_update__(num % n)
+            pe.__hand_cards__ = tuple(pe.__hand_cards__) + (action.card,)
+        else:
+            pr = self.__private_state_for_update__()
+            pr.__keep_cards__ = tuple(pr.__keep_cards__) + (action.card,)
+        pr = self.__private_state_for_update__()
+        pr.__all_used_cards__       = tuple(pr.__all_used_cards__) + (action.card,)
+        pr.__all_used_cards_mask__ |= action.card.mask
+
+        if num + 1 == 2 * n + 5:
+            big         = (pu.param_dealer_id + 2) % n
+            pu.__turn__ = (big + 1) % n
 
     def __action_fold__(self, action):
         pu = self.__public_state_history__[-1]
-        pu.__is_fold__[pu.turn]             = True
+        pu.__replace_item__("__is_fold__", pu.turn, True)
         pu.__num_fold__                    += 1
 
-        pu.__is_needed_to_action__[pu.turn] = False
+        pu.__replace_item__("__is_needed_to_action__", pu.turn, False)
         pu.__num_needed_to_action__        -= 1
 
     def __action_check__(self, action):
         pu = self.__public_state_history__[-1]
-        pu.__is_needed_to_action__[pu.turn] = False
+        pu.__replace_item__("__is_needed_to_action__", pu.turn, False)
         pu.__num_needed_to_action__        -= 1
 
     def __action_call__(self, action):
         pu = self.__public_state_history__[-1]
-        pu.__chips__[pu.turn] -= action.price
-        pu.__bets__[pu.turn]  += action.price
-        pu.__is_needed_to_action__[pu.turn] = False
+        pu.__replace_item__("__chips__", pu.turn, pu.chips[pu.turn] - action.price)
+        pu.__replace_item__("__bets__",  pu.turn, pu.bets[pu.turn] + action.price)
+        self.__pot_for_update__(pu).add(pu.turn, action.price)
+        pu.__replace_item__("__is_needed_to_action__", pu.turn, False)
         pu.__num_needed_to_action__        -= 1
 
     def __action_raise__(self, action):
         pu = self.__public_state_history__[-1]
 
         pu.__raise_account__   = action.price + pu.bets[pu.turn] - pu.max_bet_sofar
-        pu.__chips__[pu.turn] -= action.price
-        pu.__bets__[pu.turn]  += action.price
+        pu.__replace_item__("__chips__", pu.turn, pu.chips[pu.turn] - action.price)
+        pu.__replace_item__("__bets__",  pu.turn, pu.bets[pu.turn] + action.price)
+        self.__pot_for_update__(pu).add(pu.turn, action.price)
         pu.__max_bet_sofar__   = pu.bets[pu.turn]
 
-        pu.__is_needed_to_action__[pu.turn] = False
+        pu.__replace_item__("__is_needed_to_action__", pu.turn, False)
         pu.__num_needed_to_action__        -= 1
         p = (pu.turn + 1)%pu.param_num_normal_players
         while p != pu.turn:
             if pu.is_allin[p] == False and pu.is_fold[p] == False and pu.is_needed_to_action[p] == False:
                 pu.__num_needed_to_action__   += 1
-                pu.__is_needed_to_action__[p]  = True
+                pu.__replace_item__("__is_needed_to_action__", p, True)
             p = (p + 1) % pu.param_num_normal_players
 
 
     def __action_allin__(self, action):
         pu = self.__public_state_history__[-1]
 
-        pu.__is_allin__[pu.turn]   = True
+        pu.__replace_item__("__is_allin__", pu.turn, True)
         pu.__num_allin__          += 1
 
-        pu.__bets__[pu.turn]      += action.price
-        pu.__chips__[pu.turn]      = 0
+        pu.__replace_item__("__bets__",  pu.turn, pu.bets[pu.turn] + action.price)
+        pu.__replace_item__("__chips__", pu.turn, 0)
+        self.__pot_for_update__(pu).add(pu.turn, action.price)
+        pu.pot.close(pu.bets[pu.turn])
 
-        pu.__is_needed_to_action__[pu.turn] = False
+        pu.__replace_item__("__is_needed_to_action__", pu.turn, False)
         pu.__num_needed_to_action__        -= 1
         if pu.bets[pu.turn] > pu.max_bet_sofar:
             pu.__max_bet_sofar__ = pu.bets[pu.turn]
@@ -442,7 +646,7 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
             while p != pu.turn:
                 if pu.is_allin[p] == False and pu.is_fold[p] == False and pu.is_needed_to_action[p] == False:
                     pu.__num_needed_to_action__  += 1
-                    pu.__is_needed_to_action__[p] = True
+                    pu.__replace_item__("__is_needed_to_action__", p, True)
                 p = (p + 1) % pu.param_num_normal_players
 
             pu.__max_bet_sofar__ = pu.bets[pu.turn]
@@ -452,59 +656,155 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
 #####################################Utils Function ##############################
         # override
 
+    ## the hands of a compete are split into shards of this size, and every shard has its own seed derived from the seed of the compete.
+    ## So the result doesn't depend on the number of processes.
+    compete_shard_size = 100
+
     @classmethod
-    def compete_silent(cls, env, players):
+    def compete_silent(cls, env, players, num_hands = 1000, num_processes = 1, seed = None):
         '''
-        Use the game environment to hold a compete_silent for the players
+        Use the game environment to hold a compete_silent for the players.\n
+        With num_processes > 1, the shards of the hands are played by a pool of processes with the copies of the env and the players,
+        so the changes of the players during the compete are not kept. The pool needs the fork start method, and the compete runs in one process without it.
+        The random module of the caller is left as it was, except one draw for the default seed.
 
         :param env: The game environment
         :param players: The normal players (without the chance player)
+        :param num_hands: The number of the hands
+        :param num_processes: The number of processes
+        :param seed: The seed of the compete. The same seed gives the same scores for any number of processes. The default seed is drawn from the random module
         :return: scores for the players
         '''
-
         total_scores = [0 for i in range(len(players))]
-        total_count = 1000
-        num_normal_players = len(players)
-
-        players = players + [roomai.games.common.RandomPlayerChance()]
-
-        for count in range(total_count):
-
-            chips = [(1000 + int(random.random() * 200)) for i in range(len(players))]
-            dealer_id = int(random.random() * len(players))
-            big_blind_bet = 50
-
-            infos, public, persons, private, action_history = env.init({"chips": chips,
-                                                        "param_num_normal_players": num_normal_players,
-                                                        "dealer_id": dealer_id,
-                                                        "big_blind_bet": big_blind_bet})
-            for i in range(len(players)):
-                players[i].receive_info(infos[i])
-            while public[-1].is_terminal == False:
-                turn = public[-1].turn
-                action = players[turn].take_action()
-                # print len(infos[turn].person_state.available_actions),action.key(),turn
-                infos, public, persons, private = env.forward(action)
-                for i in range(len(players)):
-                    players[i].receive_info(infos[i])
-
+        count        = 0
+        for scores, num, hand_scores in cls.__compete_shards__(env, players, num_hands, num_processes, seed, False):
             for i in range(len(players)):
-                players[i].receive_info(infos[i])
-            for i in range(num_normal_players):
-                total_scores[i] += public[-1].scores[i]
-
-            if (count + 1) % 500 == 0:
+                total_scores[i] += scores[i]
+            count += num
+            if count // 500 > (count - num) // 500:
                 tmp_scores = [0 for i in range(len(total_scores))]
                 for i in range(len(total_scores)):
-                    tmp_scores[i] = total_scores[i] / (count + 1)
+                    tmp_scores[i] = total_scores[i] / count
                 roomai.get_logger().info("TexasHoldem completes %d competitions, scores=%s" % (
-                count + 1, ",".join([str(i) for i in tmp_scores])))
+                count, ",".join([str(i) for i in tmp_scores])))
 
         for i in range(len(total_scores)):
-            total_scores[i] /= 1.0 * total_count
+            total_scores[i] /= 1.0 * num_hands
 
         return total_scores
 
+    @classmethod
+    def compete_stream(cls, env, players, num_hands = 100000, num_processes = 1, seed = None, confidence = 0.95, target_width = None, stop_on_leader = True, min_hands = 100):
+        '''
+        Use the game environment to hold a compete for the players, and yield the scores hand by hand with the running statistics.
+        The compete stops by itself once the widest confidence interval of the mean scores is narrower than target_width,
+        or one player is clearly ahead of the others if stop_on_leader = True, or num_hands hands are played.\n
+        Examples of usages:\n
+        >> for scores, stats in TexasHoldemEnv.compete_stream(env, players, target_width = 5):\n
+        >>     pass\n
+        >> stats.means, stats.intervals, stats.leader\n
+
+        :param env: The game environment
+        :param players: The normal players (without the chance player)
+        :param num_hands: The maximum number of the hands
+        :param num_processes: The number of processes, see compete_silent
+        :param seed: The seed of the compete, see compete_silent
+        :param confidence: The confidence level of the intervals
+        :param target_width: The compete stops once the widest interval is narrower than target_width, and None means no target width
+        :param stop_on_leader: Whether the compete stops once a player is clearly ahead
+        :param min_hands: The compete doesn't stop before min_hands hands
+        :return: A generator of (the scores of the hand, the roomai.games.common.CompeteStats updated by the hand). The stats is the same object for all hands
+        '''
+        stats  = roomai.games.common.CompeteStats(len(players), confidence)
+        shards = cls.__compete_shards__(env, players, num_hands, num_processes, seed, True)
+        try:
+            for sums, num, hand_scores in shards:
+                for scores in hand_scores:
+                    stats.add(scores)
+                    yield scores, stats
+                    if stats.count >= min_hands:
+                        if target_width is not None and stats.max_width < target_width:
+                            return
+                        if stop_on_leader and stats.leader is not None:
+                            return
+        finally:
+            shards.close()
+
+    @classmethod
+    def __compete_shards__(cls, env, players, num_hands, num_processes, seed, keep_hand_scores):
+        ## yield the results of the shards in order, see __compete_shard__
+        if seed is None:
+            seed = random.getrandbits(64)
+        num_shards = (num_hands + cls.compete_shard_size - 1) // cls.compete_shard_size
+        seeds      = np.random.SeedSequence(seed).spawn(num_shards)
+        shards     = []
+        for i in range(num_shards):
+            size = min(cls.compete_shard_size, num_hands - i * cls.compete_shard_size)
+            shards.append((size, int(seeds[i].generate_state(1)[0]), keep_hand_scores))
+
+        context = __compete_context__()
+        if num_processes > 1 and num_shards > 1 and context is None:
+            roomai.get_logger().warning("The fork start method isn't available, and the compete runs in one process")
+        if num_processes > 1 and num_shards > 1 and context is not None:
+            HandEvaluator.load_tables()
+            pool = context.Pool(min(num_processes, num_shards), __init_compete_worker__, (env, players))
+            try:
+                for result in pool.imap(__compete_shard__, shards):
+                    yield result
+                pool.close()
+            finally:
+                ## a stream stopped early doesn't wait for the remaining shards
+                pool.terminate()
+                pool.join()
+        else:
+            for shard in shards:
+                yield __play_compete_shard__(env, players, shard[0], shard[1], shard[2])
+
+    @classmethod
+    def __compete_hand__(cls, env, players, rng):
+        ## play one hand, players contains the chance player
+        num_normal_players = len(players) - 1
+        chips = [(1000 + int(rng.random() * 200)) for i in range(num_normal_players)]
+        dealer_id = int(rng.random() * num_normal_players)
+        big_blind_bet = 50
+
+        infos, public, persons, private, action_history = env.init({"param_init_chips": chips,
+                                                    "param_num_normal_players": num_normal_players,
+                                                    "param_dealer_id": dealer_id,
+                                                    "param_big_blind_bet": big_blind_bet})
+        for i in range(len(players)):
+            players[i].receive_info(infos[i])
+        while public[-1].is_terminal == False:
+            turn = public[-1].turn
+            action = players[turn].take_action()
+            infos, public, persons, private = env.forward(action)
+            for i in range(len(players)):
+                players[i].receive_info(infos[i])
+
+        for i in range(len(players)):
+            players[i].receive_info(infos[i])
+        return public[-1].scores
+
+    def __person_state_for_update__(self, i):
+        ## the person state shared with the previous snapshot is cloned before it changes
+        history = self.__person_states_history__[i]
+        if len(history) > 1 and history[-1] is history[-2]:
+            history[-1] = history[-1].__clone__()
+        return history[-1]
+
+    def __pot_for_update__(self, pu):
+        ## the pot shared with the previous snapshot is copied before it changes
+        if pu.param_history_mode not in InPlaceHistoryModes:
+            pu.__pot__ = pu.pot.__deepcopy__()
+        return pu.pot
+
+    def __private_state_for_update__(self):
+        ## the private state shared with the previous snapshot is cloned before it changes
+        history = self.__private_state_history__
+        if len(history) > 1 and history[-1] is history[-2]:
+            history[-1] = history[-1].__clone__()
+        return history[-1]
+
     @classmethod
     def __next_player__(self, pu):
         i = pu.turn
@@ -544,171 +844,9 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
 
     @classmethod
     def __cards2pattern_cards__(cls, hand_cards, remaining_cards):
-        key = cmp_to_key(roomai.games.texasholdem.PokerCard.compare)
-        pointrank2cards = dict()
-        for c in hand_cards + remaining_cards:
-            if c.point_rank in pointrank2cards:
-                pointrank2cards[c.point_rank].append(c)
-            else:
-                pointrank2cards[c.point_rank] = [c]
-        for p in pointrank2cards:
-            pointrank2cards[p].sort(key = key)
-
-        suitrank2cards = dict()
-        for c in hand_cards + remaining_cards:
-            if c.suit_rank in suitrank2cards:
-                suitrank2cards[c.suit_rank].append(c)
-            else:
-                suitrank2cards[c.suit_rank] = [c]
-        for s in suitrank2cards:
-            suitrank2cards[s].sort(key=key)
-
-        num2point = [[], [], [], [], []]
-        for p in pointrank2cards:
-            num = len(pointrank2cards[p])
-            num2point[num].append(p)
-        for i in range(5):
-            num2point[num].sort()
-
-        sorted_point = []
-        for p in pointrank2cards:
-            sorted_point.append(p)
-        sorted_point.sort()
-
-        ##straight_samesuit
-        for s in suitrank2cards:
-            if len(suitrank2cards[s]) >= 5:
-                numStraight = 1
-                for i in range(len(suitrank2cards[s]) - 2, -1, -1):
-                    if suitrank2cards[s][i].point_rank == suitrank2cards[s][i + 1].point_rank - 1:
-                        numStraight += 1
-                    else:
-                        numStraight = 1
-
-                    if numStraight == 5:
-                        pattern = AllCardsPattern["Straight_SameSuit"]
-                        return (pattern,suitrank2cards[s][i:i + 5])
-
-        ##4_1
-        if len(num2point[4]) > 0:
-            p4 = num2point[4][0]
-            p1 = -1
-            for i in range(len(sorted_point) - 1, -1, -1):
-                if sorted_point[i] != p4:
-                    p1 = sorted_point[i]
-                    break
-            pattern = AllCardsPattern["4_1"]
-            cards   = pointrank2cards[p4][0:4]
-            cards.append(pointrank2cards[p1][0])
-
-            return (pattern,cards)
-
-        ##3_2
-        if len(num2point[3]) >= 1:
-            pattern = AllCardsPattern["3_2"]
-
-            if len(num2point[3]) == 2:
-                p3 = num2point[3][1]
-                cards = pointrank2cards[p3][0:3]
-                p2 = num2point[3][0]
-                cards.append(pointrank2cards[p2][0])
-                cards.append(pointrank2cards[p2][1])
-                return (pattern,cards)
-
-            if len(num2point[2]) >= 1:
-                p3 = num2point[3][0]
-                cards = pointrank2cards[p3][0:3]
-                p2 = num2point[2][len(num2point[2]) - 1]
-                cards.append(pointrank2cards[p2][0])
-                cards.append(pointrank2cards[p2][1])
-                return (pattern,cards)
-
-        ##SameSuit
-        for s in suitrank2cards:
-            if len(suitrank2cards[s]) >= 5:
-                pattern = AllCardsPattern["SameSuit"]
-                len1 = len(suitrank2cards[s])
-                cards = suitrank2cards[s][len1 - 5:len1]
-                return (pattern,cards)
-
-        ##Straight_DiffSuit
-        numStraight = 1
-        for idx in range(len(sorted_point) - 2, -1, -1):
-            if sorted_point[idx] + 1 == sorted_point[idx]:
-                numStraight += 1
-            else:
-                numStraight = 1
-
-            if numStraight == 5:
-                pattern = AllCardsPattern["Straight_DiffSuit"]
-                cards = []
-                for p in range(idx, idx + 5):
-                    point = sorted_point[p]
-                    cards.append(pointrank2cards[point][0])
-                return (pattern,cards)
-
-        ##3_1_1
-        if len(num2point[3]) == 1:
-            pattern = AllCardsPattern["3_1_1"]
-
-            p3 = num2point[3][0]
-            cards = pointrank2cards[p3][0:3]
-
-            num = 0
-            for i in range(len(sorted_point) - 1, -1, -1):
-                p = sorted_point[i]
-                if p != p3:
-                    cards.append(pointrank2cards[p][0])
-                    num += 1
-                if num == 2:    break
-            return (pattern,cards)
-
-        ##2_2_1
-        if len(num2point[2]) >= 2:
-            pattern = AllCardsPattern["2_2_1"]
-            p21 = num2point[2][len(num2point[2]) - 1]
-            cards = []
-            for c in pointrank2cards[p21]:
-                cards.append(c)
-            p22 = num2point[2][len(num2point[2]) - 2]
-            for c in pointrank2cards[p22]:
-                cards.append(c)
-
-            flag = False
-            for i in range(len(sorted_point) - 1, -1, -1):
-                p = sorted_point[i]
-                if p != p21 and p != p22:
-                    c = pointrank2cards[p][0]
-                    cards.append(c)
-                    flag = True
-                if flag == True:    break;
-            return (pattern,cards)
-
-        ##2_1_1_1
-        if len(num2point[2]) == 1:
-            pattern = AllCardsPattern["2_1_1_1"]
-            p2 = num2point[2][0]
-            cards = pointrank2cards[p2][0:2]
-            num = 0
-            for p in range(len(sorted_point) - 1, -1, -1):
-                p1 = sorted_point[p]
-                if p1 != p2:
-                    cards.append(pointrank2cards[p1][0])
-                if num == 3:    break
-            return (pattern,cards)
-
-        ##1_1_1_1_1
-        pattern = AllCardsPattern["1_1_1_1_1"]
-        count = 0
-        cards = []
-        for i in range(len(sorted_point) - 1, -1, -1):
-            p = sorted_point[i]
-            for c in pointrank2cards[p]:
-                cards.append(c)
-                count += 1
-                if count == 5: break
-            if count == 5: break
-        return (pattern,cards)
+        cards    = list(hand_cards) + list(remaining_cards)
+        strength = HandEvaluator.evaluate(cards)
+        return (HandEvaluator.pattern(strength), HandEvaluator.best_five(cards, strength))
 
     @classmethod
     def __compare_handcards__(cls, hand_card0, hand_card1, keep_cards):
@@ -726,6 +864,22 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
             rank += pattern_cards[1][i].point_rank
         return rank
 
+    @classmethod
+    def rank_hands(cls, hole_cards, boards):
+        '''
+        Rank a batch of hands with vectorized numpy operations. The ranks are the strengths of HandEvaluator,
+        so the hand with the larger rank is the better hand and the hands with the same rank are tied.
+
+        :param hole_cards: An integer array with the shape [N, 2] of the canonical card indices (PokerCard.index) of the hand cards
+        :param boards: An integer array with the shape [N, 5] of the canonical card indices of the public cards. [N, 3] and [N, 4] are accepted for the unfinished boards
+        :return: An int32 array with the shape [N]
+        '''
+        hole_cards = np.asarray(hole_cards, dtype = np.int64)
+        boards     = np.asarray(boards, dtype = np.int64)
+        if hole_cards.ndim != 2 or boards.ndim != 2 or hole_cards.shape[0] != boards.shape[0]:
+            raise ValueError("TexasHoldemEnv.rank_hands needs hole_cards [N, 2] and boards [N, 5], but the shapes are %s and %s" % (str(hole_cards.shape), str(boards.shape)))
+        return HandEvaluator.evaluate_batch(np.concatenate([hole_cards, boards], axis = 1))
+
     @classmethod
     def __compare_patterns_cards__(cls, p1, p2):
         return cls.compute_rank_pattern_cards(p1) - cls.compute_rank_pattern_cards(p2)
@@ -735,4 +889,6 @@ class TexasHoldemEnv(roomai.games.common.AbstractEnv):
         if newinstance is None:
             newinstance = TexasHoldemEnv()
         newinstance = super(TexasHoldemEnv, self).__deepcopy__(newinstance=newinstance)
+        ## the undo records only hold the replaced fields, which are never mutated
+        newinstance.__undo_records__ = list(self.__undo_records__)
         return newinstance
\ No newline at end of file
@@ -0,0 +1,159 @@
+#!/bin/python
+#coding:utf-8
+import itertools
+import multiprocessing
+
+import numpy as np
+
+import roomai
+from roomai.games.texasholdem.TexasHoldemUtil      import PokerCard
+from roomai.games.texasholdem.TexasHoldemEvaluator import HandEvaluator
+
+
+class EquityResult(object):
+    '''
+    The showdown equities of the players, computed by EquityCalculator.compute.\n
+    win[i] is the probability that the player i wins the whole pot alone, tie[i] is the probability that the player i splits the pot with others,
+    and equity[i] is the expected share of the pot w.r.t the player i.
+    '''
+    def __init__(self, win, tie, equity, num_runouts, is_exact):
+        self.__win__         = tuple([float(w) for w in win])
+        self.__tie__         = tuple([float(t) for t in tie])
+        self.__equity__      = tuple([float(e) for e in equity])
+        self.__num_runouts__ = num_runouts
+        self.__is_exact__    = is_exact
+
+    def __get_win__(self):  return self.__win__
+    win = property(__get_win__, doc="The probabilities of winning the whole pot alone. For example, win = (0.81, 0.18)")
+
+    def __get_tie__(self):  return self.__tie__
+    tie = property(__get_tie__, doc="The probabilities of splitting the pot with other players. For example, tie = (0.01, 0.01)")
+
+    def __get_equity__(self):  return self.__equity__
+    equity = property(__get_equity__, doc="The expected shares of the pot. The sum of the equities is 1. For example, equity = (0.815, 0.185)")
+
+    def __get_num_runouts__(self):  return self.__num_runouts__
+    num_runouts = property(__get_num_runouts__, doc="The number of the runouts evaluated, which are all runouts if is_exact = True, or the Monte Carlo samples otherwise")
+
+    def __get_is_exact__(self):  return self.__is_exact__
+    is_exact = property(__get_is_exact__, doc="is_exact = True means all runouts are enumerated, and is_exact = False means the result is estimated by Monte Carlo")
+
+
+def __showdown_counts__(hand_indices, public_indices, runouts):
+    ## returns the win, tie and equity sums of the players over the runouts
+    boards = np.concatenate([np.tile(np.array(public_indices, dtype = np.int64), (len(runouts), 1)), runouts], axis = 1)
+    strengths = np.array([HandEvaluator.evaluate_batch(np.concatenate([np.tile(np.array(h, dtype = np.int64), (len(runouts), 1)), boards], axis = 1)) for h in hand_indices])
+
+    is_winner   = strengths == strengths.max(axis = 0)
+    num_winners = is_winner.sum(axis = 0)
+    win         = (is_winner & (num_winners == 1)).sum(axis = 1)
+    tie         = (is_winner & (num_winners > 1)).sum(axis = 1)
+    equity      = (is_winner / num_winners.astype(np.float64)).sum(axis = 1)
+    return win, tie, equity
+
+
+def __equity_shard__(args):
+    hand_indices, public_indices, deck, num_samples, seed_sequence = args
+    rng     = np.random.default_rng(seed_sequence)
+    num     = 5 - len(public_indices)
+    keys    = rng.random((num_samples, len(deck)))
+    chosen  = np.argpartition(keys, num - 1, axis = 1)[:, 0:num]
+    runouts = np.asarray(deck, dtype = np.int64)[chosen]
+    return __showdown_counts__(hand_indices, public_indices, runouts)
+
+
+class EquityCalculator(object):
+    '''
+    The showdown equity calculator of TexasHoldem. Given the hand cards of 2-6 players and 0, 3, 4 or 5 public cards,
+    it enumerates all runouts of the remaining public cards when they are few, and falls back to a seeded Monte Carlo estimation otherwise.\n
+    Examples of usages:\n
+    >> import roomai.games.texasholdem\n
+    >> result = roomai.games.texasholdem.EquityCalculator.compute([["A_Spade","A_Heart"],["K_Club","Q_Club"]], ["2_Heart","7_Club","T_Club"])\n
+    >> result.equity\n
+    (0.6222..., 0.3777...)\n
+    '''
+
+    ## The Monte Carlo samples are split into shards of this size, and every shard has its own seed derived from the seed of the computation.
+    ## So the result doesn't depend on the number of processes.
+    shard_size = 20000
+
+    @classmethod
+    def compute(cls, hand_cards, public_cards = (), max_exhaustive_runouts = 100000, num_samples = 100000, seed = None, num_processes = 1):
+        '''
+        Compute the showdown equities of the players
+
+        :param hand_cards: The hand cards of the players. Every item contains two PokerCards or two keys of PokerCards, for example [["A_Spade","A_Heart"],["K_Club","Q_Club"]]
+        :param public_cards: 0, 3, 4 or 5 PokerCards or keys of PokerCards on the board
+        :param max_exhaustive_runouts: All runouts are enumerated if the number of them is not more than max_exhaustive_runouts
+        :param num_samples: The number of Monte Carlo samples
+        :param seed: The seed of the Monte Carlo samples. The same seed gives the same result
+        :param num_processes: The number of processes used by the Monte Carlo samples
+        :return: An EquityResult
+        '''
+        hand_indices   = [[cls.__card_index__(c) for c in h] for h in hand_cards]
+        public_indices = [cls.__card_index__(c) for c in public_cards]
+
+        if len(hand_indices) < 2 or len(hand_indices) > 6:
+            raise ValueError("EquityCalculator needs 2-6 players, but %d players are given" % (len(hand_indices)))
+        for h in hand_indices:
+            if len(h) != 2:
+                raise ValueError("Every player needs two hand cards, but %d hand cards are given" % (len(h)))
+        if len(public_indices) not in [0, 3, 4, 5]:
+            raise ValueError("The number of the public cards must be 0, 3, 4 or 5, but %d public cards are given" % (len(public_indices)))
+        used = sum(hand_indices, []) + public_indices
+        if len(set(used)) != len(used):
+            raise ValueError("The hand cards and the public cards contain duplicated cards")
+
+        used_mask    = 0
+        for idx in used:
+            used_mask |= 1 << idx
+        deck         = [idx for idx in range(52) if (used_mask >> idx) & 1 == 0]
+        num          = 5 - len(public_indices)
+        num_runouts  = 1
+        for i in range(num):
+            num_runouts = num_runouts * (len(deck) - i) // (i + 1)
+
+        if num_runouts <= max_exhaustive_runouts:
+            if num == 0:
+                runouts = np.zeros((1, 0), dtype = np.int64)
+            else:
+                runouts = np.array(list(itertools.combinations(deck, num)), dtype = np.int64)
+            win, tie, equity = __showdown_counts__(hand_indices, public_indices, runouts)
+            total            = num_runouts
+            is_exact         = True
+        else:
+            win, tie, equity, total = cls.__monte_carlo__(hand_indices, public_indices, deck, num_samples, seed, num_processes)
+            is_exact = False
+
+        return EquityResult(win / float(total), tie / float(total), equity / float(total), total, is_exact)
+
+    @classmethod
+    def __monte_carlo__(cls, hand_indices, public_indices, deck, num_samples, seed, num_processes):
+        num_shards = (num_samples + cls.shard_size - 1) // cls.shard_size
+        seeds      = np.random.SeedSequence(seed).spawn(num_shards)
+        shards     = []
+        for i in range(num_shards):
+            size = min(cls.shard_size, num_samples - i * cls.shard_size)
+            shards.append((hand_indices, public_indices, deck, size, seeds[i]))
+
+        if num_processes > 1 and num_shards > 1:
+            HandEvaluator.load_tables()
+            pool = multiprocessing.Pool(min(num_processes, num_shards))
+            try:
+                counts = pool.map(__equity_shard__, shards)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            counts = [__equity_shard__(shard) for shard in shards]
+
+        win    = sum([c[0] for c in counts])
+        tie    = sum([c[1] for c in counts])
+        equity = sum([c[2] for c in counts])
+        return win, tie, equity, num_samples
+
+    @classmethod
+    def __card_index__(cls, card):
+        if isinstance(card, PokerCard):
+            return card.index
+        return PokerCard.lookup(card).index
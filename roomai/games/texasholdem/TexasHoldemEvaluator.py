@@ -0,0 +1,501 @@
+#!/bin/python
+#coding:utf-8
+import itertools
+import collections
+
+import numpy as np
+
+import roomai
+from roomai.games.texasholdem.TexasHoldemUtil import AllCardsPattern
+
+
+#The strength of a hand is (category << 20) + the point ranks of the best five cards, 4 bits per card.
+#The best five cards are ordered by the size of their group (4,3,2,1) and then by the point rank,
+#for example, 3_2 with three Ks and two 5s is packed as [K,K,K,5,5]. The straight A,2,3,4,5 is packed as [5,4,3,2,A].
+#A hand with a larger strength beats a hand with a smaller strength.
+CategoryNames = ["1_1_1_1_1", "2_1_1_1", "2_2_1", "3_1_1", "Straight_DiffSuit", "SameSuit", "3_2", "4_1", "Straight_SameSuit"]
+CategoryShift = 20
+
+#The evaluation key of a card is (5 ** point_rank) << 12 + 1 << (3 * suit_rank).
+#The low 12 bits count the cards of every suit, and the high bits count the cards of every point in base 5.
+#No point appears more than four times, so the sum of the keys of any card set is a collision-free hash of it.
+__suit_bits__ = 12
+__suit_mask__ = (1 << __suit_bits__) - 1
+
+
+def __straight_top__(point_mask):
+    for top in range(12, 3, -1):
+        straight = 0x1F << (top - 4)
+        if point_mask & straight == straight:
+            return top
+    wheel = (1 << 12) | 0xF
+    if point_mask & wheel == wheel:
+        return 3
+    return -1
+
+
+def __straight_points__(top):
+    if top == 3:
+        return [3, 2, 1, 0, 12]
+    return [top, top - 1, top - 2, top - 3, top - 4]
+
+
+def __pack__(category, points):
+    strength = category
+    for p in points:
+        strength = (strength << 4) | p
+    return strength
+
+
+def __point_strength__(counts):
+    point_mask = 0
+    for p in range(13):
+        if counts[p] > 0:
+            point_mask |= 1 << p
+    groups = sorted([(counts[p], p) for p in range(13) if counts[p] > 0], reverse = True)
+
+    if groups[0][0] == 4:
+        kicker = max([p for c, p in groups[1:]])
+        return __pack__(7, [groups[0][1]] * 4 + [kicker])
+
+    if groups[0][0] == 3 and groups[1][0] >= 2:
+        pair = max([p for c, p in groups[1:] if c >= 2])
+        return __pack__(6, [groups[0][1]] * 3 + [pair] * 2)
+
+    top = __straight_top__(point_mask)
+    if top >= 0:
+        return __pack__(4, __straight_points__(top))
+
+    if groups[0][0] == 3:
+        kickers = sorted([p for c, p in groups[1:]], reverse = True)[0:2]
+        return __pack__(3, [groups[0][1]] * 3 + kickers)
+
+    if groups[0][0] == 2 and groups[1][0] == 2:
+        kicker = max([p for c, p in groups[2:]])
+        return __pack__(2, [groups[0][1]] * 2 + [groups[1][1]] * 2 + [kicker])
+
+    if groups[0][0] == 2:
+        kickers = sorted([p for c, p in groups[1:]], reverse = True)[0:3]
+        return __pack__(1, [groups[0][1]] * 2 + kickers)
+
+    return __pack__(0, sorted([p for c, p in groups], reverse = True)[0:5])
+
+
+def __flush_strength__(point_mask):
+    top = __straight_top__(point_mask)
+    if top >= 0:
+        return __pack__(8, __straight_points__(top))
+    points = [p for p in range(12, -1, -1) if point_mask & (1 << p)]
+    return __pack__(5, points[0:5])
+
+
+#CardKeys[PokerCard.index]
+CardKeys   = [((5 ** (idx >> 2)) << __suit_bits__) | (1 << (3 * (idx & 3))) for idx in range(52)]
+
+def __build_point_table__():
+    ## the five-card hands are evaluated directly,
+    ## and a six- or seven-card hand is as strong as the best of its sub-hands with one card less
+    powers = [5 ** p for p in range(13)]
+    table  = dict()
+    for points in itertools.combinations_with_replacement(range(13), 5):
+        counts = [points.count(p) for p in range(13)]
+        if max(counts) <= 4:
+            table[sum([powers[p] for p in points])] = __point_strength__(counts)
+
+    previous = table
+    for num in range(6, 8):
+        current = dict()
+        for key, strength in previous.items():
+            for power in powers:
+                if key // power % 5 < 4:
+                    new_key = key + power
+                    if current.get(new_key, -1) < strength:
+                        current[new_key] = strength
+        table.update(current)
+        previous = current
+    return table
+
+
+def __build_flush_table__():
+    table = [-1] * (1 << 13)
+    for point_mask in range(1 << 13):
+        if bin(point_mask).count("1") >= 5:
+            table[point_mask] = __flush_strength__(point_mask)
+    return table
+
+
+def __build_flush_suit_table__():
+    table = [-1] * (1 << __suit_bits__)
+    for key in range(1 << __suit_bits__):
+        for s in range(4):
+            if (key >> (3 * s)) & 7 >= 5:
+                table[key] = s
+    return table
+
+
+## The tables are built by the first evaluation (about half a second), see HandEvaluator.load_tables
+PointTable     = None
+FlushTable     = None
+FlushSuitTable = None
+
+## The numpy copies of the tables used by HandEvaluator.evaluate_batch.
+## The point table is stored as sorted keys and their strengths, and looked up by a binary search.
+CardKeysArray       = np.array(CardKeys, dtype = np.int64)
+PointKeysArray      = None
+PointStrengthsArray = None
+FlushArray          = None
+FlushSuitArray      = None
+
+
+def __load_tables__():
+    global PointTable, FlushTable, FlushSuitTable
+    if PointTable is None:
+        FlushTable     = __build_flush_table__()
+        FlushSuitTable = __build_flush_suit_table__()
+        PointTable     = __build_point_table__()
+
+
+def __load_arrays__():
+    global PointKeysArray, PointStrengthsArray, FlushArray, FlushSuitArray
+    if PointKeysArray is None:
+        __load_tables__()
+        keys                = sorted(PointTable.keys())
+        PointStrengthsArray = np.array([PointTable[k] for k in keys], dtype = np.int32)
+        FlushArray          = np.array(FlushTable, dtype = np.int32)
+        FlushSuitArray      = np.array(FlushSuitTable, dtype = np.int8)
+        PointKeysArray      = np.array(keys, dtype = np.int64)
+
+
+class HandRankCache(object):
+    '''
+    The bounded LRU cache of the hand strengths, keyed by the 52-bit mask of the cards (PokerCard.cards_to_mask).
+    It is used by HandEvaluator after HandEvaluator.enable_cache.\n
+    The counters show whether the cache pays off, for example a low hit rate means the spots are rarely repeated or the cache is too small.
+    '''
+
+    def __init__(self, max_size):
+        if max_size < 1:
+            raise ValueError("The max size of the HandRankCache must be positive, but it is %d" % (max_size))
+        self.__max_size__  = max_size
+        self.__entries__   = collections.OrderedDict()
+        self.__hits__      = 0
+        self.__misses__    = 0
+        self.__evictions__ = 0
+
+    def __get_max_size__(self):  return self.__max_size__
+    max_size = property(__get_max_size__, doc = "The maximum number of the cached hands")
+
+    def __get_size__(self):      return len(self.__entries__)
+    size = property(__get_size__, doc = "The number of the cached hands")
+
+    def __get_hits__(self):      return self.__hits__
+    hits = property(__get_hits__, doc = "The number of the lookups found in the cache")
+
+    def __get_misses__(self):    return self.__misses__
+    misses = property(__get_misses__, doc = "The number of the lookups not found in the cache")
+
+    def __get_evictions__(self): return self.__evictions__
+    evictions = property(__get_evictions__, doc = "The number of the least recently used hands dropped from the full cache")
+
+    def __get_hit_rate__(self):
+        if self.__hits__ + self.__misses__ == 0:
+            return 0.0
+        return self.__hits__ / float(self.__hits__ + self.__misses__)
+    hit_rate = property(__get_hit_rate__, doc = "hits / (hits + misses)")
+
+    def get(self, mask):
+        '''
+        :param mask: The mask of the cards
+        :return: The cached strength, or None if the cards aren't cached
+        '''
+        strength = self.__entries__.get(mask)
+        if strength is None:
+            self.__misses__ += 1
+            return None
+        self.__hits__ += 1
+        self.__entries__.move_to_end(mask)
+        return strength
+
+    def put(self, mask, strength):
+        '''
+        :param mask: The mask of the cards
+        :param strength: The strength of the cards
+        '''
+        self.__entries__[mask] = strength
+        if len(self.__entries__) > self.__max_size__:
+            self.__entries__.popitem(last = False)
+            self.__evictions__ += 1
+
+    def clear(self):
+        '''
+        Drop all cached hands and reset the counters
+        '''
+        self.__entries__.clear()
+        self.__hits__      = 0
+        self.__misses__    = 0
+        self.__evictions__ = 0
+
+
+class HandEvaluator(object):
+    '''
+    The table-driven hand evaluator of TexasHoldem. It maps any set of 5, 6 or 7 poker cards to an integer strength.\n
+    The hand with the larger strength is the better hand, and two hands with the same strength are tied.\n
+    Examples of usages:\n
+    >> import roomai.games.texasholdem\n
+    >> cards = [roomai.games.texasholdem.PokerCard.lookup(k) for k in ["A_Spade","A_Heart","K_Club","K_Spade","2_Heart","7_Diamond","9_Club"]]\n
+    >> strength = roomai.games.texasholdem.HandEvaluator.evaluate(cards)\n
+    >> roomai.games.texasholdem.HandEvaluator.pattern(strength)[0]\n
+    "2_2_1"\n
+    '''
+
+    ## The opt-in cache of the strengths, see HandEvaluator.enable_cache
+    __cache__ = None
+
+    @classmethod
+    def enable_cache(cls, max_size = 100000):
+        '''
+        Memoize the strengths evaluated by HandEvaluator.evaluate and HandEvaluator.evaluate_mask.
+        It pays off when the same card sets are evaluated over and over, for example in repeated simulations of the same spots.
+
+        :param max_size: The maximum number of the cached hands. The least recently used hands are dropped when the cache is full
+        :return: The HandRankCache, whose counters show the hits, the misses and the evictions
+        '''
+        cls.__cache__ = HandRankCache(max_size)
+        return cls.__cache__
+
+    @classmethod
+    def disable_cache(cls):
+        '''
+        Drop the cache enabled by HandEvaluator.enable_cache
+        '''
+        cls.__cache__ = None
+
+    @classmethod
+    def cache_info(cls):
+        '''
+        :return: The HandRankCache in use, or None if the cache isn't enabled
+        '''
+        return cls.__cache__
+
+    @classmethod
+    def load_tables(cls):
+        '''
+        Build the lookup tables of the evaluator. The tables are built by the first evaluation automatically.
+        Call this function before forking worker processes, and the workers will share the tables.
+        '''
+        __load_arrays__()
+
+    @classmethod
+    def evaluate(cls, cards):
+        '''
+        Evaluate the strength of a set of poker cards
+
+        :param cards: 5, 6 or 7 poker cards
+        :return: The strength of the best five cards
+        '''
+        if len(cards) < 5 or len(cards) > 7:
+            raise ValueError("HandEvaluator.evaluate needs 5, 6 or 7 cards, but %d cards are given" % (len(cards)))
+
+        cache = cls.__cache__
+        if cache is None:
+            return cls.evaluate_indices([c.index for c in cards])
+
+        mask = 0
+        for c in cards:
+            mask |= c.mask
+        strength = cache.get(mask)
+        if strength is None:
+            strength = cls.evaluate_indices([c.index for c in cards])
+            cache.put(mask, strength)
+        return strength
+
+    @classmethod
+    def evaluate_indices(cls, indices):
+        '''
+        Evaluate the strength of a set of poker cards given by their canonical indices (PokerCard.index)
+
+        :param indices: 5, 6 or 7 card indices
+        :return: The strength of the best five cards
+        '''
+        if PointTable is None:
+            __load_tables__()
+
+        key = 0
+        for idx in indices:
+            key += CardKeys[idx]
+
+        suit = FlushSuitTable[key & __suit_mask__]
+        if suit < 0:
+            return PointTable[key >> __suit_bits__]
+
+        point_mask = 0
+        for idx in indices:
+            if idx & 3 == suit:
+                point_mask |= 1 << (idx >> 2)
+        return FlushTable[point_mask]
+
+    @classmethod
+    def evaluate_mask(cls, mask):
+        '''
+        Evaluate the strength of a set of poker cards given by their 52-bit mask (PokerCard.cards_to_mask)
+
+        :param mask: The mask of 5, 6 or 7 cards
+        :return: The strength of the best five cards
+        '''
+        cache = cls.__cache__
+        if cache is not None:
+            strength = cache.get(mask)
+            if strength is not None:
+                return strength
+
+        key     = mask
+        indices = []
+        while mask:
+            low   = mask & -mask
+            indices.append(low.bit_length() - 1)
+            mask ^= low
+        if len(indices) < 5 or len(indices) > 7:
+            raise ValueError("HandEvaluator.evaluate_mask needs 5, 6 or 7 cards, but %d cards are given" % (len(indices)))
+        strength = cls.evaluate_indices(indices)
+        if cache is not None:
+            cache.put(key, strength)
+        return strength
+
+    @classmethod
+    def evaluate_batch(cls, indices):
+        '''
+        Evaluate a batch of card sets with vectorized numpy operations
+
+        :param indices: An integer array with the shape [N, K], 5 <= K <= 7. Every row contains the canonical indices (PokerCard.index) of K different cards
+        :return: An int32 array with the shape [N], the strengths of the rows
+        '''
+        indices = np.asarray(indices, dtype = np.int64)
+        if indices.ndim != 2 or indices.shape[1] < 5 or indices.shape[1] > 7:
+            raise ValueError("HandEvaluator.evaluate_batch needs an array with the shape [N, K] and 5 <= K <= 7, but the shape is %s" % (str(indices.shape)))
+        __load_arrays__()
+
+        keys      = CardKeysArray[indices].sum(axis = 1)
+        suits     = FlushSuitArray[keys & __suit_mask__]
+        strengths = PointStrengthsArray[np.searchsorted(PointKeysArray, keys >> __suit_bits__)]
+
+        is_flush  = suits >= 0
+        if is_flush.any():
+            flush_indices = indices[is_flush]
+            in_suit       = (flush_indices & 3) == suits[is_flush][:, np.newaxis]
+            point_masks   = np.where(in_suit, np.left_shift(1, flush_indices >> 2), 0).sum(axis = 1)
+            strengths[is_flush] = FlushArray[point_masks]
+        return strengths
+
+    @classmethod
+    def category(cls, strength):
+        '''
+        :param strength: The strength computed by HandEvaluator.evaluate
+        :return: The category of the strength, 0 for 1_1_1_1_1, ..., 8 for Straight_SameSuit
+        '''
+        return strength >> CategoryShift
+
+    @classmethod
+    def pattern(cls, strength):
+        '''
+        :param strength: The strength computed by HandEvaluator.evaluate
+        :return: The pattern in AllCardsPattern w.r.t the strength
+        '''
+        return AllCardsPattern[CategoryNames[strength >> CategoryShift]]
+
+    @classmethod
+    def points(cls, strength):
+        '''
+        :param strength: The strength computed by HandEvaluator.evaluate
+        :return: The point ranks of the best five cards w.r.t the strength
+        '''
+        return [(strength >> (16 - 4 * i)) & 0xF for i in range(5)]
+
+    @classmethod
+    def best_five(cls, cards, strength = None):
+        '''
+        Pick the best five cards out of the poker cards
+
+        :param cards: 5, 6 or 7 poker cards
+        :param strength: The strength of the cards. If it is None, the strength will be computed from the cards
+        :return: The best five poker cards, ordered by the size of their group and then by the point rank
+        '''
+        if strength is None:
+            strength = cls.evaluate(cards)
+
+        candidates = sorted(cards, key = lambda c: (c.point_rank, c.suit_rank))
+        category   = strength >> CategoryShift
+        if category == 5 or category == 8:
+            suit_count = [0, 0, 0, 0]
+            for c in candidates:
+                suit_count[c.suit_rank] += 1
+            suit       = suit_count.index(max(suit_count))
+            candidates = [c for c in candidates if c.suit_rank == suit]
+
+        best = []
+        for p in cls.points(strength):
+            for c in candidates:
+                if c.point_rank == p and c not in best:
+                    best.append(c)
+                    break
+        return best
+
+
+class BoardContext(object):
+    '''
+    The public cards shared by all players at a showdown, preprocessed once by the HandEvaluator.\n
+    The evaluation key and the point masks of every suit of the board are computed when the context is created,
+    so ranking a player only adds the keys of the two hand cards.\n
+    Examples of usages:\n
+    >> import roomai.games.texasholdem\n
+    >> board = roomai.games.texasholdem.BoardContext(public_state.public_cards)\n
+    >> strengths = [board.rank(person_state.hand_cards) for person_state in person_states]\n
+    '''
+
+    def __init__(self, public_cards):
+        '''
+        :param public_cards: 3, 4 or 5 poker cards on the board
+        '''
+        if len(public_cards) < 3 or len(public_cards) > 5:
+            raise ValueError("BoardContext needs 3, 4 or 5 public cards, but %d cards are given" % (len(public_cards)))
+        __load_tables__()
+
+        self.__public_cards__ = list(public_cards)
+        self.__key__          = 0
+        self.__suit_masks__   = [0, 0, 0, 0]
+        suit_count            = [0, 0, 0, 0]
+        for c in public_cards:
+            self.__key__                      += CardKeys[c.index]
+            self.__suit_masks__[c.suit_rank]  |= 1 << c.point_rank
+            suit_count[c.suit_rank]           += 1
+
+        ## a flush needs at least three suited cards on the board
+        self.__flush_possible__ = max(suit_count) >= 3
+
+    def __get_public_cards__(self): return tuple(self.__public_cards__)
+    public_cards = property(__get_public_cards__, doc = "The public cards of the board")
+
+    def rank(self, hand_cards):
+        '''
+        :param hand_cards: The poker cards of a player, for example TexasHoldemStatePerson.hand_cards
+        :return: The strength of the best five cards out of the hand cards and the board, the same as HandEvaluator.evaluate(hand_cards + public_cards)
+        '''
+        key = self.__key__
+        for c in hand_cards:
+            key += CardKeys[c.index]
+
+        if self.__flush_possible__:
+            suit = FlushSuitTable[key & __suit_mask__]
+            if suit >= 0:
+                point_mask = self.__suit_masks__[suit]
+                for c in hand_cards:
+                    if c.suit_rank == suit:
+                        point_mask |= 1 << c.point_rank
+                return FlushTable[point_mask]
+        return PointTable[key >> __suit_bits__]
+
+    def rank_all(self, hand_cards_list):
+        '''
+        :param hand_cards_list: The hand cards of the players. None means the player is skipped, for example the player folded
+        :return: The strengths of the players, and None for the skipped players
+        '''
+        return [None if hand_cards is None else self.rank(hand_cards) for hand_cards in hand_cards_list]
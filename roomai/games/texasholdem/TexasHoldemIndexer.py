@@ -0,0 +1,360 @@
+#!/bin/python
+#coding:utf-8
+import bisect
+import itertools
+
+import numpy as np
+
+import roomai
+from roomai.games.texasholdem.TexasHoldemUtil import PokerCard
+from roomai.games.texasholdem.TexasHoldemUtil import Stage
+
+
+def __choose__(n, k):
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+## SmallChoose[n, k] = C(n, k) for 0 <= n, k <= 13
+SmallChoose = np.array([[__choose__(n, k) for k in range(14)] for n in range(14)], dtype = np.int64)
+PopCount    = np.array([bin(m).count("1") for m in range(1 << 13)], dtype = np.int64)
+SmallChooseList = SmallChoose.tolist()
+PopCountList    = PopCount.tolist()
+
+
+class HandIndexer(object):
+    '''
+    The suit-isomorphic hand indexer of TexasHoldem.\n
+    Two hands are isomorphic if one becomes the other by permuting the suits, and they share the same index.
+    The indices of a stage are dense, from 0 to size-1, and every index maps back to a canonical hand.\n
+    The hand cards and the public cards are two rounds of cards, and the order of the cards within a round doesn't matter.
+    For example, the indexer of the secondStage has 1,286,792 indices, rather than C(52,2)*C(50,3) = 25,989,600 hands.\n
+    Examples of usages:\n
+    >> import roomai.games.texasholdem\n
+    >> indexer = roomai.games.texasholdem.HandIndexer.lookup(roomai.games.texasholdem.Stage.firstStage)\n
+    >> indexer.size\n
+    169\n
+    >> indexer.index([roomai.games.texasholdem.PokerCard.lookup("A_Spade"), roomai.games.texasholdem.PokerCard.lookup("K_Spade")])\n
+    >> indexer.index_batch(numpy_array_of_card_indices)\n
+    '''
+
+    ## the number of the public cards in every stage
+    StagePublicCards = {Stage.firstStage: 0, Stage.secondStage: 3, Stage.thirdStage: 4, Stage.fourthStage: 5}
+    __indexers__     = dict()
+
+    def __init__(self, cards_per_round):
+        self.__cards_per_round__ = tuple(cards_per_round)
+        self.__num_rounds__      = len(cards_per_round)
+        self.__num_cards__       = sum(cards_per_round)
+        self.__code_base__       = 8 ** self.__num_rounds__
+
+        ## the shape of a suit is the number of its cards in every round
+        shapes = []
+        for shape in itertools.product(*[range(min(n, 13) + 1) for n in cards_per_round]):
+            if sum(shape) <= 13:
+                shapes.append(shape)
+        self.__shape_size__ = dict()
+        for shape in shapes:
+            size, used = 1, 0
+            for m in shape:
+                size *= __choose__(13 - used, m)
+                used += m
+            self.__shape_size__[shape] = size
+
+        ## a configuration is the shapes of the four suits, sorted in the descending order
+        configurations = []
+        for suits in itertools.combinations_with_replacement(sorted(shapes, reverse = True), 4):
+            if all([sum([s[r] for s in suits]) == cards_per_round[r] for r in range(self.__num_rounds__)]):
+                configurations.append(tuple(sorted(suits, reverse = True)))
+        configurations.sort(key = self.__configuration_key__)
+
+        max_shape_size       = max(self.__shape_size__.values())
+        self.__choose__      = np.array([[__choose__(n, k) for k in range(5)] for n in range(max_shape_size + 4)], dtype = np.int64)
+        self.__keys__        = np.array([self.__configuration_key__(c) for c in configurations], dtype = np.int64)
+        self.__offsets__     = np.zeros(len(configurations) + 1, dtype = np.int64)
+        self.__multipliers__ = np.zeros((len(configurations), 4), dtype = np.int64)
+        self.__positions__   = np.zeros((len(configurations), 4), dtype = np.int64)
+        self.__radices__     = np.zeros((len(configurations), 4), dtype = np.int64)
+        self.__shapes__      = np.zeros((len(configurations), 4, self.__num_rounds__), dtype = np.int64)
+
+        for c in range(len(configurations)):
+            configuration = configurations[c]
+            groups        = [list(g) for k, g in itertools.groupby(range(4), key = lambda j: configuration[j])]
+            ## the suits with the same shape are a multiset of their indices, which has C(size + g - 1, g) possibilities
+            counts        = [__choose__(self.__shape_size__[configuration[g[0]]] + len(g) - 1, len(g)) for g in groups]
+            multiplier    = 1
+            for g in range(len(groups) - 1, -1, -1):
+                for i in range(len(groups[g])):
+                    j = groups[g][i]
+                    self.__multipliers__[c, j] = multiplier
+                    self.__radices__[c, j]     = counts[g]
+                    self.__positions__[c, j]   = len(groups[g]) - i
+                    self.__shapes__[c, j]      = configuration[j]
+                multiplier *= counts[g]
+            self.__offsets__[c + 1] = self.__offsets__[c] + multiplier
+
+        self.__size__ = int(self.__offsets__[-1])
+
+        ## the tables of index as python lists, which are much faster than numpy arrays for one hand
+        self.__keys_list__        = self.__keys__.tolist()
+        self.__offsets_list__     = self.__offsets__.tolist()
+        self.__multipliers_list__ = self.__multipliers__.tolist()
+        self.__positions_list__   = self.__positions__.tolist()
+        self.__choose_list__      = self.__choose__.tolist()
+
+    def __configuration_key__(self, configuration):
+        key = 0
+        for shape in configuration:
+            key = key * self.__code_base__ + self.__shape_code__(shape)
+        return key
+
+    def __shape_code__(self, shape):
+        code = 0
+        for m in shape:
+            code = code * 8 + m
+        return code
+
+    @classmethod
+    def lookup(cls, stage):
+        '''
+        Get the indexer of a stage. The indexers are created at the first lookup.
+
+        :param stage: One of Stage.firstStage, Stage.secondStage, Stage.thirdStage and Stage.fourthStage
+        :return: The indexer of the stage
+        '''
+        if stage not in cls.StagePublicCards:
+            raise ValueError("%s is an invalid stage" % (str(stage)))
+        if stage not in cls.__indexers__:
+            num_public_cards = cls.StagePublicCards[stage]
+            if num_public_cards == 0:
+                cls.__indexers__[stage] = HandIndexer([2])
+            else:
+                cls.__indexers__[stage] = HandIndexer([2, num_public_cards])
+        return cls.__indexers__[stage]
+
+    def __get_size__(self):
+        return self.__size__
+    size = property(__get_size__, doc="The number of the indices. For example, the size of the firstStage indexer is 169")
+
+    def __get_cards_per_round__(self):
+        return self.__cards_per_round__
+    cards_per_round = property(__get_cards_per_round__, doc="The number of the cards in every round. For example, cards_per_round = (2, 3) for the secondStage")
+
+    def index(self, hand_cards, public_cards = ()):
+        '''
+        Index one hand with python ints, the same as index_batch but much faster for one hand
+
+        :param hand_cards: The two hand cards
+        :param public_cards: The public cards
+        :return: The index of the hand
+        '''
+        cards = [c.index for c in hand_cards] + [c.index for c in public_cards]
+        if len(cards) != self.__num_cards__:
+            raise ValueError("HandIndexer.index needs %d cards, but %d cards are given" % (self.__num_cards__, len(cards)))
+
+        ## the index and the shape code of every suit, the same as index_batch
+        used       = [0, 0, 0, 0]
+        suit_index = [0, 0, 0, 0]
+        code       = [0, 0, 0, 0]
+        column     = 0
+        for r in range(self.__num_rounds__):
+            masks = [0, 0, 0, 0]
+            for i in range(self.__cards_per_round__[r]):
+                card            = cards[column]
+                masks[card & 3] |= 1 << (card >> 2)
+                column         += 1
+            for s in range(4):
+                mask          = masks[s]
+                num           = PopCountList[mask]
+                suit_index[s] = suit_index[s] * SmallChooseList[13 - PopCountList[used[s]]][num] + self.__colex_int__(mask, used[s])
+                code[s]       = code[s] * 8 + num
+                used[s]      |= mask
+        if sum([PopCountList[u] for u in used]) != self.__num_cards__:
+            raise ValueError("HandIndexer.index needs different cards")
+
+        composite     = sorted([(code[s] << 32) | suit_index[s] for s in range(4)], reverse = True)
+        key           = 0
+        for j in range(4):
+            key = key * self.__code_base__ + (composite[j] >> 32)
+        configuration = bisect.bisect_left(self.__keys_list__, key)
+
+        positions   = self.__positions_list__[configuration]
+        multipliers = self.__multipliers_list__[configuration]
+        result      = self.__offsets_list__[configuration]
+        for j in range(4):
+            result += multipliers[j] * self.__choose_list__[(composite[j] & 0xFFFFFFFF) + positions[j] - 1][positions[j]]
+        return result
+
+    def unindex(self, index):
+        '''
+        :param index: The index of a hand
+        :return: (hand_cards, public_cards), the canonical hand w.r.t the index
+        '''
+        cards = [PokerCard.lookup_by_index(int(c)) for c in self.unindex_batch(np.array([index], dtype = np.int64))[0]]
+        return cards[0:self.__cards_per_round__[0]], cards[self.__cards_per_round__[0]:]
+
+    def index_batch(self, cards):
+        '''
+        Index a batch of hands with vectorized numpy operations
+
+        :param cards: An integer array with the shape [N, num_cards] of the canonical card indices (PokerCard.index). Every row contains the hand cards followed by the public cards
+        :return: An int64 array with the shape [N]
+        '''
+        cards = np.asarray(cards, dtype = np.int64)
+        if cards.ndim != 2 or cards.shape[1] != self.__num_cards__:
+            raise ValueError("HandIndexer.index_batch needs an array with the shape [N, %d], but the shape is %s" % (self.__num_cards__, str(cards.shape)))
+        num_rows = cards.shape[0]
+        rows     = np.arange(num_rows)
+
+        ## masks[n, s, r] is the ranks of the suit s in the round r
+        masks  = np.zeros((num_rows, 4, self.__num_rounds__), dtype = np.int64)
+        column = 0
+        for r in range(self.__num_rounds__):
+            for i in range(self.__cards_per_round__[r]):
+                card = cards[:, column]
+                masks[rows, card & 3, r] |= np.left_shift(1, card >> 2)
+                column += 1
+
+        ## the index of every suit w.r.t its shape
+        used        = np.zeros((num_rows, 4), dtype = np.int64)
+        suit_index  = np.zeros((num_rows, 4), dtype = np.int64)
+        code        = np.zeros((num_rows, 4), dtype = np.int64)
+        for r in range(self.__num_rounds__):
+            mask       = masks[:, :, r]
+            num        = PopCount[mask]
+            remaining  = 13 - PopCount[used]
+            suit_index = suit_index * SmallChoose[remaining, num] + self.__colex__(mask, used)
+            code       = code * 8 + num
+            used      |= mask
+        if (PopCount[used].sum(axis = 1) != self.__num_cards__).any():
+            raise ValueError("HandIndexer.index_batch needs different cards in every row")
+
+        ## sort the suits by their shapes and their indices, so that the isomorphic hands become the same
+        composite   = np.sort((code << 32) | suit_index, axis = 1)[:, ::-1]
+        code        = composite >> 32
+        suit_index  = composite & 0xFFFFFFFF
+        keys        = np.zeros(num_rows, dtype = np.int64)
+        for j in range(4):
+            keys = keys * self.__code_base__ + code[:, j]
+        configuration = np.searchsorted(self.__keys__, keys)
+
+        positions = self.__positions__[configuration]
+        result    = self.__offsets__[configuration].copy()
+        for j in range(4):
+            result += self.__multipliers__[configuration, j] * self.__choose__[suit_index[:, j] + positions[:, j] - 1, positions[:, j]]
+        return result
+
+    def unindex_batch(self, indices):
+        '''
+        Map a batch of indices back to the canonical hands with vectorized numpy operations
+
+        :param indices: An integer array with the shape [N]
+        :return: An int64 array with the shape [N, num_cards] of the canonical card indices. Every row contains the hand cards followed by the public cards, sorted within every round
+        '''
+        indices = np.asarray(indices, dtype = np.int64)
+        if indices.ndim != 1 or (indices < 0).any() or (indices >= self.__size__).any():
+            raise ValueError("HandIndexer.unindex_batch needs an array with the shape [N] and 0 <= index < %d" % (self.__size__))
+        num_rows      = indices.shape[0]
+        configuration = np.searchsorted(self.__offsets__, indices, side = "right") - 1
+        remainder     = indices - self.__offsets__[configuration]
+        positions     = self.__positions__[configuration]
+
+        ## the colex index of every group is shared by its suits, and every suit takes the largest remaining element of the multiset
+        cards  = np.zeros((num_rows, self.__num_cards__), dtype = np.int64)
+        filled = np.zeros((num_rows, self.__num_rounds__), dtype = np.int64)
+        group  = np.zeros(num_rows, dtype = np.int64)
+        for j in range(4):
+            position   = positions[:, j]
+            if j == 0:
+                start = np.ones(num_rows, dtype = bool)
+            else:
+                start = position >= positions[:, j - 1]
+            group      = np.where(start, (remainder // self.__multipliers__[configuration, j]) % self.__radices__[configuration, j], group)
+            element    = np.zeros(num_rows, dtype = np.int64)
+            for i in range(1, 5):
+                rows = position == i
+                if rows.any():
+                    element[rows] = np.searchsorted(self.__choose__[:, i], group[rows], side = "right") - 1
+            group      = group - self.__choose__[element, position]
+            suit_index = element - position + 1
+            self.__unrank_suit__(suit_index, self.__shapes__[configuration, j], j, cards, filled)
+
+        ## sort the cards within every round
+        column = 0
+        for r in range(self.__num_rounds__):
+            n = self.__cards_per_round__[r]
+            cards[:, column:column + n] = np.sort(cards[:, column:column + n], axis = 1)
+            column += n
+        return cards
+
+    def __colex_int__(self, mask, used):
+        ## __colex__ for one mask
+        result = 0
+        k      = 0
+        while mask != 0:
+            low      = mask & -mask
+            p        = low.bit_length() - 1
+            k       += 1
+            result  += SmallChooseList[p - PopCountList[used & (low - 1)]][k]
+            mask    ^= low
+        return result
+
+    def __colex__(self, mask, used):
+        ## the colex index of the mask among the ranks out of used
+        result = np.zeros(mask.shape, dtype = np.int64)
+        k      = np.zeros(mask.shape, dtype = np.int64)
+        for p in range(13):
+            bit      = (mask >> p) & 1
+            position = p - PopCount[used & ((1 << p) - 1)]
+            result  += bit * SmallChoose[np.maximum(position, 0), np.minimum(k + 1, 13)]
+            k       += bit
+        return result
+
+    def __unrank_suit__(self, suit_index, shape, suit, cards, filled):
+        num_rows = suit_index.shape[0]
+        rows     = np.arange(num_rows)
+
+        ## the radix of every round
+        used_num = np.zeros(num_rows, dtype = np.int64)
+        radices  = []
+        for r in range(self.__num_rounds__):
+            radices.append(SmallChoose[13 - used_num, shape[:, r]])
+            used_num = used_num + shape[:, r]
+        digits = [None] * self.__num_rounds__
+        for r in range(self.__num_rounds__ - 1, -1, -1):
+            digits[r]  = suit_index % radices[r]
+            suit_index = suit_index // radices[r]
+
+        used   = np.zeros(num_rows, dtype = np.int64)
+        offset = 0
+        for r in range(self.__num_rounds__):
+            ## the positions among the remaining ranks, decoded from the largest one
+            digit = digits[r]
+            mask  = np.zeros(num_rows, dtype = np.int64)
+            for k in range(5, 0, -1):
+                rows_k = shape[:, r] >= k
+                if not rows_k.any():
+                    continue
+                position = (SmallChoose[0:13, k][np.newaxis, :] <= digit[:, np.newaxis]).sum(axis = 1) - 1
+                position = np.where(rows_k, position, 0)
+                digit    = np.where(rows_k, digit - SmallChoose[position, k], digit)
+                ## the position-th rank out of used
+                rank     = np.zeros(num_rows, dtype = np.int64)
+                seen     = np.zeros(num_rows, dtype = np.int64)
+                found    = np.zeros(num_rows, dtype = bool)
+                for p in range(13):
+                    free  = ((used >> p) & 1) == 0
+                    hit   = free & (seen == position) & ~found
+                    rank  = np.where(hit, p, rank)
+                    found = found | hit
+                    seen  = seen + free
+                mask = np.where(rows_k, mask | np.left_shift(1, rank), mask)
+                column = offset + filled[:, r]
+                cards[rows[rows_k], column[rows_k]] = rank[rows_k] * 4 + suit
+                filled[rows_k, r] += 1
+            used   = used | mask
+            offset = offset + self.__cards_per_round__[r]
@@ -0,0 +1,218 @@
+#!/bin/python
+#coding:utf-8
+import random
+import collections.abc
+
+from roomai.games.texasholdem.TexasHoldemAction import TexasHoldemAction
+from roomai.games.texasholdem.TexasHoldemAction import IdOptions
+
+
+class TexasHoldemLegalActions(collections.abc.Mapping):
+    '''
+    The valid actions of a player in the betting, returned by TexasHoldemEnv.available_actions.\n
+    The raises are described by a range (raise_min, raise_max, raise_step) instead of one action per price, so the object is built in O(1)
+    and the membership tests, the lookups and the random sampling are O(1) too. It is a read-only mapping from the keys to the actions,
+    whose items are Fold, Check, Call, the raises in the increasing order of their prices and Allin, and the dict of them is only built by to_dict.\n
+    With a bet abstraction (see the param_bet_abstraction of TexasHoldemEnv.init), the raises are only the few prices in raise_prices, and nearest maps the other raises to them.\n
+    Examples of usages:\n
+    >> actions = person_state.available_actions\n
+    >> "Raise_40" in actions\n
+    True\n
+    >> (actions.raise_min, actions.raise_max, actions.raise_step)\n
+    (40, 980, 20)\n
+    >> action = actions.sample()\n
+    >> actions.ids()\n
+    [0, 59, 120, 180, ..., 2940, 3001]\n
+    '''
+    __slots__ = ("__check_able__", "__call_price__", "__raise_min__", "__raise_step__", "__num_raises__", "__allin_price__", "__raise_prices__", "__raise_set__", "__num_heads__", "__actions__")
+
+    def __init__(self, check_able, call_price, raise_min, raise_step, num_raises, allin_price, raise_prices = None):
+        self.__check_able__  = check_able
+        self.__call_price__  = call_price
+        ## the raise range of the game, and the prices of the bet abstraction in it
+        self.__raise_min__   = raise_min
+        self.__raise_step__  = raise_step
+        self.__num_raises__  = num_raises
+        self.__allin_price__ = allin_price
+        self.__raise_prices__ = None if raise_prices is None else tuple(raise_prices)
+        self.__raise_set__    = None if raise_prices is None else frozenset(raise_prices)
+        ## Fold, Check and Call come before the raises
+        self.__num_heads__   = 1 + (1 if check_able else 0) + (0 if call_price is None else 1)
+        self.__actions__     = None
+
+    def __get_check_able__(self):   return self.__check_able__
+    check_able = property(__get_check_able__, doc = "Whether the player can take the Check action")
+
+    def __get_call_price__(self):   return self.__call_price__
+    call_price = property(__get_call_price__, doc = "The price of the Call action, or None if the player can't take the Call action")
+
+    def __get_raise_min__(self):
+        if self.num_raises == 0:    return None
+        if self.__raise_prices__ is not None:   return self.__raise_prices__[0]
+        return self.__raise_min__
+    raise_min = property(__get_raise_min__, doc = "The lowest price of the Raise actions, or None if the player can't raise")
+
+    def __get_raise_max__(self):
+        if self.num_raises == 0:    return None
+        if self.__raise_prices__ is not None:   return self.__raise_prices__[-1]
+        return self.__raise_min__ + self.__raise_step__ * (self.__num_raises__ - 1)
+    raise_max = property(__get_raise_max__, doc = "The highest price of the Raise actions, or None if the player can't raise")
+
+    def __get_raise_step__(self):
+        if self.num_raises == 0:    return None
+        return self.__raise_step__
+    raise_step = property(__get_raise_step__, doc = "The step between the legal prices of the Raise actions, which is the raise account, or None if the player can't raise")
+
+    def __get_num_raises__(self):
+        if self.__raise_prices__ is not None:   return len(self.__raise_prices__)
+        return self.__num_raises__
+    num_raises = property(__get_num_raises__, doc = "The number of the Raise actions")
+
+    def __get_raise_prices__(self):  return self.__raise_prices__
+    raise_prices = property(__get_raise_prices__, doc = "The prices of the Raise actions in the bet abstraction, or None without the bet abstraction. For example, raise_prices = (20, 40, 70)")
+
+    def __get_allin_price__(self):  return self.__allin_price__
+    allin_price = property(__get_allin_price__, doc = "The price of the Allin action, which is the chips of the player")
+
+    def contains(self, option, price):
+        '''
+        :param option: The option of the action, for example TexasHoldemAction.Raise
+        :param price: The price of the action
+        :return: Whether the action with the option and the price is valid
+        '''
+        if option == TexasHoldemAction.Raise:
+            if self.__raise_set__ is not None:
+                return price in self.__raise_set__
+            offset = price - self.__raise_min__
+            return self.__num_raises__ > 0 and offset >= 0 and offset % self.__raise_step__ == 0 and offset // self.__raise_step__ < self.__num_raises__
+        elif option == TexasHoldemAction.Call:
+            return self.__call_price__ is not None and price == self.__call_price__
+        elif option == TexasHoldemAction.AllIn:
+            return price == self.__allin_price__
+        elif option == TexasHoldemAction.Fold:
+            return price == 0
+        elif option == TexasHoldemAction.Check:
+            return self.__check_able__ and price == 0
+        return False
+
+    def action_at(self, index):
+        '''
+        :param index: The position of the action in this mapping, 0 <= index < len(self)
+        :return: The action at the position
+        '''
+        if index < 0 or index >= len(self):
+            raise IndexError("The index %d is out of the range of the %d valid actions" % (index, len(self)))
+        if index < self.__num_heads__:
+            if index == 0:
+                return TexasHoldemAction.lookup_by_option_price(TexasHoldemAction.Fold, 0)
+            if index == 1 and self.__check_able__:
+                return TexasHoldemAction.lookup_by_option_price(TexasHoldemAction.Check, 0)
+            return TexasHoldemAction.lookup_by_option_price(TexasHoldemAction.Call, self.__call_price__)
+        index -= self.__num_heads__
+        if self.__raise_prices__ is not None:
+            if index < len(self.__raise_prices__):
+                return TexasHoldemAction.lookup_by_option_price(TexasHoldemAction.Raise, self.__raise_prices__[index])
+        elif index < self.__num_raises__:
+            return TexasHoldemAction.lookup_by_option_price(TexasHoldemAction.Raise, self.__raise_min__ + self.__raise_step__ * index)
+        return TexasHoldemAction.lookup_by_option_price(TexasHoldemAction.AllIn, self.__allin_price__)
+
+    def nearest(self, action):
+        '''
+        Map a raise of the game out of the bet abstraction to the available Raise or Allin action with the nearest price, and the lower one for a tie
+
+        :param action: The action
+        :return: The nearest available action, or None if the action isn't a raise between the min-raise and the allin
+        '''
+        if action.option != TexasHoldemAction.Raise or self.__num_raises__ == 0:
+            return None
+        if action.price < self.__raise_min__ or action.price >= self.__allin_price__:
+            return None
+        if self.__raise_set__ is None or action.price in self.__raise_set__:
+            return action if self.contains(action.option, action.price) else None
+        nearest = None
+        for price in self.__raise_prices__ + (self.__allin_price__,):
+            if nearest is None or abs(price - action.price) < abs(nearest - action.price):
+                nearest = price
+        if nearest == self.__allin_price__:
+            return TexasHoldemAction.lookup_by_option_price(TexasHoldemAction.AllIn, nearest)
+        return TexasHoldemAction.lookup_by_option_price(TexasHoldemAction.Raise, nearest)
+
+    def ids(self):
+        '''
+        :return: The ids of the valid actions in the order of this mapping, see TexasHoldemAction.id
+        '''
+        return [self.action_at(i).id for i in range(len(self))]
+
+    def contains_id(self, action_id):
+        '''
+        :param action_id: The id of an action, see TexasHoldemAction.id
+        :return: Whether the action with the id is valid
+        '''
+        if action_id < 2:
+            return action_id >= 0 and self.contains(IdOptions[action_id], 0)
+        return self.contains(IdOptions[(action_id - 2) % 3 + 2], (action_id - 2) // 3 + 1)
+
+    def sample(self, rng = random):
+        '''
+        Sample a valid action uniformly
+
+        :param rng: The random generator with the random function, the random module by default
+        :return: The sampled action
+        '''
+        return self.action_at(int(rng.random() * len(self)))
+
+    def to_dict(self):
+        '''
+        :return: A new dict(action_key, action) containing all valid actions
+        '''
+        if self.__actions__ is None:
+            self.__actions__ = dict([(action.key, action) for action in self.values()])
+        return dict(self.__actions__)
+
+    def __parse__(self, key):
+        option, sep, price = key.partition("_")
+        if sep == "" or price.isdigit() == False or str(int(price)) != price:
+            return None
+        if self.contains(option, int(price)) == False:
+            return None
+        return option, int(price)
+
+    def __contains__(self, key):
+        if isinstance(key, TexasHoldemAction):
+            return self.contains(key.option, key.price)
+        if isinstance(key, int):
+            return self.contains_id(key)
+        return isinstance(key, str) and self.__parse__(key) is not None
+
+    def __getitem__(self, key):
+        if isinstance(key, str) and self.__parse__(key) is not None:
+            return TexasHoldemAction.lookup(key)
+        raise KeyError(key)
+
+    def __len__(self):
+        return self.__num_heads__ + self.num_raises + 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.action_at(i).key
+
+    def values(self):
+        return [self.action_at(i) for i in range(len(self))]
+
+    def __eq__(self, other):
+        if isinstance(other, TexasHoldemLegalActions):
+            return (self.__check_able__, self.__call_price__, self.raise_min, self.raise_step, self.__num_raises__, self.__allin_price__, self.__raise_prices__) == \
+                   (other.__check_able__, other.__call_price__, other.raise_min, other.raise_step, other.__num_raises__, other.__allin_price__, other.__raise_prices__)
+        return collections.abc.Mapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "TexasHoldemLegalActions(%s)" % (", ".join(self.keys()))
+
+    def __deepcopy__(self, memodict={}):
+        ## the valid actions are immutable
+        return self
@@ -0,0 +1,155 @@
+#!/bin/python
+#coding:utf-8
+import bisect
+
+
+class TexasHoldemPot(object):
+    '''
+    The main pot and the side pots of TexasHoldem, updated by the environment as the bets happen.\n
+    Every all-in bet closes a pot at its level. The pot k collects the chips of every player between the levels lower_bound(k) and upper_bound(k),
+    and the players who haven't folded and bet more than lower_bound(k) are eligible to win it.\n
+    Examples of usages:\n
+    >> pot = public_state.pot\n
+    >> pot.total\n
+    300\n
+    >> pot.amounts\n
+    (150, 150)\n
+    >> pot_odds = 1.0 * call_price / (pot.total + call_price)\n
+    '''
+
+    def __init__(self, num_players):
+        self.__bets__    = [0 for i in range(num_players)]
+        self.__levels__  = []
+        self.__amounts__ = [0]
+        self.__total__   = 0
+
+    def __get_total__(self):    return self.__total__
+    total = property(__get_total__, doc = "The number of the chips in all pots")
+
+    def __get_amounts__(self):  return tuple(self.__amounts__)
+    amounts = property(__get_amounts__, doc = "The numbers of the chips in the pots. The first item is the main pot, and the others are the side pots. For example, amounts = (150, 40)")
+
+    def __get_num_pots__(self): return len(self.__amounts__)
+    num_pots = property(__get_num_pots__, doc = "The number of the pots, including the main pot")
+
+    def lower_bound(self, k):
+        '''
+        :param k: The id of the pot, 0 for the main pot
+        :return: The bet level from which the pot k collects chips
+        '''
+        if k == 0:
+            return 0
+        return self.__levels__[k - 1]
+
+    def upper_bound(self, k):
+        '''
+        :param k: The id of the pot, 0 for the main pot
+        :return: The bet level up to which the pot k collects chips, or None if the pot is still open
+        '''
+        if k == len(self.__levels__):
+            return None
+        return self.__levels__[k]
+
+    def eligible_players(self, k, is_fold):
+        '''
+        :param k: The id of the pot, 0 for the main pot
+        :param is_fold: The fold flags of the players, for example TexasHoldemStatePublic.is_fold
+        :return: The ids of the players who are eligible to win the pot k
+        '''
+        lower = self.lower_bound(k)
+        return [p for p in range(len(self.__bets__)) if is_fold[p] == False and self.__bets__[p] > lower]
+
+    def add(self, player_id, chips):
+        '''
+        Put the chips of the player into the pots
+
+        :param player_id: The id of the player
+        :param chips: The number of the chips
+        '''
+        begin = self.__bets__[player_id]
+        end   = begin + chips
+        k     = bisect.bisect_right(self.__levels__, begin)
+        while k < len(self.__amounts__):
+            lower = self.lower_bound(k)
+            upper = self.upper_bound(k)
+            if upper is None or end < upper:
+                self.__amounts__[k] += end - max(begin, lower)
+                break
+            self.__amounts__[k] += upper - max(begin, lower)
+            k += 1
+        self.__bets__[player_id] = end
+        self.__total__          += chips
+
+    def close(self, level):
+        '''
+        Close the pot at the level of an all-in bet, and the chips above the level go to a new side pot
+
+        :param level: The bet level of the all-in player
+        '''
+        if level <= 0 or level in self.__levels__:
+            return
+        k     = bisect.bisect_left(self.__levels__, level)
+        lower = self.lower_bound(k)
+        below = 0
+        for bet in self.__bets__:
+            below += min(max(0, bet - lower), level - lower)
+        self.__levels__.insert(k, level)
+        self.__amounts__.insert(k + 1, self.__amounts__[k] - below)
+        self.__amounts__[k] = below
+
+    def distribute(self, ranks, dealer_id):
+        '''
+        Distribute the pots to the winners in one pass over the ranked players.
+        A pot split by several winners gives every winner the same integer share,
+        and the odd chips go to the winners in the order of their seats after the dealer.
+
+        :param ranks: The hand strengths of the players, and None for the players who have folded
+        :param dealer_id: The id of the dealer
+        :return: The chips won by the players
+        '''
+        num_players = len(self.__bets__)
+        winnings    = [0 for i in range(num_players)]
+        ## players in seat order after the dealer, so the stable sort keeps this order for the players with the same rank
+        seats       = [(dealer_id + 1 + i) % num_players for i in range(num_players)]
+        ranked      = sorted([p for p in seats if ranks[p] is not None], key = lambda p: ranks[p], reverse = True)
+
+        next_pot = 0
+        start    = 0
+        while start < len(ranked) and next_pot < len(self.__amounts__):
+            end = start
+            while end < len(ranked) and ranks[ranked[end]] == ranks[ranked[start]]:
+                end += 1
+            group = ranked[start:end]
+            start = end
+
+            ## the eligible pots of a player are always the first ones, so the pots won by a group follow the pots won by the better groups
+            while next_pot < len(self.__amounts__):
+                lower   = self.lower_bound(next_pot)
+                winners = [p for p in group if self.__bets__[p] > lower]
+                if len(winners) == 0:
+                    break
+                amount = self.__amounts__[next_pot]
+                share  = amount // len(winners)
+                for i in range(len(winners)):
+                    winnings[winners[i]] += share
+                for i in range(int(round(amount - share * len(winners)))):
+                    winnings[winners[i % len(winners)]] += 1
+                next_pot += 1
+
+        ## the chips nobody is eligible to win go back to the players who put them in
+        while next_pot < len(self.__amounts__):
+            lower = self.lower_bound(next_pot)
+            upper = self.upper_bound(next_pot)
+            for p in range(num_players):
+                winnings[p] += max(0, (self.__bets__[p] if upper is None else min(self.__bets__[p], upper)) - lower)
+            next_pot += 1
+        return winnings
+
+    def __deepcopy__(self, memodict={}, newinstance = None):
+        if newinstance is None:
+            newinstance = TexasHoldemPot(0)
+        newinstance.__bets__    = list(self.__bets__)
+        newinstance.__levels__  = list(self.__levels__)
+        newinstance.__amounts__ = list(self.__amounts__)
+        newinstance.__total__   = self.__total__
+        return newinstance
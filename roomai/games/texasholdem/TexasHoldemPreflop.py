@@ -0,0 +1,151 @@
+#!/bin/python
+#coding:utf-8
+import os
+import multiprocessing
+
+import numpy as np
+
+import roomai
+from roomai.games.texasholdem.TexasHoldemUtil      import PokerCard
+from roomai.games.texasholdem.TexasHoldemUtil      import point_rank_to_str
+from roomai.games.texasholdem.TexasHoldemEvaluator import HandEvaluator
+
+
+MaxOpponents = 5
+
+
+def __preflop_shard__(args):
+    hand_index, num_samples, seed_sequence = args
+    rng      = np.random.default_rng(seed_sequence)
+    hand     = PreflopEquityTable.hand_cards(hand_index)
+    hand_idx = [c.index for c in hand]
+    deck     = np.array([idx for idx in range(52) if idx not in hand_idx], dtype = np.int64)
+
+    equities = np.zeros(MaxOpponents)
+    for num_opponents in range(1, MaxOpponents + 1):
+        num     = 2 * num_opponents + 5
+        chosen  = deck[np.argsort(rng.random((num_samples, len(deck))), axis = 1)[:, 0:num]]
+        board   = chosen[:, 2 * num_opponents:]
+        hero    = HandEvaluator.evaluate_batch(np.concatenate([np.tile(np.array(hand_idx, dtype = np.int64), (num_samples, 1)), board], axis = 1))
+        best    = hero.copy()
+        ties    = np.ones(num_samples)
+        for i in range(num_opponents):
+            villain = HandEvaluator.evaluate_batch(np.concatenate([chosen[:, 2 * i: 2 * i + 2], board], axis = 1))
+            ties    = np.where(villain > best, 1, np.where(villain == best, ties + 1, ties))
+            best    = np.maximum(best, villain)
+        equities[num_opponents - 1] = np.where(hero == best, 1.0 / ties, 0.0).sum()
+    return equities
+
+
+class PreflopEquityTable(object):
+    '''
+    The precomputed preflop equities of the 169 strategically distinct starting hands against 1-5 random opponents.\n
+    The table is generated once by tool/texasholdem_gen_preflop_equity.py, and loaded as a read-only memory map,
+    so the worker processes on a machine share one copy of its pages.\n
+    Examples of usages:\n
+    >> import roomai.games.texasholdem\n
+    >> hand = [roomai.games.texasholdem.PokerCard.lookup("A_Spade"), roomai.games.texasholdem.PokerCard.lookup("K_Spade")]\n
+    >> roomai.games.texasholdem.PreflopEquityTable.lookup(hand, 1)\n
+    0.67...\n
+    '''
+
+    default_path   = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preflop_equity.npy")
+    __table__      = None
+    __table_path__ = None
+
+    @classmethod
+    def load(cls, path = None):
+        '''
+        Memory-map the table. The lookup function loads the default table automatically.
+
+        :param path: The path of the table. The default is PreflopEquityTable.default_path
+        :return: A read-only float32 array with the shape [169, 5], the item [i, k-1] is the equity of the hand i against k random opponents
+        '''
+        if path is None:
+            path = cls.default_path
+        if cls.__table__ is None or cls.__table_path__ != path:
+            if not os.path.exists(path):
+                raise IOError("The preflop equity table %s doesn't exist. Please generate it with tool/texasholdem_gen_preflop_equity.py" % (path))
+            table = np.load(path, mmap_mode = "r")
+            if table.shape != (169, MaxOpponents):
+                raise ValueError("The preflop equity table %s has the shape %s, not (169, %d)" % (path, str(table.shape), MaxOpponents))
+            cls.__table__      = table
+            cls.__table_path__ = path
+        return cls.__table__
+
+    @classmethod
+    def lookup(cls, hand_cards, num_opponents):
+        '''
+        :param hand_cards: Two PokerCards
+        :param num_opponents: The number of the random opponents, 1 <= num_opponents <= 5
+        :return: The preflop equity of the hand cards
+        '''
+        if num_opponents < 1 or num_opponents > MaxOpponents:
+            raise ValueError("num_opponents must be in [1, %d], but it is %d" % (MaxOpponents, num_opponents))
+        table = cls.__table__
+        if table is None:
+            table = cls.load()
+        return float(table[cls.hand_index(hand_cards), num_opponents - 1])
+
+    @classmethod
+    def hand_index(cls, hand_cards):
+        '''
+        The index of the starting hand in the 13x13 grid. The pairs are on the diagonal, the suited hands above it and the offsuit hands below it.
+
+        :param hand_cards: Two PokerCards
+        :return: The index of the starting hand, 0 <= index < 169
+        '''
+        c0, c1 = hand_cards
+        high   = max(c0.point_rank, c1.point_rank)
+        low    = min(c0.point_rank, c1.point_rank)
+        if c0.suit_rank == c1.suit_rank:
+            return (12 - high) * 13 + (12 - low)
+        return (12 - low) * 13 + (12 - high)
+
+    @classmethod
+    def hand_name(cls, hand_index):
+        '''
+        :param hand_index: The index of the starting hand
+        :return: The name of the starting hand, for example "AA", "AKs" or "72o"
+        '''
+        row, col = divmod(hand_index, 13)
+        if row == col:
+            return point_rank_to_str[12 - row] * 2
+        if row < col:
+            return point_rank_to_str[12 - row] + point_rank_to_str[12 - col] + "s"
+        return point_rank_to_str[12 - col] + point_rank_to_str[12 - row] + "o"
+
+    @classmethod
+    def hand_cards(cls, hand_index):
+        '''
+        :param hand_index: The index of the starting hand
+        :return: Two PokerCards representing the starting hand
+        '''
+        row, col = divmod(hand_index, 13)
+        if row < col:
+            return [PokerCard.lookup_by_index((12 - row) * 4), PokerCard.lookup_by_index((12 - col) * 4)]
+        return [PokerCard.lookup_by_index((12 - col) * 4), PokerCard.lookup_by_index((12 - row) * 4 + 1)]
+
+    @classmethod
+    def generate(cls, num_samples = 100000, seed = None, num_processes = 1):
+        '''
+        Estimate the table by Monte Carlo. Every starting hand has its own seed derived from the seed, so the table doesn't depend on the number of processes.
+
+        :param num_samples: The number of Monte Carlo samples for every starting hand and every number of opponents
+        :param seed: The seed
+        :param num_processes: The number of processes
+        :return: A float32 array with the shape [169, 5]
+        '''
+        seeds = np.random.SeedSequence(seed).spawn(169)
+        tasks = [(i, num_samples, seeds[i]) for i in range(169)]
+        if num_processes > 1:
+            HandEvaluator.load_tables()
+            pool = multiprocessing.Pool(num_processes)
+            try:
+                equities = pool.map(__preflop_shard__, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            equities = [__preflop_shard__(task) for task in tasks]
+        return (np.array(equities) / num_samples).astype(np.float32)
@@ -1,23 +1,35 @@
 #!/bin/python
 #coding:utf-8
 import roomai.games.common
+from roomai.games.texasholdem.TexasHoldemUtil import PokerCard
 
 
 class TexasHoldemStatePerson(roomai.games.common.AbstractStatePerson):
+    __slots__ = ("__hand_cards__",)
 
     def __init__(self):
         super(TexasHoldemStatePerson, self).__init__()
-        self.__hand_cards__  =    []
+        self.__hand_cards__  =    ()
 
     def __get_hand_cards__(self):   return tuple(self.__hand_cards__)
     hand_cards = property(__get_hand_cards__, doc="The hand cards of the corresponding player. It contains two poker cards. For example, hand_cards=[roomai.coomon.PokerCard.lookup(\"A_Spade\"),roomai.coomon.PokerCard.lookup(\"A_Heart\")]")
 
+    def __get_hand_cards_mask__(self):  return PokerCard.cards_to_mask(self.__hand_cards__)
+    hand_cards_mask = property(__get_hand_cards_mask__, doc="The 52-bit mask of the hand cards")
+
+    def __clone__(self):
+        ## a snapshot sharing all fields with this person state, see TexasHoldemStatePublic.__clone__
+        newinstance = TexasHoldemStatePerson.__new__(TexasHoldemStatePerson)
+        for name in TexasHoldemStatePerson.__fields__:
+            setattr(newinstance, name, getattr(self, name))
+        return newinstance
+
     def __deepcopy__(self, memodict={}, newinstance = None):
         if newinstance is None:
             newinstance    = TexasHoldemStatePerson()
         newinstance = super(TexasHoldemStatePerson, self).__deepcopy__(newinstance=newinstance)
-        newinstance.__hand_cards__ = list(self.hand_cards)
+        newinstance.__hand_cards__ = self.hand_cards
         return  newinstance
 
-
-
+## all slots of the person state, see TexasHoldemStatePerson.__clone__
+TexasHoldemStatePerson.__fields__ = roomai.games.common.AbstractStatePerson.__slots__ + TexasHoldemStatePerson.__slots__
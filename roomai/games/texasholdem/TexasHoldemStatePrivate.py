@@ -1,6 +1,7 @@
 #!/bin/python
 #coding:utf-8
 import roomai.games.common
+from roomai.games.texasholdem.TexasHoldemUtil import PokerCard
 
 
 class TexasHoldemStatePrivate(roomai.games.common.AbstractStatePrivate):
@@ -8,10 +9,14 @@ class TexasHoldemStatePrivate(roomai.games.common.AbstractStatePrivate):
     '''
     The private state of TexasHoldem
     '''
+    __slots__ = ("__keep_cards__", "__all_used_cards__", "__all_used_cards_mask__", "__deck__")
+
     def __init__(self):
         super(TexasHoldemStatePrivate, self).__init__()
-        self.__keep_cards__ = []
-        self.__all_used_cards__ = []
+        self.__keep_cards__ = ()
+        self.__all_used_cards__ = ()
+        self.__all_used_cards_mask__ = 0
+        self.__deck__ = ()
 
 
     def __get_keep_cards__(self):   return tuple(self.__keep_cards__)
@@ -20,11 +25,32 @@ class TexasHoldemStatePrivate(roomai.games.common.AbstractStatePrivate):
     def __get_all_used_cards__(self):   return tuple(self.__all_used_cards__)
     all_used_cards = property(__get_all_used_cards__, doc="all used cards.")
 
+    def __get_keep_cards_mask__(self):  return PokerCard.cards_to_mask(self.__keep_cards__)
+    keep_cards_mask = property(__get_keep_cards_mask__, doc="The 52-bit mask of the keep cards.")
+
+    def __get_all_used_cards_mask__(self):  return self.__all_used_cards_mask__
+    all_used_cards_mask = property(__get_all_used_cards_mask__, doc="The 52-bit mask of all used cards. The cards out of the mask are still in the deck.")
+
+    def __get_deck__(self):  return self.__deck__
+    deck = property(__get_deck__, doc="The canonical indices of the 52 cards in the order of the deck shuffled for the hand. The first len(all_used_cards) cards are the used cards, and the next card is dealt next.")
+
+
+    def __clone__(self):
+        ## a snapshot sharing all fields with this private state, see TexasHoldemStatePublic.__clone__
+        newinstance = TexasHoldemStatePrivate.__new__(TexasHoldemStatePrivate)
+        for name in TexasHoldemStatePrivate.__fields__:
+            setattr(newinstance, name, getattr(self, name))
+        return newinstance
 
     def __deepcopy__(self, memodict={}, newinstance = None):
         if newinstance is None:
             newinstance = TexasHoldemStatePrivate()
 
-        newinstance.__keep_cards__ = [self.keep_cards[i] for i in range(len(self.keep_cards))]
-        newinstance.__all_used_cards__ = [self.all_used_cards[i] for i in range(len(self.all_used_cards))]
-        return newinstance
\ No newline at end of file
+        newinstance.__keep_cards__ = self.keep_cards
+        newinstance.__all_used_cards__ = self.all_used_cards
+        newinstance.__all_used_cards_mask__ = self.__all_used_cards_mask__
+        newinstance.__deck__ = self.__deck__
+        return newinstance
+
+## all slots of the private state, see TexasHoldemStatePrivate.__clone__
+TexasHoldemStatePrivate.__fields__ = roomai.games.common.AbstractStatePrivate.__slots__ + TexasHoldemStatePrivate.__slots__
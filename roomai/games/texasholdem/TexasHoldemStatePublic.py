@@ -1,12 +1,28 @@
 #!/bin/python
 #coding:utf-8
+import numpy as np
+
 import roomai.games.common
+from roomai.games.texasholdem.TexasHoldemUtil import PokerCard
+from roomai.games.texasholdem.TexasHoldemPot  import TexasHoldemPot
+
+
+## the rows of the buffer of the array-backed public state, see TexasHoldemStatePublic.player_array
+ArrayRows     = {"__chips__": 0, "__bets__": 1, "__is_fold__": 2, "__is_allin__": 3, "__is_needed_to_action__": 4}
+ArrayBoolRows = (2, 3, 4)
 
 
 class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
     '''
-    The public state of TexasHoldem
+    The public state of TexasHoldem.\n
+    With the init param param_array_state = True, chips, bets, is_fold, is_allin and is_needed_to_action live in one read-only int64 buffer (see player_array),
+    and a change of them copies the buffer once. The properties still return tuples, which are built from the buffer when it changes.\n
+    The properties return immutable tuples without copying, so reading them is free.
     '''
+    __slots__ = ("__buffer__", "__rows__", "__stage__", "__public_cards__", "__is_fold__", "__num_fold__", "__is_allin__", "__num_allin__", "__is_needed_to_action__", "__num_needed_to_action__",
+                 "__chips__", "__bets__", "__max_bet_sofar__", "__raise_account__", "__pot__", "__previous_id__", "__previous_action__",
+                 "__param_dealer_id__", "__param_init_chips__", "__param_big_blind_bet__", "__param_history_mode__", "__param_bet_abstraction__")
+
     def __init__(self):
         super(TexasHoldemStatePublic, self).__init__()
         self.__stage__              = None
@@ -21,6 +37,11 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
         self.__num_needed_to_action__           = None
 
 
+        #the buffer of the array-backed public state
+        self.__buffer__             = None
+        ## the rows of the buffer as tuples
+        self.__rows__               = None
+
         #chips is array which contains the chips of all players
         self.__chips__              = None
 
@@ -32,6 +53,20 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
         #the raise acount
         self.__raise_account__      = None
 
+        #the main pot and the side pots
+        self.__pot__                = None
+
+        #the previous action
+        self.__previous_id__        = None
+        self.__previous_action__    = None
+
+        #initialization params
+        self.__param_dealer_id__     = 0
+        self.__param_init_chips__    = None
+        self.__param_big_blind_bet__ = 10
+        self.__param_history_mode__  = "full"
+        self.__param_bet_abstraction__ = None
+
 
     def __get_max_bet_sofar__(self):    return self.__max_bet_sofar__
     max_bet_sofar = property(__get_max_bet_sofar__, doc="The max bet used by one player so far")
@@ -39,7 +74,27 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
     def __get_raise_account__(self):   return self.__raise_account__
     raise_account = property(__get_raise_account__, doc="The raise account. If a player want to raise, the price must be max_bet_sofar + raise_account * N. The raise account will increases as the game goes forward")
 
+    def __get_player_array__(self):   return self.__buffer__
+    player_array = property(__get_player_array__, doc="The read-only int64 array with the shape [5, param_num_normal_players] of the array-backed public state, whose rows are chips, bets, is_fold, is_allin and is_needed_to_action. "
+                                                      "It is None unless the init param param_array_state = True. Feature encoders can read it without any conversion")
+
+    def __row__(self, row):
+        return self.__rows__[row]
+
+    def __set_buffer__(self, buffer):
+        buffer.flags.writeable = False
+        rows                   = buffer.tolist()
+        for row in ArrayBoolRows:
+            rows[row] = [v != 0 for v in rows[row]]
+        self.__buffer__        = buffer
+        self.__rows__          = tuple([tuple(r) for r in rows])
+
+    def __get_pot__(self):   return self.__pot__
+    pot = property(__get_pot__, doc="The main pot and the side pots, see TexasHoldemPot. For example, pot.total = 300 and pot.amounts = (150, 150)")
+
     def __get_chips__(self):
+        if self.__buffer__ is not None:
+            return self.__row__(0)
         if self.__chips__ is None:
             return None
         else:
@@ -47,6 +102,8 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
     chips = property(__get_chips__, doc = "chips is an array of the chips of all players. For example, chips=[50,50,50]")
 
     def __get_bets__(self):
+        if self.__buffer__ is not None:
+            return self.__row__(1)
         if self.__bets__ is None:
             return None
         else:
@@ -56,6 +113,7 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
 
 
     def __get_is_fold__(self):
+        if self.__buffer__ is not None:    return self.__row__(2)
         if self.__is_fold__ is None:    return None
         else:   return tuple(self.__is_fold__)
     is_fold = property(__get_is_fold__, doc="is_fold is an array of which player has take the fold action. For example, is_fold = [true,true,false] denotes the player0 and player1 have taken the fold action")
@@ -65,6 +123,7 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
     num_fold = property(__get_num_fold__, doc = "The number of players who has taken the fold action")
 
     def __get_is_allin__(self):
+        if self.__buffer__ is not None:    return self.__row__(3)
         if self.__is_allin__ is None:    return None
         else:   return tuple(self.__is_allin__)
     is_allin = property(__get_is_allin__, doc="is_allin is an array of which player has take the allin action. For example, is_allin = [true,true,false] denotes the player0 and player1 have taken the allin action")
@@ -75,6 +134,7 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
 
 
     def __get_is_needed_to_action__(self):
+        if self.__buffer__ is not None:    return self.__row__(4)
         if self.__is_needed_to_action__ is None:    return None
         else:   return tuple(self.__is_needed_to_action__)
     is_needed_to_action = property(__get_is_needed_to_action__, doc="is_needed_to_action is an array of which player has take the needed_to_action action. For example, is_needed_to_action = [true,true,false] denotes the player0 and player1 are need to take action")
@@ -90,6 +150,12 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
             return tuple(self.__public_cards__)
     public_cards = property(__get_public_cards__, doc="The public cards of this game. For example, public_cards = [roomai.common.PokerCards.lookup(\"A_Spade\"), roomai.common.PokerCards.lookup(\"A_Heart\")]")
 
+    def __get_public_cards_mask__(self):
+        if self.__public_cards__ is None:
+            return 0
+        return PokerCard.cards_to_mask(self.__public_cards__)
+    public_cards_mask = property(__get_public_cards_mask__, doc="The 52-bit mask of the public cards.")
+
     def __get_stage__(self):
         return self.__stage__
     stage = property(__get_stage__, doc="The stage of the TexasHoldem game. The stage must be one of 1,2,3 or 4.")
@@ -97,18 +163,56 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
 
 
     ######################### initialization param ##################
-    __param_dealer_id__ = 0
     def __get_param_dealer_id__(self):    return self.__param_dealer_id__
     param_dealer_id = property(__get_param_dealer_id__, doc="The player id of the dealer. The next player after the dealer is the small blind. The next player after the small blind is the big blind.For example, param_dealer_id = 2")
 
-    __param_init_chips__ = None
     def __get_param_init_chips__(self):   return self.__param_init_chips__
     param_init_chips = property(__get_param_init_chips__, doc="The initialization chips of this game. For example, param_initialization_chips = [10,5,6]")
 
-    __param_big_blind_bet__ = 10
     def __get_param_big_blind_bet__(self): return self.__param_big_blind_bet__
     param_big_blind_bet = property(__get_param_big_blind_bet__, doc="The big blind bet")
 
+    def __get_param_history_mode__(self): return self.__param_history_mode__
+    param_history_mode = property(__get_param_history_mode__, doc="How the environment keeps the history. \"full\" keeps a snapshot per step, \"undo\" keeps only the current states and a compact undo record per step, \"last\" keeps only the current states and the last action, and \"none\" keeps only the current states")
+
+    def __get_param_bet_abstraction__(self): return self.__param_bet_abstraction__
+    param_bet_abstraction = property(__get_param_bet_abstraction__, doc="The pot fractions of the raises in the bet abstraction, for example (0.5, 1.0, 2.0). None means all raises are available")
+
+
+    def __clone__(self):
+        '''
+        A snapshot sharing all fields with this public state. The sequence fields are tuples,
+        and TexasHoldemEnv replaces them (see __replace_item__) instead of mutating them, so the snapshots never see the changes of each other.
+
+        :return: The snapshot
+        '''
+        newinstance = TexasHoldemStatePublic.__new__(TexasHoldemStatePublic)
+        for name in TexasHoldemStatePublic.__fields__:
+            setattr(newinstance, name, getattr(self, name))
+        return newinstance
+
+    def __replace_item__(self, name, i, value):
+        if self.__buffer__ is not None and name in ArrayRows:
+            buffer                  = self.__buffer__.copy()
+            buffer[ArrayRows[name], i] = value
+            self.__set_buffer__(buffer)
+            return
+        seq = tuple(getattr(self, name))
+        setattr(self, name, seq[0:i] + (value,) + seq[i+1:])
+
+    def __set_sequence__(self, name, values):
+        if self.__buffer__ is not None and name in ArrayRows:
+            buffer                  = self.__buffer__.copy()
+            buffer[ArrayRows[name]] = values
+            self.__set_buffer__(buffer)
+            return
+        setattr(self, name, tuple(values))
+
+    def __use_array__(self, num_players):
+        ## switch to the array-backed layout, the sequences must be set by __set_sequence__ afterwards
+        self.__set_buffer__(np.zeros((len(ArrayRows), num_players), dtype = np.int64))
+        for name in ArrayRows:
+            setattr(self, name, None)
 
     def __deepcopy__(self, memodict={}, newinstance = None):
             if newinstance is None:
@@ -118,6 +222,8 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
 
             newinstance.__param_dealer_id__     = self.param_dealer_id
             newinstance.__param_big_blind_bet__ = self.param_big_blind_bet
+            newinstance.__param_history_mode__  = self.param_history_mode
+            newinstance.__param_bet_abstraction__ = self.param_bet_abstraction
             newinstance.__param_init_chips__    = self.__param_init_chips__
             newinstance.__param_start_turn__    = self.__param_start_turn__
 
@@ -125,39 +231,49 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
             if self.public_cards is None:
                 newinstance.__public_cards__ = None
             else:
-                newinstance.__public_cards__ = [self.public_cards[i].__deepcopy__() for i in range(len(self.public_cards))]
+                newinstance.__public_cards__ = tuple([self.public_cards[i].__deepcopy__() for i in range(len(self.public_cards))])
 
             ######## quit, allin , needed_to_action
             newinstance.__num_fold__ = self.__num_fold__
             if self.is_fold is None:
                 newinstance.__is_fold__ = None
             else:
-                newinstance.__is_fold__ = [self.is_fold[i] for i in range(len(self.is_fold))]
+                newinstance.__is_fold__ = self.is_fold
 
             newinstance.__num_allin__ = self.__num_allin__
             if self.is_allin is None:
                 newinstance.__is_allin__ = None
             else:
-                newinstance.__is_allin__ = [self.is_allin[i] for i in range(len(self.is_allin))]
+                newinstance.__is_allin__ = self.is_allin
 
             newinstance.__num_needed_to_action__     = self.__num_needed_to_action__
             if self.is_needed_to_action is None:
                 newinstance.__is_needed_to_action__ = None
             else:
-                newinstance.__is_needed_to_action__ = [self.is_needed_to_action[i] for i in
-                                                    range(len(self.is_needed_to_action))]
+                newinstance.__is_needed_to_action__ = self.is_needed_to_action
 
             # chips is array which contains the chips of all players
             if self.chips is None:
                 newinstance.__chips__ = None
             else:
-                newinstance.__chips__ = [self.chips[i] for i in range(len(self.chips))]
+                newinstance.__chips__ = self.chips
 
             # bets is array which contains the bets from all players
             if self.bets is None:
                 newinstance.__bets__ = None
             else:
-                newinstance.__bets__ = [self.bets[i] for i in range(len(self.bets))]
+                newinstance.__bets__ = self.bets
+
+            if self.pot is None:
+                newinstance.__pot__ = None
+            else:
+                newinstance.__pot__ = self.pot.__deepcopy__()
+
+            ## the buffer is read-only, so the copies share it
+            if self.__buffer__ is not None:
+                newinstance.__use_array__(self.__buffer__.shape[1])
+                newinstance.__buffer__ = self.__buffer__
+                newinstance.__rows__   = self.__rows__
 
             newinstance.__max_bet_sofar__ = self.max_bet_sofar
             newinstance.__raise_account__ = self.raise_account
@@ -170,4 +286,7 @@ class TexasHoldemStatePublic(roomai.games.common.AbstractStatePublic):
             else:
                 newinstance.__scores__ = [self.scores[i] for i in range(len(self.scores))]
 
-            return newinstance
\ No newline at end of file
+            return newinstance
+
+## all slots of the public state, see TexasHoldemStatePublic.__clone__
+TexasHoldemStatePublic.__fields__ = roomai.games.common.AbstractStatePublic.__slots__ + TexasHoldemStatePublic.__slots__
@@ -58,7 +58,12 @@ class PokerCard(object):
     0\n
     >> card.key\n
     "2_Spade"\n
+    >> card.index\n
+    0\n
+    >> card.mask\n
+    1\n
     '''
+    __slots__ = ("__point__", "__suit__", "__point_rank__", "__suit_rank__", "__key__", "__idx__", "__mask__")
 
     def __init__(self, point, suit=None):
         point1 = 0
@@ -80,6 +85,8 @@ class PokerCard(object):
         self.__point_rank__ = point1
         self.__suit_rank__ = suit1
         self.__key__ = "%s_%s" % (self.__point__, self.__suit__)
+        self.__idx__ = point1 * 4 + suit1
+        self.__mask__ = 1 << self.__idx__
 
     def __get_point_str__(self):
         return self.__point__
@@ -101,6 +108,14 @@ class PokerCard(object):
         return self.__key__
     key = property(__get_key__, doc="The key of the poker card")
 
+    def __get_index__(self):
+        return self.__idx__
+    index = property(__get_index__, doc="The canonical index of the poker card, index = point_rank * 4 + suit_rank. The index ranges from 0 (2_Spade) to 51 (A_Club)")
+
+    def __get_mask__(self):
+        return self.__mask__
+    mask = property(__get_mask__, doc="The 52-bit mask of the poker card, mask = 1 << index. The mask of a set of cards is the bitwise or of their masks")
+
     @classmethod
     def lookup(cls, key):
         '''
@@ -117,6 +132,40 @@ class PokerCard(object):
 
         return AllPokerCards[key]
 
+    @classmethod
+    def lookup_by_index(cls, index):
+        '''
+        lookup a PokerCard with the specified canonical index
+
+        :param index: The specified index, 0 <= index < 52
+        :return: The PokerCard with the specified index
+        '''
+        return AllPokerCardsByIndex[index]
+
+    @classmethod
+    def cards_to_mask(cls, cards):
+        '''
+        :param cards: A list of PokerCards
+        :return: The 52-bit mask of the cards
+        '''
+        mask = 0
+        for c in cards:
+            mask |= c.mask
+        return mask
+
+    @classmethod
+    def mask_to_cards(cls, mask):
+        '''
+        :param mask: The 52-bit mask of some cards
+        :return: The list of PokerCards in the mask, sorted by the index
+        '''
+        cards = []
+        while mask:
+            low   = mask & -mask
+            cards.append(AllPokerCardsByIndex[low.bit_length() - 1])
+            mask ^= low
+        return cards
+
     @classmethod
     def point_to_rank(cls, point):
         if point not in point_str_to_rank:
@@ -169,10 +218,5 @@ AllPokerCards = dict()
 for point in point_str_to_rank:
     for suit in suit_str_to_rank:
         AllPokerCards["%s_%s" % (point, suit)] = PokerCard("%s_%s" % (point, suit))
-
-
-
-
-
-
-
+AllPokerCardsByIndex = tuple(sorted(AllPokerCards.values(), key = lambda c: c.index))
+FullDeckMask         = (1 << 52) - 1
@@ -0,0 +1,383 @@
+#!/bin/python
+#coding:utf-8
+import numpy as np
+
+from roomai.games.texasholdem.TexasHoldemUtil      import Stage
+from roomai.games.texasholdem.TexasHoldemAction    import TexasHoldemAction
+from roomai.games.texasholdem.TexasHoldemEvaluator import HandEvaluator
+
+
+## the number of the public cards shown in the stages, indexed by the stage
+NumPublicCards = np.array([0, 0, 3, 4, 5], dtype = np.int64)
+## the upper bound of the open pot
+OpenLevel      = 1 << 60
+
+## the kinds of the actions decoded from their ids
+KindFold  = -2
+KindCheck = -1
+KindCall  = 0
+KindRaise = 1
+KindAllin = 2
+
+
+class VecTexasHoldemEnv(object):
+    '''
+    Many tables of TexasHoldem advanced in lockstep. The states of all tables live in numpy arrays, and every step takes one action id per table (see TexasHoldemAction.id).\n
+    The betting, the stages and the scores follow TexasHoldemEnv.forward. The cards are dealt from a deck shuffled by the environment instead of the chance player,
+    in the order of the chance actions of TexasHoldemEnv, so a hand is the same hand as the TexasHoldemEnv fed with the cards of the deck.
+    A table is reset to a new hand as soon as its hand ends.\n
+    Examples of usages:\n
+    >> env = roomai.games.texasholdem.VecTexasHoldemEnv(4096, {"param_num_normal_players":2}, seed = 0)\n
+    >> mask = env.available_action_mask()\n
+    >> rewards, dones = env.step(env.sample_actions())\n
+    '''
+
+    def __init__(self, num_envs, params = dict(), seed = None):
+        '''
+        :param num_envs: The number of the tables
+        :param params: The params of the tables with the same meaning as the ones of TexasHoldemEnv.init, namely param_num_normal_players, param_init_chips,
+        param_big_blind_bet and param_dealer_id. Every table starts every hand with param_init_chips, and param_dealer_id = None means a random dealer per hand.
+        The initialization chips must be more than the big blind, so no hand starts with an all-in blind
+        :param seed: The seed of the decks and the dealers
+        '''
+        if "param_num_normal_players" in params:
+            num_players = params["param_num_normal_players"]
+        else:
+            num_players = 3
+
+        if "param_init_chips" in params:
+            init_chips = list(params["param_init_chips"])
+        else:
+            init_chips = [1000 for i in range(num_players)]
+
+        if "param_big_blind_bet" in params:
+            big_blind_bet = params["param_big_blind_bet"]
+        else:
+            big_blind_bet = 10
+
+        if "param_dealer_id" in params:
+            dealer_id = params["param_dealer_id"]
+        else:
+            dealer_id = None
+
+        if num_players < 2 or num_players > 6:
+            raise ValueError("The number of players must be in [2, 6], but it is %d" % (num_players))
+        if len(init_chips) != num_players:
+            raise ValueError("len(param_init_chips) %d != param_num_normal_players %d" % (len(init_chips), num_players))
+        if min(init_chips) <= big_blind_bet:
+            raise ValueError("The initialization chips must be more than the big blind bet %d, but they are %s" % (big_blind_bet, str(init_chips)))
+
+        self.__num_envs__      = num_envs
+        self.__num_players__   = num_players
+        self.__init_chips__    = np.array(init_chips, dtype = np.int64)
+        self.__big_blind_bet__ = big_blind_bet
+        self.__dealer_id__     = dealer_id
+        self.__rng__           = np.random.default_rng(seed)
+        self.__rows__          = np.arange(num_envs)
+
+        self.__chips__         = np.zeros((num_envs, num_players), dtype = np.int64)
+        self.__bets__          = np.zeros((num_envs, num_players), dtype = np.int64)
+        self.__is_fold__       = np.zeros((num_envs, num_players), dtype = bool)
+        self.__is_allin__      = np.zeros((num_envs, num_players), dtype = bool)
+        self.__is_needed__     = np.zeros((num_envs, num_players), dtype = bool)
+        self.__max_bet__       = np.zeros(num_envs, dtype = np.int64)
+        self.__raise_account__ = np.zeros(num_envs, dtype = np.int64)
+        self.__stage__         = np.zeros(num_envs, dtype = np.int64)
+        self.__turn__          = np.zeros(num_envs, dtype = np.int64)
+        self.__dealer__        = np.zeros(num_envs, dtype = np.int64)
+        self.__hand_cards__    = np.zeros((num_envs, num_players, 2), dtype = np.int64)
+        self.__keep_cards__    = np.zeros((num_envs, 5), dtype = np.int64)
+        self.__num_hands__     = 0
+
+        HandEvaluator.load_tables()
+        self.reset()
+
+    def reset(self):
+        '''
+        Start a new hand at every table
+        '''
+        self.__num_hands__ = 0
+        self.__reset_tables__(self.__rows__)
+
+    def __reset_tables__(self, rows):
+        k = len(rows)
+        if k == 0:
+            return
+        n     = self.__num_players__
+        decks = np.argsort(self.__rng__.random((k, 52)), axis = 1)
+        ## the hand cards are dealt round by round, and the keep cards follow
+        self.__hand_cards__[rows] = np.stack([decks[:, 0:n], decks[:, n:2 * n]], axis = 2)
+        self.__keep_cards__[rows] = decks[:, 2 * n:2 * n + 5]
+
+        if self.__dealer_id__ is None:
+            dealer = self.__rng__.integers(0, n, size = k)
+        else:
+            dealer = np.full(k, self.__dealer_id__, dtype = np.int64)
+        small  = (dealer + 1) % n
+        big    = (dealer + 2) % n
+        r      = np.arange(k)
+
+        chips  = np.tile(self.__init_chips__, (k, 1))
+        bets   = np.zeros((k, n), dtype = np.int64)
+        chips[r, big]   -= self.__big_blind_bet__
+        bets[r, big]    += self.__big_blind_bet__
+        chips[r, small] -= self.__big_blind_bet__ // 2
+        bets[r, small]  += self.__big_blind_bet__ // 2
+
+        self.__chips__[rows]         = chips
+        self.__bets__[rows]          = bets
+        self.__is_fold__[rows]       = False
+        self.__is_allin__[rows]      = False
+        self.__is_needed__[rows]     = True
+        self.__max_bet__[rows]       = self.__big_blind_bet__
+        self.__raise_account__[rows] = self.__big_blind_bet__
+        self.__stage__[rows]         = Stage.firstStage
+        self.__turn__[rows]          = (big + 1) % n
+        self.__dealer__[rows]        = dealer
+
+    def __get_num_envs__(self):  return self.__num_envs__
+    num_envs = property(__get_num_envs__, doc = "The number of the tables")
+
+    def __get_num_players__(self):  return self.__num_players__
+    num_players = property(__get_num_players__, doc = "The number of the normal players at every table")
+
+    def __get_num_hands__(self):  return self.__num_hands__
+    num_hands = property(__get_num_hands__, doc = "The number of the hands finished since the last reset")
+
+    def __view__(self, array):
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    def __get_chips__(self):  return self.__view__(self.__chips__)
+    chips = property(__get_chips__, doc = "The read-only int64 array with the shape [num_envs, num_players] of the chips of the players")
+
+    def __get_bets__(self):  return self.__view__(self.__bets__)
+    bets = property(__get_bets__, doc = "The read-only int64 array with the shape [num_envs, num_players] of the bets of the players in this hand")
+
+    def __get_is_fold__(self):  return self.__view__(self.__is_fold__)
+    is_fold = property(__get_is_fold__, doc = "The read-only bool array with the shape [num_envs, num_players] of which players have folded")
+
+    def __get_is_allin__(self):  return self.__view__(self.__is_allin__)
+    is_allin = property(__get_is_allin__, doc = "The read-only bool array with the shape [num_envs, num_players] of which players are all in")
+
+    def __get_is_needed_to_action__(self):  return self.__view__(self.__is_needed__)
+    is_needed_to_action = property(__get_is_needed_to_action__, doc = "The read-only bool array with the shape [num_envs, num_players] of which players need to take actions in this stage")
+
+    def __get_max_bet_sofar__(self):  return self.__view__(self.__max_bet__)
+    max_bet_sofar = property(__get_max_bet_sofar__, doc = "The read-only int64 array with the shape [num_envs] of the highest bets")
+
+    def __get_raise_account__(self):  return self.__view__(self.__raise_account__)
+    raise_account = property(__get_raise_account__, doc = "The read-only int64 array with the shape [num_envs] of the raise accounts")
+
+    def __get_stage__(self):  return self.__view__(self.__stage__)
+    stage = property(__get_stage__, doc = "The read-only int64 array with the shape [num_envs] of the stages")
+
+    def __get_turn__(self):  return self.__view__(self.__turn__)
+    turn = property(__get_turn__, doc = "The read-only int64 array with the shape [num_envs] of the players expected to take actions")
+
+    def __get_dealer_id__(self):  return self.__view__(self.__dealer__)
+    dealer_id = property(__get_dealer_id__, doc = "The read-only int64 array with the shape [num_envs] of the dealers")
+
+    def __get_hand_cards__(self):  return self.__view__(self.__hand_cards__)
+    hand_cards = property(__get_hand_cards__, doc = "The read-only int64 array with the shape [num_envs, num_players, 2] of the indices (PokerCard.index) of the hand cards")
+
+    def __get_keep_cards__(self):  return self.__view__(self.__keep_cards__)
+    keep_cards = property(__get_keep_cards__, doc = "The read-only int64 array with the shape [num_envs, 5] of the indices of the keep cards, which are hidden from the players")
+
+    def __get_public_cards__(self):
+        shown = np.arange(5)[np.newaxis, :] < NumPublicCards[self.__stage__][:, np.newaxis]
+        return np.where(shown, self.__keep_cards__, -1)
+    public_cards = property(__get_public_cards__, doc = "The int64 array with the shape [num_envs, 5] of the indices of the public cards, and -1 for the cards not shown yet")
+
+    def __current__(self):
+        ## the chips, the bets and the call prices of the players expected to take actions
+        chips   = self.__chips__[self.__rows__, self.__turn__]
+        bets    = self.__bets__[self.__rows__, self.__turn__]
+        return chips, bets, self.__max_bet__ - bets
+
+    def __num_raises__(self, chips, to_call):
+        ## the raises are the prices to_call + raise_account * i below the chips, see TexasHoldemEnv.available_actions
+        ra  = self.__raise_account__
+        num = np.where(chips > to_call + ra, (chips - to_call) // ra, 0)
+        return num - ((num > 0) & (to_call + ra * num == chips))
+
+    def available_action_mask(self, max_price = None):
+        '''
+        :param max_price: The highest price of the actions in the mask. The default is the largest initialization chips
+        :return: A bool array with the shape [num_envs, TexasHoldemAction.num_ids(max_price)], the item [b, id] is whether the action with the id is valid at the table b
+        '''
+        if max_price is None:
+            max_price = int(self.__init_chips__.max())
+        chips, bets, to_call = self.__current__()
+        ra     = self.__raise_account__
+        rows   = self.__rows__
+        mask   = np.zeros((self.__num_envs__, TexasHoldemAction.num_ids(max_price)), dtype = bool)
+
+        mask[:, TexasHoldemAction.action_id(TexasHoldemAction.Fold, 0)]  = True
+        mask[:, TexasHoldemAction.action_id(TexasHoldemAction.Check, 0)] = to_call == 0
+        call        = (to_call != 0) & (chips > to_call) & (to_call <= max_price)
+        mask[rows[call], 3 * to_call[call] - 1] = True
+
+        prices      = np.arange(1, max_price + 1)[np.newaxis, :]
+        offsets     = prices - to_call[:, np.newaxis]
+        mask[:, 3 * prices[0]] = (chips[:, np.newaxis] > (to_call + ra)[:, np.newaxis]) & (offsets >= ra[:, np.newaxis]) & \
+                                 (offsets % ra[:, np.newaxis] == 0) & (prices < chips[:, np.newaxis])
+        allin       = chips <= max_price
+        mask[rows[allin], 3 * chips[allin] + 1] = True
+        return mask
+
+    def sample_actions(self, rng = None):
+        '''
+        Sample a valid action uniformly at every table, in the same way as TexasHoldemLegalActions.sample
+
+        :param rng: The numpy random generator. The default is the generator of this environment
+        :return: An int64 array with the shape [num_envs] of the ids of the sampled actions
+        '''
+        if rng is None:
+            rng = self.__rng__
+        chips, bets, to_call = self.__current__()
+        check      = to_call == 0
+        call       = (to_call != 0) & (chips > to_call)
+        num_raises = self.__num_raises__(chips, to_call)
+        num_heads  = 1 + check + call
+        index      = (rng.random(self.__num_envs__) * (num_heads + num_raises + 1)).astype(np.int64)
+
+        raise_price = to_call + self.__raise_account__ * (index - num_heads + 1)
+        ids = np.where(index < num_heads,
+                       np.where(index == 0, 0, np.where((index == 1) & check, 1, 3 * to_call - 1)),
+                       np.where(index < num_heads + num_raises, 3 * raise_price, 3 * chips + 1))
+        return ids
+
+    def is_action_valid(self, action_ids):
+        '''
+        :param action_ids: An integer array with the shape [num_envs] of the action ids
+        :return: A bool array with the shape [num_envs] of whether the actions are valid
+        '''
+        chips, bets, to_call = self.__current__()
+        kind, price          = self.__decode__(np.asarray(action_ids, dtype = np.int64))
+        return self.__is_valid__(kind, price, chips, to_call)
+
+    @classmethod
+    def __decode__(cls, ids):
+        kind  = np.where(ids < 2, ids - 2, (ids - 2) % 3)
+        price = np.where(ids < 2, 0, (ids - 2) // 3 + 1)
+        return kind, price
+
+    def __is_valid__(self, kind, price, chips, to_call):
+        ra     = self.__raise_account__
+        offset = price - to_call
+        return (price >= 0) & (
+               (kind == KindFold)
+             | ((kind == KindCheck) & (to_call == 0))
+             | ((kind == KindCall)  & (to_call != 0) & (chips > to_call) & (price == to_call))
+             | ((kind == KindRaise) & (chips > to_call + ra) & (offset >= ra) & (offset % np.maximum(ra, 1) == 0) & (price < chips))
+             | ((kind == KindAllin) & (price == chips)))
+
+    def step(self, action_ids):
+        '''
+        Every table steps with the action taken by its current player, and the tables whose hands end are reset to new hands
+
+        :param action_ids: An integer array with the shape [num_envs] of the action ids, see TexasHoldemAction.id
+        :return: rewards, dones. rewards is a float64 array with the shape [num_envs, num_players], the scores (as TexasHoldemStatePublic.scores) of the hands ending in this step and 0 for other tables.
+        dones is a bool array with the shape [num_envs] of which tables end their hands in this step
+        :raise: ValueError if any action is invalid
+        '''
+        ids = np.asarray(action_ids, dtype = np.int64)
+        if ids.shape != (self.__num_envs__,):
+            raise ValueError("step needs an array with the shape [%d], but the shape is %s" % (self.__num_envs__, str(ids.shape)))
+
+        n                    = self.__num_players__
+        rows, turn           = self.__rows__, self.__turn__
+        chips, bets, to_call = self.__current__()
+        kind, price          = self.__decode__(ids)
+        valid                = self.__is_valid__(kind, price, chips, to_call)
+        if valid.all() == False:
+            invalid = np.nonzero(valid == False)[0]
+            raise ValueError("The actions %s of the tables %s are invalid" % (str(ids[invalid][0:10].tolist()), str(invalid[0:10].tolist())))
+
+        ## take the actions
+        paid = np.where(kind >= KindCall, price, 0)
+        self.__chips__[rows, turn]      = chips - paid
+        self.__bets__[rows, turn]       = bets + paid
+        self.__is_fold__[rows, turn]   |= kind == KindFold
+        self.__is_allin__[rows, turn]  |= kind == KindAllin
+        self.__is_needed__[rows, turn]  = False
+
+        ## a raise, or an all-in above the highest bet, needs the other players to act again
+        raising = (kind == KindRaise) | ((kind == KindAllin) & (bets + paid > self.__max_bet__))
+        self.__raise_account__ = np.where(kind == KindRaise, price - to_call, self.__raise_account__)
+        self.__max_bet__       = np.where(raising, bets + paid, self.__max_bet__)
+        reopen                 = raising[:, np.newaxis] & (self.__is_fold__ == False) & (self.__is_allin__ == False)
+        reopen[rows, turn]     = False
+        self.__is_needed__    |= reopen
+
+        ## see TexasHoldemEnv.__is_compute_scores__ and TexasHoldemEnv.__is_nextround__
+        num_fold   = self.__is_fold__.sum(axis = 1)
+        num_allin  = self.__is_allin__.sum(axis = 1)
+        num_needed = self.__is_needed__.sum(axis = 1)
+        dones      = (num_fold + 1 == n) | ((n <= num_fold + num_allin + 1) & (num_needed == 0)) | ((self.__stage__ == Stage.fourthStage) & (num_needed == 0))
+        next_round = (dones == False) & (num_needed == 0)
+
+        if next_round.any():
+            self.__stage__      = self.__stage__ + next_round
+            self.__is_needed__ |= next_round[:, np.newaxis] & (self.__is_fold__ == False) & (self.__is_allin__ == False)
+        start  = np.where(next_round, self.__dealer__, turn)
+        seats  = (start[:, np.newaxis] + np.arange(1, n + 1)[np.newaxis, :]) % n
+        first  = np.argmax(self.__is_needed__[rows[:, np.newaxis], seats], axis = 1)
+        self.__turn__ = seats[rows, first]
+
+        rewards = np.zeros((self.__num_envs__, n), dtype = np.float64)
+        if dones.any():
+            finished           = rows[dones]
+            winnings           = self.__winnings__(finished)
+            rewards[finished]  = (winnings - self.__bets__[finished]) / (self.__big_blind_bet__ * 1.0)
+            self.__chips__[finished] += winnings
+            self.__num_hands__ += len(finished)
+            self.__reset_tables__(finished)
+        return rewards, dones
+
+    def __winnings__(self, rows):
+        ## the chips won by the players of the finished tables, see TexasHoldemPot.distribute
+        n       = self.__num_players__
+        bets    = self.__bets__[rows]
+        is_fold = self.__is_fold__[rows]
+        k       = len(rows)
+
+        ## the winner takes all if the others have folded
+        winnings = np.where(is_fold == False, bets.sum(axis = 1)[:, np.newaxis], 0)
+        showdown = is_fold.sum(axis = 1) + 1 < n
+        if showdown.any() == False:
+            return winnings
+
+        bets, is_fold = bets[showdown], is_fold[showdown]
+        m             = len(bets)
+        cards         = np.concatenate([self.__hand_cards__[rows[showdown]], np.repeat(self.__keep_cards__[rows[showdown]][:, np.newaxis, :], n, axis = 1)], axis = 2)
+        ranks         = HandEvaluator.evaluate_batch(cards.reshape(m * n, 7)).reshape(m, n).astype(np.int64)
+        ranks         = np.where(is_fold, -1, ranks)
+
+        ## the pots are split at the bets of the all-in players
+        levels  = np.sort(np.where(self.__is_allin__[rows[showdown]] & (bets > 0), bets, OpenLevel), axis = 1)
+        lowers  = np.concatenate([np.zeros((m, 1), dtype = np.int64), levels], axis = 1)[:, :, np.newaxis]
+        uppers  = np.concatenate([levels, np.full((m, 1), OpenLevel, dtype = np.int64)], axis = 1)[:, :, np.newaxis]
+        parts   = np.clip(bets[:, np.newaxis, :] - lowers, 0, np.maximum(uppers - lowers, 0))
+        amounts = parts.sum(axis = 2)
+
+        ## every pot goes to the eligible players with the best hand, and the odd chips go to them in the order of their seats after the dealer
+        eligible = (is_fold == False)[:, np.newaxis, :] & (bets[:, np.newaxis, :] > lowers)
+        best     = np.where(eligible, ranks[:, np.newaxis, :], -1).max(axis = 2)
+        winners  = eligible & (ranks[:, np.newaxis, :] == best[:, :, np.newaxis])
+        num_win  = winners.sum(axis = 2)
+        share    = amounts // np.maximum(num_win, 1)
+        odd      = amounts - share * num_win
+
+        seats    = (self.__dealer__[rows[showdown]][:, np.newaxis] + 1 + np.arange(n)[np.newaxis, :]) % n
+        seats    = np.repeat(seats[:, np.newaxis, :], winners.shape[1], axis = 1)
+        ordered  = np.take_along_axis(winners, seats, axis = 2)
+        extra    = ordered & (np.cumsum(ordered, axis = 2) <= odd[:, :, np.newaxis])
+        bonus    = np.zeros(winners.shape, dtype = bool)
+        np.put_along_axis(bonus, seats, extra, axis = 2)
+
+        won      = np.where((num_win > 0)[:, :, np.newaxis], share[:, :, np.newaxis] * winners + bonus, parts)
+        winnings[showdown] = won.sum(axis = 1)
+        return winnings
@@ -2,10 +2,24 @@
 from roomai.games.texasholdem.TexasHoldemUtil         import PokerCard
 from roomai.games.texasholdem.TexasHoldemUtil         import AllCardsPattern
 from roomai.games.texasholdem.TexasHoldemUtil         import AllPokerCards
+from roomai.games.texasholdem.TexasHoldemUtil         import AllPokerCardsByIndex
 from roomai.games.texasholdem.TexasHoldemUtil         import Stage
+from roomai.games.texasholdem.TexasHoldemEvaluator    import HandEvaluator
+from roomai.games.texasholdem.TexasHoldemEvaluator    import BoardContext
+from roomai.games.texasholdem.TexasHoldemEvaluator    import HandRankCache
+from roomai.games.texasholdem.TexasHoldemEquity       import EquityCalculator
+from roomai.games.texasholdem.TexasHoldemEquity       import EquityResult
+from roomai.games.texasholdem.TexasHoldemPreflop      import PreflopEquityTable
+from roomai.games.texasholdem.TexasHoldemIndexer      import HandIndexer
+from roomai.games.texasholdem.TexasHoldemAbstraction  import BucketingPipeline
+from roomai.games.texasholdem.TexasHoldemAbstraction  import CardAbstraction
+from roomai.games.texasholdem.TexasHoldemPot         import TexasHoldemPot
 from roomai.games.texasholdem.TexasHoldemActionChance import TexasHoldemActionChance
 from roomai.games.texasholdem.TexasHoldemAction       import TexasHoldemAction
+from roomai.games.texasholdem.TexasHoldemLegalActions import TexasHoldemLegalActions
+from roomai.games.texasholdem.TexasHoldemChanceActions import TexasHoldemChanceActions
 from roomai.games.texasholdem.TexasHoldemStatePerson  import TexasHoldemStatePerson
 from roomai.games.texasholdem.TexasHoldemStatePrivate import TexasHoldemStatePrivate
 from roomai.games.texasholdem.TexasHoldemStatePublic  import TexasHoldemStatePublic
 from roomai.games.texasholdem.TexasHoldemEnv          import TexasHoldemEnv
+from roomai.games.texasholdem.TexasHoldemVecEnv       import VecTexasHoldemEnv
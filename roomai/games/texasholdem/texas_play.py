@@ -1,10 +1,7 @@
 #!/bin/python
-import random
-
 import roomai.games.common
 import roomai.games.texasholdem
 
-random.seed(4)
 class Player(roomai.games.common.AbstractPlayer):
     def receive_info(self, info):
         available_actions = info
@@ -0,0 +1,83 @@
+#!/bin/python
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from roomai.games.texasholdem import BucketingPipeline
+from roomai.games.texasholdem import CardAbstraction
+from roomai.games.texasholdem import HandIndexer
+from roomai.games.texasholdem import PokerCard
+from roomai.games.texasholdem import Stage
+
+
+class TexasAbstractionTester(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_kmeans(self):
+        rng     = np.random.default_rng(0)
+        points  = np.concatenate([rng.normal(c, 0.01, (50, 2)) for c in [0.0, 1.0, 2.0]])
+        centers = BucketingPipeline.kmeans(points, 3, 20, rng)
+        self.assertEqual(sorted(np.round(centers[:, 0]).tolist()), [0.0, 1.0, 2.0])
+
+    def test_features(self):
+        pipeline = BucketingPipeline(self.directory, num_runouts = 32, num_opponents = 32)
+        rng      = np.random.default_rng(0)
+        cards    = np.array([[48, 49], [0, 21]])
+        features = pipeline.compute_features(Stage.firstStage, cards, rng)
+        self.assertEqual(features.shape, (2, 9))
+        self.assertTrue(np.allclose(features[:, 0:8].sum(axis = 1), 1))
+        self.assertGreater(features[0, -1], features[1, -1])
+
+        ## the royal flush on the river beats every opponent
+        river    = np.array([[48, 44, 40, 36, 32, 1, 2]])
+        features = pipeline.compute_features(Stage.fourthStage, river, rng)
+        self.assertEqual(features[0, -1], 1.0)
+        self.assertEqual(features[0, 7], 1.0)
+
+        ## the opponents never hold the cards of the hand or the board, and the chunks larger than max_batch_rows are computed in batches
+        flop     = np.repeat(np.array([[48, 44, 40, 36, 32]]), BucketingPipeline.max_batch_rows + 3, axis = 0)
+        features = pipeline.compute_features(Stage.secondStage, flop, rng)
+        self.assertEqual(features.shape, (len(flop), 9))
+        self.assertTrue((features[:, -1] == 1.0).all())
+
+    def test_pipeline(self):
+        pipeline = BucketingPipeline(self.directory, num_buckets = 8, num_runouts = 16, num_opponents = 16, chunk_size = 64, seed = 1)
+        pipeline.run(stages = [Stage.firstStage], num_processes = 1)
+        buckets  = np.load(os.path.join(self.directory, CardAbstraction.bucket_file(Stage.firstStage)))
+        self.assertEqual(buckets.dtype, np.uint8)
+        self.assertEqual(buckets.shape, (HandIndexer.lookup(Stage.firstStage).size,))
+
+        abstraction = CardAbstraction.load(self.directory)
+        self.assertEqual(abstraction.num_buckets(Stage.firstStage), 8)
+        aa = abstraction.bucket([PokerCard.lookup("A_Spade"), PokerCard.lookup("A_Heart")])
+        ah = abstraction.bucket([PokerCard.lookup("A_Club"), PokerCard.lookup("A_Diamond")], [])
+        o2 = abstraction.bucket([PokerCard.lookup("7_Spade"), PokerCard.lookup("2_Heart")])
+        self.assertEqual(aa, ah)
+        self.assertEqual(aa, 7)
+        self.assertLess(o2, aa)
+        self.assertEqual(abstraction.bucket_batch(Stage.firstStage, np.array([[48, 49], [49, 50]])).tolist(), [aa, aa])
+        self.assertRaises(ValueError, abstraction.bucket, [PokerCard.lookup("A_Spade"), PokerCard.lookup("A_Heart")],
+                          [PokerCard.lookup("2_Spade"), PokerCard.lookup("3_Spade"), PokerCard.lookup("4_Spade")])
+
+        ## resume with the features computed before
+        os.remove(os.path.join(self.directory, CardAbstraction.bucket_file(Stage.firstStage)))
+        os.remove(os.path.join(self.directory, "stage1_features_00001.npy"))
+        BucketingPipeline(self.directory, num_buckets = 8, num_runouts = 16, num_opponents = 16, chunk_size = 64, seed = 1).run(stages = [Stage.firstStage], num_processes = 2)
+        self.assertEqual(np.load(os.path.join(self.directory, CardAbstraction.bucket_file(Stage.firstStage))).tolist(), buckets.tolist())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, BucketingPipeline, self.directory, 0)
+        self.assertRaises(ValueError, BucketingPipeline, self.directory, 100000)
+        self.assertRaises(IOError, CardAbstraction.load, self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
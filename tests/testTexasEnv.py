@@ -16,6 +16,337 @@ class TexasEnvTester(unittest.TestCase):
         env.forward(TexasHoldemAction.lookup("Call_5"))
 
 
+    def test_chance_deal(self):
+        env = roomai.games.texasholdem.TexasHoldemEnv()
+        infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":3, "param_dealer_id":0})
+        self.assertEqual(public_state[-1].turn, 3)
+        self.assertEqual(len(person_states[3][-1].available_actions), 52)
+
+        for idx in range(11):
+            infos, public_state, person_states, private_state = env.forward(TexasHoldemActionChance.lookup_by_index(idx))
+            self.assertEqual(private_state[-1].all_used_cards_mask, (1 << (idx + 1)) - 1)
+        self.assertEqual(len(person_states[3][-1].available_actions), 0)
+
+        self.assertEqual([c.index for c in person_states[0][-1].hand_cards], [0, 3])
+        self.assertEqual(person_states[1][-1].hand_cards_mask, (1 << 1) | (1 << 4))
+        self.assertEqual(private_state[-1].keep_cards_mask, ((1 << 11) - 1) ^ ((1 << 6) - 1))
+        self.assertEqual(public_state[-1].turn, 0)
+        self.assertTrue("Call_10" in person_states[0][-1].available_actions)
+
+    def test_copy_on_write(self):
+        env = roomai.games.texasholdem.TexasHoldemEnv()
+        infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":3, "param_dealer_id":0})
+        for idx in range(11):
+            infos, public_state, person_states, private_state = env.forward(TexasHoldemActionChance.lookup_by_index(idx))
+
+        ## dealing a hand card changes only the person state of the player receiving it
+        self.assertTrue(person_states[1][3] is person_states[1][2])
+        self.assertFalse(person_states[0][1] is person_states[0][0])
+        self.assertTrue(private_state[6] is not private_state[5])
+
+        before = [(pu.chips, pu.bets, pu.is_needed_to_action, pu.pot.amounts) for pu in public_state]
+        infos, public_state, person_states, private_state = env.forward(TexasHoldemAction.lookup("Call_10"))
+        infos, public_state, person_states, private_state = env.forward(TexasHoldemAction.lookup("Raise_15"))
+        self.assertEqual([(pu.chips, pu.bets, pu.is_needed_to_action, pu.pot.amounts) for pu in public_state[0:len(before)]], before)
+        self.assertEqual(public_state[-1].chips, (990, 980, 990))
+        self.assertEqual(public_state[-2].chips, (990, 995, 990))
+
+        ## the private state and the person state of the waiting player are shared by the snapshots of the betting
+        self.assertTrue(private_state[-1] is private_state[-3])
+        self.assertTrue(person_states[0][-1] is person_states[0][-2])
+        self.assertTrue(person_states[3][-1] is person_states[3][-3])
+        self.assertTrue("Call_10" in person_states[0][-3].available_actions)
+        self.assertEqual(len(person_states[0][-2].available_actions), 0)
+        self.assertTrue("Call_10" in person_states[2][-1].available_actions)
+
+    def test_undo_history(self):
+        def states(env):
+            pu = env.__public_state_history__[-1]
+            pr = env.__private_state_history__[-1]
+            return (pu.chips, pu.bets, pu.is_fold, pu.is_needed_to_action, pu.turn, pu.stage, pu.public_cards, pu.pot.amounts, pu.is_terminal, pu.scores, pr.keep_cards,
+                    tuple([(pe[-1].hand_cards, tuple(sorted(pe[-1].available_actions.keys()))) for pe in env.__person_states_history__]))
+
+        random.seed(0)
+        for mode in ["full", "undo"]:
+            env     = roomai.games.texasholdem.TexasHoldemEnv()
+            players = [roomai.games.common.RandomPlayer() for i in range(4)] + [roomai.games.common.RandomPlayerChance()]
+            infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":4, "param_history_mode":mode})
+            history = [states(env)]
+            while public_state[-1].is_terminal == False:
+                for i in range(5):
+                    players[i].receive_info(infos[i])
+                infos, public_state, person_states, private_state = env.forward(players[public_state[-1].turn].take_action())
+                history.append(states(env))
+
+            if mode == "undo":
+                self.assertEqual(len(public_state), 1)
+                self.assertEqual(len(env.__undo_records__), len(history) - 1)
+            while env.backward_able():
+                env.backward()
+                history.pop()
+                self.assertEqual(states(env), history[-1])
+            self.assertEqual(len(history), 1)
+            self.assertEqual(len(env.__playerid_action_history__), 0)
+
+        self.assertRaises(ValueError, env.init, {"param_history_mode":"partial"})
+
+    def test_in_place_history(self):
+        def states(public_state, person_states, private_state):
+            pu = public_state[-1]
+            return (pu.chips, pu.bets, pu.is_fold, pu.is_needed_to_action, pu.turn, pu.stage, pu.public_cards, pu.pot.amounts, pu.is_terminal, pu.scores, private_state[-1].keep_cards,
+                    tuple([(pe[-1].hand_cards, tuple(pe[-1].available_actions.keys())) for pe in person_states]))
+
+        for seed in range(5):
+            results = dict()
+            for mode in ["full", "last", "none"]:
+                random.seed(seed)
+                env     = roomai.games.texasholdem.TexasHoldemEnv()
+                players = [roomai.games.common.RandomPlayer() for i in range(3)] + [roomai.games.common.RandomPlayerChance()]
+                infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":3, "param_history_mode":mode})
+                results[mode] = [states(public_state, person_states, private_state)]
+                while public_state[-1].is_terminal == False:
+                    for i in range(4):
+                        players[i].receive_info(infos[i])
+                    turn  = public_state[-1].turn
+                    num   = len(action_history)
+                    infos2, public_state, person_states, private_state = env.forward(players[turn].take_action())
+                    results[mode].append(states(public_state, person_states, private_state))
+                    if mode != "full" and num == len(action_history):
+                        ## the same infos and states are handed out again
+                        self.assertTrue(infos2 is infos)
+                    infos = infos2
+                if mode != "full":
+                    self.assertEqual(len(public_state), 1)
+                    self.assertEqual(len(infos[0].public_state_history), 1)
+                    self.assertEqual(len(action_history), 1 if mode == "last" else 0)
+                    self.assertFalse(env.backward_able())
+                    self.assertRaises(ValueError, env.backward)
+            self.assertEqual(results["full"], results["last"])
+            self.assertEqual(results["full"], results["none"])
+
+    def test_seed_deck(self):
+        decks = []
+        for seed in [7, 7, 8]:
+            random.seed(len(decks))
+            env = roomai.games.texasholdem.TexasHoldemEnv()
+            infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":2, "param_seed":seed})
+            deck    = private_state[-1].deck
+            self.assertEqual(sorted(deck), list(range(52)))
+            actions = person_states[2][-1].available_actions
+            self.assertEqual([action.card.index for action in actions.values()], list(deck))
+            self.assertEqual(actions.draw().card.index, deck[0])
+            decks.append((deck, public_state[-1].param_dealer_id))
+
+            ## the chance player deals the deck in order, and a card out of the order swaps with the next card
+            env.forward(actions.draw())
+            env.forward(TexasHoldemActionChance.lookup_by_index(deck[10]))
+            pr = env.__private_state_history__[-1]
+            self.assertEqual(pr.deck[0:2], (deck[0], deck[10]))
+            self.assertEqual(pr.deck[10], deck[1])
+            self.assertEqual(len(env.__person_states_history__[2][-1].available_actions), 50)
+            self.assertFalse(deck[10] in env.__person_states_history__[2][-1].available_actions)
+            self.assertTrue(deck[1] in env.__person_states_history__[2][-1].available_actions)
+        self.assertEqual(decks[0], decks[1])
+        self.assertNotEqual(decks[0][0], decks[2][0])
+
+    def test_info_views(self):
+        for mode in ["full", "undo"]:
+            env = roomai.games.texasholdem.TexasHoldemEnv()
+            infos0, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":2, "param_history_mode":mode, "backward_enable":True})
+            infos1, public_state, person_states, private_state = env.forward(TexasHoldemActionChance.lookup("A_Heart"))
+            self.assertTrue(isinstance(infos1[0].public_state_history, roomai.games.common.HistoryView))
+            self.assertTrue(infos1[0].public_state_history is infos1[1].public_state_history)
+            state1   = infos1[2].person_state_history[-1]
+            history1 = tuple(infos1[0].public_state_history)
+            self.assertEqual(len(infos1[0].playerid_action_history), 1)
+            self.assertEqual(infos1[0].playerid_action_history[0].action.key, "A_Heart")
+
+            ## the infos sent before keep their states after the environment goes forward and back
+            env.backward()
+            infos2, public_state, person_states, private_state = env.forward(TexasHoldemActionChance.lookup("K_Heart"))
+            self.assertTrue(infos1[2].person_state_history[-1] is state1)
+            self.assertEqual(tuple(infos1[0].public_state_history), history1)
+            self.assertEqual(infos1[0].playerid_action_history[-1].action.key, "A_Heart")
+            self.assertEqual(infos2[0].playerid_action_history[-1].action.key, "K_Heart")
+            self.assertEqual(len(infos0[0].playerid_action_history), 0)
+            self.assertEqual(infos1[0].public_state_history[0:1], history1[0:1])
+            self.assertRaises(IndexError, infos0[0].public_state_history.__getitem__, len(infos0[0].public_state_history))
+
+    def test_info_views_after_reset(self):
+        env   = roomai.games.texasholdem.TexasHoldemEnv()
+        infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":2, "param_dealer_id":0})
+        infos, public_state, person_states, private_state = env.forward(TexasHoldemActionChance.lookup("A_Heart"))
+        states = list(infos[0].public_state_history)
+
+        ## the infos keep the finished game after the reset and the next game
+        env.reset()
+        self.assertEqual(list(infos[0].public_state_history), states)
+        env.init({"param_num_normal_players":3, "param_dealer_id":1})
+        self.assertEqual(list(infos[0].public_state_history), states)
+        self.assertEqual(infos[0].public_state_history[-1].param_dealer_id, 0)
+        self.assertEqual(len(infos[2].person_state_history[-1].available_actions), 51)
+        self.assertEqual(infos[0].playerid_action_history[-1].action.key, "A_Heart")
+
+    def test_read_only_views(self):
+        for array_state in [False, True]:
+            env = roomai.games.texasholdem.TexasHoldemEnv()
+            infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":2, "param_array_state":array_state})
+            pe = person_states[2][-1]
+            self.assertTrue(pe.available_actions is pe.available_actions)
+            self.assertEqual(len(pe.available_actions), 52)
+            def assign(actions):
+                actions["A_Heart"] = None
+            self.assertRaises(TypeError, assign, pe.available_actions)
+
+            pu = public_state[-1]
+            for name in ["chips", "bets", "is_fold", "is_allin", "is_needed_to_action", "public_cards"]:
+                self.assertTrue(getattr(pu, name) is getattr(pu, name))
+                self.assertTrue(isinstance(getattr(pu, name), tuple))
+
+            ## the view follows the actions of the person state
+            env.forward(TexasHoldemActionChance.lookup("A_Heart"))
+            self.assertEqual(len(person_states[2][-1].available_actions), 51)
+            self.assertEqual(len(pe.available_actions), 52)
+
+    def test_legal_actions(self):
+        def expected(pu):
+            ## the valid actions enumerated one by one
+            turn, to_call = pu.turn, pu.max_bet_sofar - pu.bets[pu.turn]
+            keys = ["Fold_0"]
+            if to_call == 0:
+                keys.append("Check_0")
+            if to_call != 0 and pu.chips[turn] > to_call:
+                keys.append("Call_%d" % (to_call))
+            price = to_call + pu.raise_account
+            while price < pu.chips[turn]:
+                keys.append("Raise_%d" % (price))
+                price += pu.raise_account
+            keys.append("Allin_%d" % (pu.chips[turn]))
+            return keys
+
+        random.seed(2)
+        for game in range(30):
+            env     = roomai.games.texasholdem.TexasHoldemEnv()
+            players = [roomai.games.common.RandomPlayer() for i in range(3)] + [roomai.games.common.RandomPlayerChance()]
+            infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":3, "param_init_chips":[100, 200, 400]})
+            while public_state[-1].is_terminal == False:
+                pu      = public_state[-1]
+                actions = person_states[pu.turn][-1].available_actions
+                if pu.turn < 3:
+                    self.assertTrue(isinstance(actions, TexasHoldemLegalActions))
+                    self.assertEqual(list(actions.keys()), expected(pu))
+                    self.assertEqual(len(actions), len(expected(pu)))
+                    self.assertEqual(actions.to_dict(), dict([(key, TexasHoldemAction.lookup(key)) for key in expected(pu)]))
+                    self.assertTrue(actions == actions.to_dict())
+                    self.assertFalse("Raise_%d" % (pu.chips[pu.turn]) in actions)
+                    self.assertFalse("Call_0" in actions or "Raise_07" in actions or "Raise" in actions)
+                    if actions.num_raises > 0:
+                        self.assertTrue(actions[ "Raise_%d" % (actions.raise_max)] is TexasHoldemAction.lookup("Raise_%d" % (actions.raise_max)))
+                        self.assertFalse("Raise_%d" % (actions.raise_max + actions.raise_step) in actions)
+                        self.assertFalse("Raise_%d" % (actions.raise_min + 1) in actions)
+                for i in range(4):
+                    players[i].receive_info(infos[i])
+                infos, public_state, person_states, private_state = env.forward(players[public_state[-1].turn].take_action())
+
+    def test_bet_abstraction(self):
+        env    = roomai.games.texasholdem.TexasHoldemEnv()
+        params = {"param_num_normal_players":2, "param_dealer_id":0, "param_bet_abstraction":[2, 0.5, 1]}
+        infos, public_state, person_states, private_state, action_history = env.init(params)
+        self.assertEqual(public_state[-1].param_bet_abstraction, (0.5, 1, 2))
+        ## a betting action on the turn of the chance player is invalid
+        self.assertRaises(ValueError, env.forward, TexasHoldemAction.lookup("Raise_35"))
+        for idx in range(9):
+            infos, public_state, person_states, private_state = env.forward(TexasHoldemActionChance.lookup_by_index(idx))
+
+        ## the small blind acts first: the call price is 5, and the pot after the call is 20
+        self.assertEqual(public_state[-1].turn, 1)
+        actions = person_states[1][-1].available_actions
+        self.assertEqual(list(actions.keys()), ["Fold_0", "Call_5", "Raise_15", "Raise_25", "Raise_45", "Allin_995"])
+        self.assertEqual(actions.raise_prices, (15, 25, 45))
+        self.assertFalse("Raise_35" in actions)
+        self.assertTrue(actions.nearest(TexasHoldemAction.lookup("Raise_35")) is TexasHoldemAction.lookup("Raise_25"))
+        self.assertTrue(actions.nearest(TexasHoldemAction.lookup("Raise_985")) is TexasHoldemAction.lookup("Allin_995"))
+        self.assertTrue(actions.nearest(TexasHoldemAction.lookup("Call_5")) is None)
+
+        ## a raise out of the abstraction is taken as the nearest size
+        infos, public_state, person_states, private_state = env.forward(TexasHoldemAction.lookup("Raise_105"))
+        self.assertEqual(action_history[-1].action.key, "Raise_45")
+        self.assertEqual(public_state[-1].bets, (10, 50))
+        self.assertRaises(ValueError, env.forward, TexasHoldemAction.lookup("Raise_7"))
+
+        ## an action after the end of the hand is invalid
+        infos, public_state, person_states, private_state = env.forward(TexasHoldemAction.lookup("Fold_0"))
+        self.assertTrue(public_state[-1].is_terminal)
+        self.assertRaises(ValueError, env.forward, TexasHoldemAction.lookup("Fold_0"))
+        self.assertRaises(ValueError, env.forward, TexasHoldemAction.lookup("Raise_35"))
+
+        self.assertRaises(ValueError, env.init, {"param_bet_abstraction":[0, 1]})
+
+    def test_array_state(self):
+        def play(params):
+            random.seed(1)
+            env     = roomai.games.texasholdem.TexasHoldemEnv()
+            players = [roomai.games.common.RandomPlayer() for i in range(3)] + [roomai.games.common.RandomPlayerChance()]
+            infos, public_state, person_states, private_state, action_history = env.init(params)
+            while public_state[-1].is_terminal == False:
+                for i in range(4):
+                    players[i].receive_info(infos[i])
+                infos, public_state, person_states, private_state = env.forward(players[public_state[-1].turn].take_action())
+            return env, [(pu.chips, pu.bets, pu.is_fold, pu.is_allin, pu.is_needed_to_action, pu.turn, pu.scores) for pu in public_state]
+
+        params      = {"param_num_normal_players":3, "param_init_chips":[100, 300, 500], "param_dealer_id":0}
+        env, tuples = play(params)
+        self.assertTrue(env.__public_state_history__[-1].player_array is None)
+
+        params["param_array_state"] = True
+        env, arrays = play(params)
+        self.assertEqual(tuples, arrays)
+
+        pu = env.__public_state_history__[-1]
+        self.assertEqual(pu.player_array.shape, (5, 3))
+        self.assertEqual(tuple(pu.player_array[0].tolist()), pu.chips)
+        self.assertFalse(pu.player_array.flags.writeable)
+        self.assertTrue(isinstance(pu.is_fold[0], bool))
+        self.assertTrue(pu.__deepcopy__().player_array is pu.player_array)
+
+    def test_env_pool(self):
+        ## the environments own their histories
+        env0 = roomai.games.texasholdem.TexasHoldemEnv()
+        env1 = roomai.games.texasholdem.TexasHoldemEnv()
+        infos, public_state0, person_states0, private_state0, action_history0 = env0.init({"param_num_normal_players":2})
+        infos, public_state1, person_states1, private_state1, action_history1 = env1.init({"param_num_normal_players":5})
+        env0.forward(TexasHoldemActionChance.lookup("A_Heart"))
+        self.assertEqual(len(public_state0), 2)
+        self.assertEqual(len(public_state1), 1)
+        self.assertEqual(len(person_states1), 6)
+
+        ## a new game without reset leaves the old histories alone
+        infos, public_state2, person_states2, private_state2, action_history2 = env0.init({"param_num_normal_players":3})
+        self.assertEqual(len(public_state0), 2)
+        self.assertFalse(public_state2 is public_state0)
+
+        pool = roomai.games.common.EnvPool(roomai.games.texasholdem.TexasHoldemEnv, max_size = 1)
+        env  = pool.acquire()
+        infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":3})
+        buffers = (public_state, person_states, private_state, action_history)
+        initial = (public_state[0], person_states[1][0], private_state[0])
+        env.forward(TexasHoldemActionChance.lookup("A_Heart"))
+        pool.release(env)
+        pool.release(roomai.games.texasholdem.TexasHoldemEnv())
+        self.assertEqual((pool.num_idle, pool.num_created), (1, 1))
+
+        self.assertTrue(pool.acquire() is env)
+        infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":3})
+        ## the reused environment starts with new histories and states, and the old ones keep the finished game
+        self.assertTrue(all([a is not b for a, b in zip(buffers, (public_state, person_states, private_state, action_history))]))
+        self.assertTrue(all([a is not b for a, b in zip(initial, (public_state[0], person_states[1][0], private_state[0]))]))
+        self.assertEqual(len(buffers[0]), 2)
+        self.assertEqual(buffers[3][0].action.key, "A_Heart")
+        self.assertEqual(len(public_state), 1)
+        self.assertEqual(len(private_state[0].all_used_cards), 0)
+        self.assertEqual(len(person_states[3][0].available_actions), 52)
+        self.assertEqual(person_states[1][0].id, 1)
+
     def testEnv3players(self):
 
         env = TexasHoldemEnv()
@@ -295,4 +626,75 @@ class TexasEnvTester(unittest.TestCase):
         scores = TexasHoldemEnv.compete_silent(env, players)
         print (scores)
 
+    def testCompeteProcesses(self):
+        """
+
+        """
+        players = [RandomPlayer() for i in range(3)]
+        env     = TexasHoldemEnv()
+
+        scores1 = TexasHoldemEnv.compete_silent(env, players, num_hands = 250, num_processes = 1, seed = 3)
+        scores2 = TexasHoldemEnv.compete_silent(env, players, num_hands = 250, num_processes = 2, seed = 3)
+        self.assertEqual(scores1, scores2)
+        self.assertAlmostEqual(sum(scores1), 0)
+
+        ## every hand has its own stacks and dealer, and the big blind of the compete
+        class RecordPlayer(RandomPlayer):
+            hands = []
+            def receive_info(self, info):
+                RandomPlayer.receive_info(self, info)
+                pu = info.public_state_history[-1]
+                if len(info.public_state_history) == 1:
+                    RecordPlayer.hands.append((tuple(pu.param_init_chips), pu.param_dealer_id, pu.param_big_blind_bet, pu.bets))
+        TexasHoldemEnv.compete_silent(env, [RecordPlayer(), RandomPlayer(), RandomPlayer()], num_hands = 30, seed = 3)
+        self.assertEqual(len(RecordPlayer.hands), 30)
+        for chips, dealer_id, big_blind_bet, bets in RecordPlayer.hands:
+            self.assertEqual(len(chips), 3)
+            self.assertTrue(all([1000 <= c < 1200 for c in chips]))
+            self.assertTrue(0 <= dealer_id < 3)
+            self.assertEqual(big_blind_bet, 50)
+            self.assertEqual(bets[(dealer_id + 2) % 3], 50)
+        self.assertTrue(len(set([hand[0] for hand in RecordPlayer.hands])) > 1)
+        self.assertEqual(set([hand[1] for hand in RecordPlayer.hands]), set([0, 1, 2]))
+
+        ## the compete doesn't change the random module of the caller
+        random.seed(11)
+        expected = random.random()
+        random.seed(11)
+        TexasHoldemEnv.compete_silent(env, players, num_hands = 50, seed = 3)
+        list(TexasHoldemEnv.compete_stream(env, players, num_hands = 50, seed = 3))
+        self.assertEqual(random.random(), expected)
+
+    def testCompeteStream(self):
+        """
+
+        """
+        env     = TexasHoldemEnv()
+        players = [RandomPlayer() for i in range(2)]
+
+        ## without stopping early, the stream has the hands of compete_silent
+        hands   = list(TexasHoldemEnv.compete_stream(env, players, num_hands = 150, seed = 5, stop_on_leader = False))
+        stats   = hands[-1][1]
+        self.assertEqual(len(hands), 150)
+        self.assertEqual(stats.count, 150)
+        scores  = TexasHoldemEnv.compete_silent(env, players, num_hands = 150, seed = 5)
+        for i in range(2):
+            self.assertAlmostEqual(stats.means[i], scores[i])
+            self.assertAlmostEqual(stats.means[i], sum([h[0][i] for h in hands]) / 150.0)
+            self.assertTrue(stats.intervals[i][0] <= stats.means[i] <= stats.intervals[i][1])
+
+        ## the player who always folds is clearly behind
+        class FoldPlayer(RandomPlayer):
+            def take_action(self):
+                return self.available_actions.action_at(0)
+        hands = list(TexasHoldemEnv.compete_stream(env, [RandomPlayer(), FoldPlayer()], num_hands = 10000, seed = 5))
+        self.assertTrue(len(hands) < 10000)
+        self.assertEqual(hands[-1][1].leader, 0)
+
+        stats = roomai.games.common.CompeteStats(2)
+        for s in [[10, -10], [-30, 30], [5, -5]]:
+            stats.add(s)
+        self.assertAlmostEqual(stats.means[0], -5)
+        self.assertAlmostEqual(stats.variances[0], 475)
+
 
@@ -0,0 +1,69 @@
+#!/bin/python
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from roomai.games.texasholdem import EquityCalculator
+from roomai.games.texasholdem import PokerCard
+from roomai.games.texasholdem import PreflopEquityTable
+
+
+class TexasEquityTester(unittest.TestCase):
+
+    def test_exhaustive(self):
+        result = EquityCalculator.compute([["A_Spade", "A_Heart"], ["K_Club", "Q_Club"]], ["2_Heart", "7_Club", "T_Club"])
+        self.assertTrue(result.is_exact)
+        self.assertEqual(result.num_runouts, 990)
+        self.assertAlmostEqual(result.equity[0], 616 / 990.0)
+        self.assertAlmostEqual(sum(result.equity), 1.0)
+
+        ## both players play the board
+        board  = [PokerCard.lookup(k) for k in ["T_Spade", "J_Spade", "Q_Spade", "K_Spade", "A_Spade"]]
+        result = EquityCalculator.compute([["2_Heart", "3_Heart"], ["4_Club", "5_Club"], ["6_Club", "7_Club"]], board)
+        self.assertEqual(result.tie, (1.0, 1.0, 1.0))
+        self.assertAlmostEqual(result.equity[0], 1 / 3.0)
+
+    def test_monte_carlo(self):
+        hands   = [["A_Spade", "A_Heart"], ["K_Club", "Q_Club"]]
+        result1 = EquityCalculator.compute(hands, num_samples = 30000, seed = 7)
+        result2 = EquityCalculator.compute(hands, num_samples = 30000, seed = 7, num_processes = 2)
+        self.assertFalse(result1.is_exact)
+        self.assertEqual(result1.equity, result2.equity)
+        self.assertTrue(abs(result1.equity[0] - 0.8232) < 0.02)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, EquityCalculator.compute, [["A_Spade", "A_Heart"]])
+        self.assertRaises(ValueError, EquityCalculator.compute, [["A_Spade", "A_Heart"], ["A_Spade", "Q_Club"]])
+        self.assertRaises(ValueError, EquityCalculator.compute, [["A_Spade", "A_Heart"], ["K_Club", "Q_Club"]], ["2_Heart"])
+
+    def test_preflop_hand_index(self):
+        indices = set()
+        for c0 in range(52):
+            for c1 in range(c0 + 1, 52):
+                hand  = [PokerCard.lookup_by_index(c0), PokerCard.lookup_by_index(c1)]
+                index = PreflopEquityTable.hand_index(hand)
+                indices.add(index)
+                self.assertEqual(PreflopEquityTable.hand_index(PreflopEquityTable.hand_cards(index)), index)
+        self.assertEqual(indices, set(range(169)))
+        self.assertEqual(PreflopEquityTable.hand_name(PreflopEquityTable.hand_index([PokerCard.lookup("7_Heart"), PokerCard.lookup("2_Club")])), "72o")
+
+    def test_preflop_table(self):
+        path = os.path.join(tempfile.mkdtemp(), "preflop_equity.npy")
+        try:
+            table = PreflopEquityTable.generate(num_samples = 200, seed = 0)
+            np.save(path, table)
+            loaded = PreflopEquityTable.load(path)
+            self.assertTrue(isinstance(loaded, np.memmap))
+            aces = [PokerCard.lookup("A_Spade"), PokerCard.lookup("A_Heart")]
+            self.assertAlmostEqual(PreflopEquityTable.lookup(aces, 1), float(table[0, 0]))
+            self.assertTrue(PreflopEquityTable.lookup(aces, 1) > PreflopEquityTable.lookup(aces, 5))
+            self.assertRaises(ValueError, PreflopEquityTable.lookup, aces, 6)
+        finally:
+            shutil.rmtree(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/bin/python
+import itertools
+import random
+import unittest
+
+import numpy as np
+
+from roomai.games.texasholdem import HandEvaluator
+from roomai.games.texasholdem import BoardContext
+from roomai.games.texasholdem import TexasHoldemEnv
+from roomai.games.texasholdem import PokerCard
+from roomai.games.texasholdem import AllPokerCards
+
+
+def five_cards_rank(cards):
+    points = sorted([c.point_rank for c in cards], reverse = True)
+    counts = dict()
+    for p in points:
+        counts[p] = counts.get(p, 0) + 1
+    groups   = sorted([(counts[p], p) for p in counts], reverse = True)
+    ordered  = []
+    for c, p in groups:
+        ordered += [p] * c
+    is_flush = len(set([c.suit_rank for c in cards])) == 1
+
+    is_straight = len(counts) == 5 and points[0] - points[4] == 4
+    if points == [12, 3, 2, 1, 0]:
+        is_straight = True
+        ordered     = [3, 2, 1, 0, 12]
+
+    if is_straight and is_flush:   category = 8
+    elif groups[0][0] == 4:        category = 7
+    elif groups[0][0] == 3 and groups[1][0] == 2: category = 6
+    elif is_flush:                 category = 5
+    elif is_straight:              category = 4
+    elif groups[0][0] == 3:        category = 3
+    elif groups[0][0] == 2 and groups[1][0] == 2: category = 2
+    elif groups[0][0] == 2:        category = 1
+    else:                          category = 0
+    return [category] + ordered
+
+
+class TexasEvaluatorTester(unittest.TestCase):
+
+    def test_random_hands(self):
+        rng   = random.Random(0)
+        cards = list(AllPokerCards.values())
+        for i in range(2000):
+            num   = rng.choice([5, 6, 7])
+            hand  = rng.sample(cards, num)
+            best  = max([five_cards_rank(c) for c in itertools.combinations(hand, 5)])
+
+            strength = HandEvaluator.evaluate(hand)
+            self.assertEqual(HandEvaluator.category(strength), best[0])
+            self.assertEqual(HandEvaluator.points(strength), best[1:])
+            self.assertEqual(five_cards_rank(HandEvaluator.best_five(hand, strength)), best)
+
+    def test_order(self):
+        wheel     = [PokerCard.lookup(k) for k in ["A_Spade", "2_Heart", "3_Club", "4_Spade", "5_Diamond", "K_Heart", "K_Club"]]
+        six_high  = [PokerCard.lookup(k) for k in ["6_Spade", "2_Heart", "3_Club", "4_Spade", "5_Diamond", "K_Heart", "K_Club"]]
+        flush     = [PokerCard.lookup(k) for k in ["A_Heart", "2_Heart", "3_Heart", "4_Heart", "9_Heart", "K_Heart", "K_Club"]]
+        sf_wheel  = [PokerCard.lookup(k) for k in ["A_Heart", "2_Heart", "3_Heart", "4_Heart", "5_Heart", "K_Heart", "K_Club"]]
+        quads     = [PokerCard.lookup(k) for k in ["A_Heart", "A_Spade", "A_Club", "A_Diamond", "5_Heart", "K_Heart", "K_Club"]]
+
+        strengths = [HandEvaluator.evaluate(c) for c in [wheel, six_high, flush, quads, sf_wheel]]
+        self.assertEqual(strengths, sorted(strengths))
+        self.assertEqual(HandEvaluator.pattern(strengths[0])[0], "Straight_DiffSuit")
+        self.assertEqual(HandEvaluator.pattern(strengths[4])[0], "Straight_SameSuit")
+        self.assertEqual([c.key for c in HandEvaluator.best_five(sf_wheel)], ["5_Heart", "4_Heart", "3_Heart", "2_Heart", "A_Heart"])
+
+    def test_rank_hands(self):
+        rng   = np.random.RandomState(0)
+        cards = np.array([rng.permutation(52)[0:7] for i in range(3000)])
+        ranks = TexasHoldemEnv.rank_hands(cards[:, 0:2], cards[:, 2:7])
+        self.assertEqual(ranks.shape, (3000,))
+        for i in range(3000):
+            self.assertEqual(ranks[i], HandEvaluator.evaluate_indices(list(cards[i])))
+
+        turn = HandEvaluator.evaluate_batch(cards[:, 0:6])
+        for i in range(100):
+            self.assertEqual(turn[i], HandEvaluator.evaluate_indices(list(cards[i, 0:6])))
+
+        self.assertRaises(ValueError, TexasHoldemEnv.rank_hands, cards[:, 0:2], cards[0:10, 2:7])
+        self.assertRaises(ValueError, HandEvaluator.evaluate_batch, cards[:, 0:4])
+
+    def test_board_context(self):
+        rng   = random.Random(0)
+        cards = list(AllPokerCards.values())
+        for i in range(1000):
+            num   = rng.choice([3, 4, 5])
+            drawn = rng.sample(cards, num + 12)
+            board = BoardContext(drawn[0:num])
+            hands = [drawn[num + 2 * p: num + 2 * p + 2] for p in range(6)]
+            ranks = board.rank_all(hands[0:5] + [None])
+            for p in range(5):
+                self.assertEqual(ranks[p], HandEvaluator.evaluate(hands[p] + drawn[0:num]))
+            self.assertEqual(ranks[5], None)
+
+    def test_cache(self):
+        hands = [[PokerCard.lookup(k) for k in ["A_Spade", "A_Heart", "K_Club", "K_Spade", "2_Heart", "7_Diamond", "9_Club"]],
+                 [PokerCard.lookup(k) for k in ["A_Spade", "A_Heart", "K_Club", "K_Spade", "2_Heart"]],
+                 [PokerCard.lookup(k) for k in ["5_Heart", "6_Heart", "7_Heart", "8_Heart", "9_Heart", "2_Club"]]]
+        expected = [HandEvaluator.evaluate(h) for h in hands]
+        try:
+            cache = HandEvaluator.enable_cache(2)
+            self.assertEqual(HandEvaluator.cache_info(), cache)
+            self.assertEqual(HandEvaluator.evaluate(hands[0]), expected[0])
+            self.assertEqual(HandEvaluator.evaluate(list(reversed(hands[0]))), expected[0])
+            self.assertEqual(HandEvaluator.evaluate(hands[1]), expected[1])
+            self.assertEqual(HandEvaluator.evaluate_mask(PokerCard.cards_to_mask(hands[2])), expected[2])
+            self.assertEqual((cache.hits, cache.misses, cache.evictions, cache.size), (1, 3, 1, 2))
+            self.assertEqual(HandEvaluator.evaluate_mask(PokerCard.cards_to_mask(hands[1])), expected[1])
+            self.assertEqual(HandEvaluator.evaluate(hands[0]), expected[0])
+            self.assertEqual((cache.hits, cache.misses, cache.evictions, cache.size), (2, 4, 2, 2))
+            self.assertAlmostEqual(cache.hit_rate, 1.0 / 3)
+            cache.clear()
+            self.assertEqual((cache.hits, cache.misses, cache.evictions, cache.size), (0, 0, 0, 0))
+        finally:
+            HandEvaluator.disable_cache()
+        self.assertEqual(HandEvaluator.cache_info(), None)
+        self.assertRaises(ValueError, HandEvaluator.enable_cache, 0)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, HandEvaluator.evaluate, [PokerCard.lookup("A_Heart")])
+        self.assertRaises(ValueError, BoardContext, [PokerCard.lookup("A_Heart")])
+
+
+if __name__ == "__main__":
+    unittest.main()
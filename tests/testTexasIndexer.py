@@ -0,0 +1,66 @@
+#!/bin/python
+import itertools
+import unittest
+
+import numpy as np
+
+from roomai.games.texasholdem import HandIndexer
+from roomai.games.texasholdem import PokerCard
+from roomai.games.texasholdem import Stage
+
+
+class TexasIndexerTester(unittest.TestCase):
+
+    def test_size(self):
+        self.assertEqual(HandIndexer.lookup(Stage.firstStage).size,  169)
+        self.assertEqual(HandIndexer.lookup(Stage.secondStage).size, 1286792)
+        self.assertEqual(HandIndexer.lookup(Stage.thirdStage).size,  13960050)
+        self.assertEqual(HandIndexer.lookup(Stage.fourthStage).size, 123156254)
+
+    def test_preflop(self):
+        indexer = HandIndexer.lookup(Stage.firstStage)
+        indices = indexer.index_batch(np.array(list(itertools.combinations(range(52), 2))))
+        self.assertEqual(sorted(set(indices.tolist())), list(range(169)))
+
+        aks = indexer.index([PokerCard.lookup("A_Spade"), PokerCard.lookup("K_Spade")])
+        akh = indexer.index([PokerCard.lookup("K_Heart"), PokerCard.lookup("A_Heart")])
+        ako = indexer.index([PokerCard.lookup("A_Heart"), PokerCard.lookup("K_Spade")])
+        self.assertEqual(aks, akh)
+        self.assertNotEqual(aks, ako)
+
+    def test_roundtrip_and_isomorphism(self):
+        rng = np.random.RandomState(0)
+        for stage in [Stage.secondStage, Stage.thirdStage, Stage.fourthStage]:
+            indexer = HandIndexer.lookup(stage)
+            indices = rng.randint(0, indexer.size, 2000)
+            self.assertTrue((indexer.index_batch(indexer.unindex_batch(indices)) == indices).all())
+
+            num_public = indexer.cards_per_round[1]
+            cards      = np.array([rng.permutation(52)[0:2 + num_public] for i in range(2000)])
+            permuted   = (cards >> 2) * 4 + rng.permutation(4)[cards & 3]
+            permuted   = np.concatenate([permuted[:, 1::-1], permuted[:, :1:-1]], axis = 1)
+            self.assertTrue((indexer.index_batch(cards) == indexer.index_batch(permuted)).all())
+
+            ## the index of one hand is the same as the batch
+            hands = [([PokerCard.lookup_by_index(int(c)) for c in row[0:2]], [PokerCard.lookup_by_index(int(c)) for c in row[2:]]) for row in cards[0:200]]
+            self.assertEqual([indexer.index(h, p) for h, p in hands], indexer.index_batch(cards[0:200]).tolist())
+
+        hand_cards, public_cards = HandIndexer.lookup(Stage.secondStage).unindex(0)
+        self.assertEqual(len(hand_cards), 2)
+        self.assertEqual(len(public_cards), 3)
+
+    def test_invalid(self):
+        indexer = HandIndexer.lookup(Stage.secondStage)
+        self.assertRaises(ValueError, indexer.index_batch, np.array([[0, 1, 2, 3]]))
+        self.assertRaises(ValueError, indexer.index_batch, np.array([[0, 0, 2, 3, 4]]))
+        self.assertRaises(ValueError, indexer.unindex_batch, np.array([indexer.size]))
+        self.assertRaises(ValueError, HandIndexer.lookup, 5)
+
+        cards = [PokerCard.lookup_by_index(idx) for idx in [0, 0, 2, 3, 4]]
+        self.assertRaises(ValueError, indexer.index, cards[0:2], cards[2:])
+        self.assertRaises(ValueError, indexer.index, cards[1:3], cards[2:])
+        self.assertRaises(ValueError, indexer.index, cards[1:3], cards[3:])
+
+
+if __name__ == "__main__":
+    unittest.main()
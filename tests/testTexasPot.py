@@ -0,0 +1,60 @@
+#!/bin/python
+import unittest
+
+from roomai.games.texasholdem import TexasHoldemPot
+
+
+class TexasPotTester(unittest.TestCase):
+
+    def side_pots(self):
+        ## player0 all in with 50, player1 all in with 100, player2 and player3 bet 200
+        pot = TexasHoldemPot(4)
+        pot.add(2, 200)
+        pot.add(0, 50)
+        pot.close(50)
+        pot.add(3, 200)
+        pot.add(1, 100)
+        pot.close(100)
+        return pot
+
+    def test_side_pots(self):
+        pot = self.side_pots()
+        self.assertEqual(pot.total, 550)
+        self.assertEqual(pot.amounts, (200, 150, 200))
+        self.assertEqual([pot.lower_bound(k) for k in range(3)], [0, 50, 100])
+        self.assertEqual(pot.upper_bound(2), None)
+        self.assertEqual(pot.eligible_players(1, [False, False, False, False]), [1, 2, 3])
+        self.assertEqual(pot.eligible_players(2, [False, False, False, True]),  [2])
+
+        copy = pot.__deepcopy__()
+        copy.add(2, 10)
+        self.assertEqual(pot.total, 550)
+        self.assertEqual(copy.amounts, (200, 150, 210))
+
+    def test_distribute(self):
+        pot = self.side_pots()
+        self.assertEqual(pot.distribute([4, 3, 2, 1], 0), [200, 150, 200, 0])
+        self.assertEqual(pot.distribute([1, 4, 3, None], 0), [0, 350, 200, 0])
+        self.assertEqual(pot.distribute([4, 1, 2, 2], 0), [200, 0, 175, 175])
+
+        ## the odd chip goes to the first winner after the dealer
+        pot = TexasHoldemPot(3)
+        pot.add(0, 5)
+        pot.add(1, 10)
+        pot.add(2, 10)
+        self.assertEqual(pot.distribute([1, 2, 2], 0), [0, 13, 12])
+        self.assertEqual(pot.distribute([1, 2, 2], 1), [0, 12, 13])
+        self.assertEqual(pot.distribute([2, 2, 2], 2), [9, 8, 8])
+
+    def test_uncalled(self):
+        ## the chips nobody else matches go back
+        pot = TexasHoldemPot(2)
+        pot.add(0, 30)
+        pot.close(30)
+        pot.add(1, 100)
+        self.assertEqual(pot.amounts, (60, 70))
+        self.assertEqual(pot.distribute([2, 1], 0), [60, 70])
+
+
+if __name__ == "__main__":
+    unittest.main()
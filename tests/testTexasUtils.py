@@ -56,7 +56,7 @@ class TexasUtilsTester(unittest.TestCase):
         h1     = [roomai.games.texasholdem.PokerCard(7, 0), roomai.games.texasholdem.PokerCard(7, 1)]
         keep   = [roomai.games.texasholdem.PokerCard(3, 1), roomai.games.texasholdem.PokerCard(4, 2), roomai.games.texasholdem.PokerCard(5, 3), roomai.games.texasholdem.PokerCard(6, 0), roomai.games.texasholdem.PokerCard(7, 2)]
         pattern = TexasHoldemEnv.__cards2pattern_cards__(h1, keep)[0]
-        self.assertEqual(pattern[0],"3_1_1")
+        self.assertEqual(pattern[0],"Straight_DiffSuit")
 
 
     def test_cards(self):
@@ -94,6 +94,25 @@ class TexasUtilsTester(unittest.TestCase):
         self.assertTrue(diff > 0)
 
 
+    def test_card_index_mask(self):
+        """
+
+        """
+        for idx in range(52):
+            card = roomai.games.texasholdem.PokerCard.lookup_by_index(idx)
+            self.assertEqual(card.index, idx)
+            self.assertEqual(card.mask, 1 << idx)
+            self.assertTrue(roomai.games.texasholdem.PokerCard.lookup(card.key) is card)
+
+        cards = [roomai.games.texasholdem.PokerCard.lookup(k) for k in ["A_Club", "2_Spade", "T_Heart"]]
+        mask  = roomai.games.texasholdem.PokerCard.cards_to_mask(cards)
+        self.assertEqual(mask, (1 << 51) | 1 | (1 << 33))
+        self.assertEqual([c.key for c in roomai.games.texasholdem.PokerCard.mask_to_cards(mask)], ["2_Spade", "T_Heart", "A_Club"])
+
+        seven = [roomai.games.texasholdem.PokerCard.lookup_by_index(idx) for idx in [0, 5, 9, 13, 17, 40, 51]]
+        self.assertEqual(roomai.games.texasholdem.HandEvaluator.evaluate(seven),
+                         roomai.games.texasholdem.HandEvaluator.evaluate_mask(roomai.games.texasholdem.PokerCard.cards_to_mask(seven)))
+
     def test_available_actions(self):
         """
 
@@ -130,6 +149,39 @@ class TexasUtilsTester(unittest.TestCase):
         action = TexasHoldemAction("Allin_1000")
         print (action.key)
 
+    def test_action_id(self):
+        ids = [TexasHoldemAction.lookup(key).id for key in ["Fold_0", "Check_0", "Call_1", "Raise_1", "Allin_1", "Call_2", "Raise_2", "Allin_2"]]
+        self.assertEqual(ids, list(range(8)))
+
+        TexasHoldemAction.precompute(300)
+        for action_id in range(TexasHoldemAction.num_ids(300)):
+            action = TexasHoldemAction.lookup_by_id(action_id)
+            self.assertEqual(action.id, action_id)
+            self.assertTrue(TexasHoldemAction.lookup(action.key) is action)
+            self.assertTrue(TexasHoldemAction.lookup_by_option_price(action.option, action.price) is action)
+
+        for key in ["Fold_5", "Check_1", "Call_0", "Raise_05", "Raise_", "Bet_10", "Raise_-5"]:
+            self.assertRaises(ValueError, TexasHoldemAction.lookup, key)
+        self.assertRaises(ValueError, TexasHoldemAction.lookup_by_id, -1)
+
+        ## the actions of deep stacks are interned by their first lookups
+        action = TexasHoldemAction.lookup_by_id(TexasHoldemAction.num_ids(10 ** 7) - 1)
+        self.assertEqual(action.key, "Allin_10000000")
+        self.assertTrue(TexasHoldemAction.lookup("Allin_10000000") is action)
+
+        ## the env accepts the ids
+        env = TexasHoldemEnv()
+        infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players":2, "param_dealer_id":0})
+        for idx in range(9):
+            infos, public_state, person_states, private_state = env.forward(idx)
+        actions = person_states[1][-1].available_actions
+        self.assertEqual(actions.ids(), [action.id for action in actions.values()])
+        self.assertTrue(TexasHoldemAction.lookup("Call_5").id in actions)
+        self.assertFalse(TexasHoldemAction.lookup("Call_6").id in actions)
+        infos, public_state, person_states, private_state = env.forward(TexasHoldemAction.lookup("Raise_15").id)
+        self.assertEqual(action_history[-1].action.key, "Raise_15")
+        self.assertEqual(action_history[0].action.key, "2_Spade")
+
 
 
     def test_compare(self):
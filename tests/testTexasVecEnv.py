@@ -0,0 +1,75 @@
+#!/bin/python
+import unittest
+
+import numpy as np
+
+from roomai.games.texasholdem import *
+
+
+class TexasVecEnvTester(unittest.TestCase):
+
+    def new_hand(self, vec, b):
+        ## the TexasHoldemEnv playing the same hand as the table b
+        n   = vec.num_players
+        env = TexasHoldemEnv()
+        env.init({"param_num_normal_players":n, "param_dealer_id":int(vec.dealer_id[b]), "param_init_chips":[100, 250, 40, 500, 1000, 30][0:n], "param_big_blind_bet":10})
+        deck = [int(vec.hand_cards[b, i % n, i // n]) for i in range(2 * n)] + [int(c) for c in vec.keep_cards[b]]
+        for idx in deck:
+            env.forward(idx)
+        return env
+
+    def check_same(self, vec, b, env):
+        pu = env.__public_state_history__[-1]
+        self.assertEqual(tuple(vec.chips[b].tolist()), pu.chips)
+        self.assertEqual(tuple(vec.bets[b].tolist()), pu.bets)
+        self.assertEqual(tuple(vec.is_fold[b].tolist()), pu.is_fold)
+        self.assertEqual(tuple(vec.is_allin[b].tolist()), pu.is_allin)
+        self.assertEqual(tuple(vec.is_needed_to_action[b].tolist()), pu.is_needed_to_action)
+        self.assertEqual((int(vec.turn[b]), int(vec.stage[b]), int(vec.max_bet_sofar[b]), int(vec.raise_account[b])), (pu.turn, pu.stage, pu.max_bet_sofar, pu.raise_account))
+        self.assertEqual([c for c in vec.public_cards[b].tolist() if c >= 0], [c.index for c in pu.public_cards])
+
+        actions = env.__person_states_history__[pu.turn][-1].available_actions
+        mask    = vec.available_action_mask()[b]
+        self.assertEqual(sorted(np.nonzero(mask)[0].tolist()), sorted(actions.ids()))
+
+    def test_same_as_env(self):
+        for num_players in [2, 3, 6]:
+            num_envs = 16
+            vec      = VecTexasHoldemEnv(num_envs, {"param_num_normal_players":num_players, "param_init_chips":[100, 250, 40, 500, 1000, 30][0:num_players]}, seed = num_players)
+            envs     = [self.new_hand(vec, b) for b in range(num_envs)]
+            rng      = np.random.default_rng(0)
+            hands    = 0
+            while hands < 200:
+                ids            = vec.sample_actions(rng)
+                self.assertTrue(vec.is_action_valid(ids).all())
+                rewards, dones = vec.step(ids)
+                for b in range(num_envs):
+                    infos, public_state, person_states, private_state = envs[b].forward(int(ids[b]))
+                    self.assertEqual(bool(dones[b]), public_state[-1].is_terminal)
+                    if dones[b]:
+                        self.assertEqual(rewards[b].tolist(), list(public_state[-1].scores))
+                        envs[b] = self.new_hand(vec, b)
+                        hands  += 1
+                    else:
+                        self.assertEqual(rewards[b].tolist(), [0.0] * num_players)
+                    self.check_same(vec, b, envs[b])
+            self.assertEqual(vec.num_hands, hands)
+
+    def test_invalid(self):
+        vec = VecTexasHoldemEnv(4, {"param_num_normal_players":2, "param_dealer_id":0}, seed = 0)
+        ## the small blind acts first and can't check
+        ids = np.array([TexasHoldemAction.lookup("Call_5").id] * 4)
+        ids[2] = TexasHoldemAction.lookup("Check_0").id
+        self.assertEqual(vec.is_action_valid(ids).tolist(), [True, True, False, True])
+        self.assertRaises(ValueError, vec.step, ids)
+        self.assertRaises(ValueError, vec.step, ids[0:3])
+        self.assertRaises(ValueError, VecTexasHoldemEnv, 4, {"param_num_normal_players":2, "param_init_chips":[10, 100]})
+
+        ids[2] = TexasHoldemAction.lookup("Raise_15").id
+        rewards, dones = vec.step(ids)
+        self.assertEqual(vec.bets.tolist(), [[10, 10], [10, 10], [10, 20], [10, 10]])
+        self.assertFalse(vec.chips.flags.writeable)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/bin/python
+import argparse
+import gc
+import random
+import tracemalloc
+
+import roomai.games.common
+import roomai.games.texasholdem
+
+parser = argparse.ArgumentParser(description = "Measure the memory used by every step stored in the history of TexasHoldemEnv")
+parser.add_argument("--hands",   type = int, default = 200)
+parser.add_argument("--players", type = int, default = 6)
+parser.add_argument("--mode",    default = "full")
+parser.add_argument("--seed",    type = int, default = 0)
+args = parser.parse_args()
+
+random.seed(args.seed)
+players = [roomai.games.common.RandomPlayer() for i in range(args.players)] + [roomai.games.common.RandomPlayerChance()]
+## build the lookup tables and the cached actions before the measurement
+roomai.games.texasholdem.HandEvaluator.evaluate(list(roomai.games.texasholdem.AllPokerCardsByIndex[0:7]))
+for price in range(1, 1001):
+    for option in ["Call", "Raise", "Allin"]:
+        roomai.games.texasholdem.TexasHoldemAction.lookup("%s_%d" % (option, price))
+
+gc.collect()
+tracemalloc.start()
+envs      = []
+num_steps = 0
+for hand in range(args.hands):
+    env = roomai.games.texasholdem.TexasHoldemEnv()
+    infos, public_state, person_states, private_state, action_history = env.init({"param_num_normal_players": args.players, "param_history_mode": args.mode})
+    while public_state[-1].is_terminal == False:
+        for i in range(args.players + 1):
+            players[i].receive_info(infos[i])
+        infos, public_state, person_states, private_state = env.forward(players[public_state[-1].turn].take_action())
+        num_steps += 1
+    envs.append(env)
+
+for player in players:
+    player.receive_info(infos[0])
+infos = None
+gc.collect()
+size, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+print ("hands = %d, players = %d, history mode = %s" % (args.hands, args.players, args.mode))
+print ("steps = %d, memory = %d bytes, %.1f bytes per stored step" % (num_steps, size, size / float(num_steps)))
@@ -0,0 +1,23 @@
+#!/bin/python
+import argparse
+import time
+
+import roomai.games.texasholdem
+
+parser = argparse.ArgumentParser(description = "Measure the steps per second of VecTexasHoldemEnv with random actions")
+parser.add_argument("--envs",    type = int,   default = 4096)
+parser.add_argument("--players", type = int,   default = 2)
+parser.add_argument("--seconds", type = float, default = 5.0)
+parser.add_argument("--seed",    type = int,   default = 0)
+args = parser.parse_args()
+
+env       = roomai.games.texasholdem.VecTexasHoldemEnv(args.envs, {"param_num_normal_players": args.players}, seed = args.seed)
+num_steps = 0
+start     = time.time()
+while time.time() - start < args.seconds:
+    env.step(env.sample_actions())
+    num_steps += args.envs
+elapsed = time.time() - start
+
+print ("envs = %d, players = %d" % (args.envs, args.players))
+print ("steps = %d, hands = %d, %.0f steps per second" % (num_steps, env.num_hands, num_steps / elapsed))
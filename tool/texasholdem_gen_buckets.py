@@ -0,0 +1,24 @@
+#!/bin/python
+import argparse
+
+import roomai.games.texasholdem
+
+parser = argparse.ArgumentParser(description = "Generate the card abstraction buckets of TexasHoldem. Run it again with the same directory to resume it")
+parser.add_argument("--directory", default = "texasholdem_abstraction")
+parser.add_argument("--buckets",   type = int, default = 50)
+parser.add_argument("--stages",    type = int, nargs = "+", default = [1, 2, 3, 4])
+parser.add_argument("--runouts",   type = int, default = 16)
+parser.add_argument("--opponents", type = int, default = 16)
+parser.add_argument("--bins",      type = int, default = 8)
+parser.add_argument("--chunk",     type = int, default = 4096)
+parser.add_argument("--seed",      type = int, default = 0)
+parser.add_argument("--processes", type = int, default = None)
+args = parser.parse_args()
+
+pipeline = roomai.games.texasholdem.BucketingPipeline(args.directory, num_buckets = args.buckets, num_runouts = args.runouts,
+                                                      num_opponents = args.opponents, num_bins = args.bins, chunk_size = args.chunk, seed = args.seed)
+pipeline.run(stages = args.stages, num_processes = args.processes)
+
+abstraction = roomai.games.texasholdem.CardAbstraction.load(args.directory)
+for stage in args.stages:
+    print ("stage %d: %d buckets" % (stage, abstraction.num_buckets(stage)))
@@ -0,0 +1,19 @@
+#!/bin/python
+import argparse
+
+import numpy as np
+
+import roomai.games.texasholdem
+
+parser = argparse.ArgumentParser(description = "Generate the preflop equity table of TexasHoldem")
+parser.add_argument("--output",    default = roomai.games.texasholdem.PreflopEquityTable.default_path)
+parser.add_argument("--samples",   type = int, default = 100000)
+parser.add_argument("--seed",      type = int, default = 0)
+parser.add_argument("--processes", type = int, default = 1)
+args = parser.parse_args()
+
+table = roomai.games.texasholdem.PreflopEquityTable.generate(args.samples, args.seed, args.processes)
+np.save(args.output, table)
+
+for i in range(169):
+    print ("%s\t%s" % (roomai.games.texasholdem.PreflopEquityTable.hand_name(i), "\t".join(["%.4f" % e for e in table[i]])))